@@ -0,0 +1,193 @@
+"""
+Files d'attente de tâches stockées en base, partagées par les applications.
+
+Chaque file est un modèle concret héritant de ``QueuedJob`` (``ExtractionJob``
+pour GenIA, ``ThumbnailJob`` pour les vignettes des véhicules). Ce module
+porte le cycle de vie commun :
+
+- ``claim_next_job`` réserve la plus ancienne tâche en attente
+  (``SELECT ... FOR UPDATE SKIP LOCKED`` : plusieurs workers peuvent tourner) ;
+- ``heartbeat`` signale que le worker avance sur une tâche ;
+- ``requeue_stale_jobs`` remet en file les tâches sans signe de vie depuis
+  ``stale_after`` secondes (worker arrêté) ;
+- ``record_success`` / ``record_failure`` enregistrent le résultat, avec
+  nouvelle tentative tant que ``max_attempts`` n'est pas atteint ;
+- ``JobWorkerCommand`` est la base des commandes ``run_*_worker``.
+
+Chaque application ne fournit que le traitement propre à ses tâches.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class QueuedJob(models.Model):
+    """Champs communs d'une tâche en file d'attente."""
+
+    STATUS = (
+        ('QUEUED', 'En file d\'attente'),
+        ('RUNNING', 'En cours'),
+        ('DONE', 'Terminée'),
+        ('FAILED', 'Échec'),
+    )
+
+    status = models.CharField(max_length=20, choices=STATUS, default='QUEUED')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    heartbeat_at = models.DateTimeField(blank=True, null=True)  # Dernier signe de vie du worker
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        abstract = True
+        ordering = ['created_at']
+
+
+def claim_next_job(model):
+    """Réserve la plus ancienne tâche en attente de ``model``, ou retourne None si la file est vide."""
+    with transaction.atomic():
+        job = (
+            model.objects.select_for_update(skip_locked=True)
+            .filter(status='QUEUED')
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'RUNNING'
+        job.attempts += 1
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.save(update_fields=['status', 'attempts', 'started_at', 'heartbeat_at'])
+    return job
+
+
+def heartbeat(job):
+    """Signe de vie : la tâche n'est pas remise en file tant que son worker avance."""
+    type(job).objects.filter(pk=job.pk).update(heartbeat_at=timezone.now())
+
+
+def requeue_stale_jobs(model, stale_after, on_requeue=None):
+    """
+    Remet en file d'attente les tâches de ``model`` sans signe de vie depuis
+    ``stale_after`` secondes. ``on_requeue(jobs)`` est appelé dans la même
+    transaction (remise à zéro de l'objet traité, par exemple).
+    Retourne le nombre de tâches remises en file.
+    """
+    limit = timezone.now() - timedelta(seconds=stale_after)
+    with transaction.atomic():
+        stale = list(
+            model.objects.select_for_update(skip_locked=True)
+            .filter(status='RUNNING')
+            .filter(Q(heartbeat_at__lt=limit) | Q(heartbeat_at__isnull=True, started_at__lt=limit))
+        )
+        if not stale:
+            return 0
+        model.objects.filter(pk__in=[job.pk for job in stale]).update(status='QUEUED')
+        if on_requeue:
+            on_requeue(stale)
+    logger.warning(f"{len(stale)} tâche(s) {model.__name__} bloquée(s) remise(s) en file d'attente")
+    return len(stale)
+
+
+def record_success(job):
+    job.status = 'DONE'
+    job.error = None
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+
+
+def record_failure(job, error, max_attempts):
+    """Enregistre l'échec de ``job`` ; retourne True si une nouvelle tentative est prévue."""
+    retry = job.attempts < max_attempts
+    job.status = 'QUEUED' if retry else 'FAILED'
+    job.error = str(error)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+    return retry
+
+
+class JobWorkerCommand(BaseCommand):
+    """
+    Base des commandes de worker : réserve et exécute les tâches en boucle,
+    avec un thread (et une connexion à la base) par tâche traitée en parallèle.
+
+    Les sous-classes renseignent ``help`` et implémentent ``requeue_stale_jobs``,
+    ``claim_next_job`` et ``run_job(job, max_attempts)``.
+    """
+    name = "Worker"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Vider la file d'attente puis s'arrêter.")
+        parser.add_argument('--sleep', type=float, default=2.0,
+                            help="Délai d'attente (secondes) lorsque la file est vide.")
+        parser.add_argument('--max-attempts', type=int, default=None,
+                            help="Nombre maximum de tentatives par tâche.")
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help="Nombre de tâches traitées en parallèle (un thread par tâche).")
+
+    def requeue_stale_jobs(self):
+        raise NotImplementedError
+
+    def claim_next_job(self):
+        raise NotImplementedError
+
+    def run_job(self, job, max_attempts=None):
+        raise NotImplementedError
+
+    def handle(self, *args, **options):
+        concurrency = max(options['concurrency'], 1)
+        self.stdout.write(f"{self.name} démarré ({concurrency} thread(s))")
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._processed = 0
+
+        threads = [
+            threading.Thread(target=self._work, args=(options,), name=f"worker-{i}", daemon=True)
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        self.stdout.write(self.style.SUCCESS(f"{self.name} arrêté, {self._processed} tâche(s) traitée(s)"))
+
+    def _work(self, options):
+        """Boucle d'un thread : chaque thread possède sa propre connexion à la base."""
+        try:
+            while not self._stop.is_set():
+                try:
+                    self.requeue_stale_jobs()
+                    job = self.claim_next_job()
+                except Exception as e:
+                    # Erreur passagère de la base : ne pas perdre le thread
+                    logger.error(f"Erreur lors de la réservation d'une tâche: {str(e)}")
+                    connection.close()
+                    self._stop.wait(options['sleep'])
+                    continue
+                if job is None:
+                    if options['once']:
+                        break
+                    self._stop.wait(options['sleep'])
+                    continue
+
+                ok = self.run_job(job, max_attempts=options['max_attempts'])
+                with self._lock:
+                    self._processed += 1
+                self.stdout.write(f"Tâche {job.id} ({job}): {'terminée' if ok else 'échec'}")
+        finally:
+            connection.close()
@@ -0,0 +1,170 @@
+"""
+Uploads directs vers S3 (URL présignées) pour les fichiers des dossiers et
+les documents GenIA.
+
+Le fichier ne transite plus par Django :
+1. ``start_upload`` réserve une clé sous ``media/documents/`` et retourne soit
+   un formulaire POST présigné (petits fichiers), soit un upload multipart avec
+   une URL présignée par partie (au-delà de ``S3_UPLOAD_MULTIPART_THRESHOLD``),
+   accompagné d'un jeton signé décrivant l'upload attendu ;
+2. le client envoie le fichier directement au bucket ;
+3. ``read_token`` vérifie le jeton, puis ``finish_upload`` termine l'upload
+   multipart et contrôle l'objet déposé (taille et type annoncés) ; la vue
+   crée alors la ligne ``File`` ou ``Document`` avec son nom de stockage.
+
+La configuration CORS du bucket doit autoriser POST et PUT depuis le frontend
+et exposer l'en-tête ``ETag`` (nécessaire pour terminer un upload multipart).
+Les uploads multipart abandonnés par le client sont à purger par une règle de
+cycle de vie du bucket (``AbortIncompleteMultipartUpload``). En local, le
+bucket peut être remplacé par un service compatible S3 (MinIO, moto) via
+``AWS_S3_ENDPOINT_URL``.
+"""
+import math
+import os
+import uuid
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core import signing
+from django.utils.text import get_valid_filename
+
+from .storage_backends import MediaStorage, get_s3_client
+
+TOKEN_SALT = 'config.s3_uploads'
+MIN_PART_SIZE = 5 * 1024 * 1024  # Minimum imposé par S3 (sauf dernière partie)
+MAX_PARTS = 10000
+# Délai laissé au client après l'expiration des URL pour finir l'envoi et appeler la complétion
+COMPLETION_GRACE = 3600  # secondes
+
+
+class UploadError(ValueError):
+    """Upload direct refusé (demande invalide, jeton expiré ou objet non conforme)."""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def storage_name(filename, upload_to='documents/'):
+    """Nom de stockage unique (relatif à ``MediaStorage.location``) pour ``filename``."""
+    base = get_valid_filename(os.path.basename(filename or '')) or 'fichier'
+    return f"{upload_to}{uuid.uuid4().hex}/{base}"
+
+
+def s3_key(name):
+    """Clé S3 complète d'un nom de stockage de ``MediaStorage``."""
+    return f"{MediaStorage.location}/{name}"
+
+
+def start_upload(filename, content_type, size, metadata, content_types, s3_client=None):
+    """
+    Prépare l'upload direct d'un fichier de ``size`` octets.
+
+    ``metadata`` (dictionnaire sérialisable en JSON) est conservé dans le jeton
+    et restitué tel quel par ``read_token``. ``content_types`` liste les
+    types MIME acceptés.
+    """
+    if content_type not in content_types:
+        raise UploadError(f"Type de fichier non autorisé: {content_type}")
+    if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+        raise UploadError("Taille de fichier invalide")
+    max_size = _setting('S3_UPLOAD_MAX_SIZE', 100 * 1024 * 1024)
+    if size > max_size:
+        raise UploadError(f"Fichier trop volumineux: {max_size} octets au maximum")
+
+    s3 = s3_client or get_s3_client()
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    expires_in = _setting('S3_UPLOAD_URL_EXPIRES', 900)
+    name = storage_name(filename)
+    key = s3_key(name)
+    upload = {'name': name, 'size': size, 'content_type': content_type, 'metadata': metadata}
+    response = {'key': key, 'expires_in': expires_in}
+
+    if size > _setting('S3_UPLOAD_MULTIPART_THRESHOLD', 16 * 1024 * 1024):
+        part_size = max(_setting('S3_UPLOAD_PART_SIZE', 8 * 1024 * 1024), MIN_PART_SIZE, math.ceil(size / MAX_PARTS))
+        upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key, ContentType=content_type)['UploadId']
+        upload['upload_id'] = upload_id
+        response.update({
+            'method': 'MULTIPART',
+            'upload_id': upload_id,
+            'part_size': part_size,
+            'parts': [
+                {
+                    'part_number': number,
+                    'url': s3.generate_presigned_url(
+                        'upload_part',
+                        Params={'Bucket': bucket, 'Key': key, 'UploadId': upload_id, 'PartNumber': number},
+                        ExpiresIn=expires_in,
+                    ),
+                }
+                for number in range(1, math.ceil(size / part_size) + 1)
+            ],
+        })
+    else:
+        # La taille et le type déposés doivent correspondre exactement à l'annonce
+        response.update({
+            'method': 'POST',
+            'post': s3.generate_presigned_post(
+                Bucket=bucket,
+                Key=key,
+                Fields={'Content-Type': content_type},
+                Conditions=[{'Content-Type': content_type}, ['content-length-range', size, size]],
+                ExpiresIn=expires_in,
+            ),
+        })
+
+    response['upload_token'] = signing.dumps(upload, salt=TOKEN_SALT)
+    return response
+
+
+def _completed_parts(parts):
+    if not isinstance(parts, list) or not parts:
+        raise UploadError("'parts' doit être une liste non vide")
+    completed = []
+    for part in parts:
+        number = part.get('part_number') if isinstance(part, dict) else None
+        etag = part.get('etag') if isinstance(part, dict) else None
+        if not isinstance(number, int) or not isinstance(etag, str) or not etag:
+            raise UploadError("Chaque partie doit indiquer 'part_number' et 'etag'")
+        completed.append({'PartNumber': number, 'ETag': etag})
+    return sorted(completed, key=lambda part: part['PartNumber'])
+
+
+def read_token(token):
+    """Contenu d'un jeton d'upload encore valide."""
+    max_age = _setting('S3_UPLOAD_URL_EXPIRES', 900) + COMPLETION_GRACE
+    try:
+        return signing.loads(token or '', salt=TOKEN_SALT, max_age=max_age)
+    except signing.SignatureExpired:
+        raise UploadError("Jeton d'upload expiré")
+    except signing.BadSignature:
+        raise UploadError("Jeton d'upload invalide")
+
+
+def finish_upload(upload, parts=None, s3_client=None):
+    """
+    Termine un upload préparé par ``start_upload`` (``upload`` est le contenu
+    de son jeton, voir ``read_token``) et vérifie l'objet déposé.
+    Retourne le nom de stockage du fichier.
+    """
+    s3 = s3_client or get_s3_client()
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    key = s3_key(upload['name'])
+
+    try:
+        if upload.get('upload_id'):
+            s3.complete_multipart_upload(
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload['upload_id'],
+                MultipartUpload={'Parts': _completed_parts(parts)},
+            )
+        head = s3.head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        raise UploadError(f"Fichier introuvable ou upload incomplet sur S3: {e.response['Error'].get('Code')}")
+
+    if head['ContentLength'] != upload['size'] or head.get('ContentType') != upload['content_type']:
+        # Objet non conforme à l'annonce : il n'est rattaché à rien, on le supprime
+        s3.delete_object(Bucket=bucket, Key=key)
+        raise UploadError("Le fichier déposé ne correspond pas à l'upload annoncé")
+    return upload['name']
@@ -188,5 +188,97 @@ STATICFILES_STORAGE = 'config.storage_backends.StaticStorage'
 DEFAULT_FILE_STORAGE = 'config.storage_backends.MediaStorage'
 
 # AWS Configuration
-AWS_S3_ADDRESSING_STYLE = 'virtual'
+AWS_S3_ADDRESSING_STYLE = os.getenv('AWS_S3_ADDRESSING_STYLE', 'virtual')
+# Service compatible S3 (MinIO, moto server...) à utiliser à la place d'AWS, par exemple en local
+AWS_S3_ENDPOINT_URL = os.getenv('AWS_S3_ENDPOINT_URL') or None
 AWS_S3_URL_PROTOCOL = 'https:'
+# Client S3 partagé (config.storage_backends.get_s3_client)
+AWS_S3_MAX_POOL_CONNECTIONS = int(os.getenv('AWS_S3_MAX_POOL_CONNECTIONS', '20'))
+AWS_S3_MAX_ATTEMPTS = int(os.getenv('AWS_S3_MAX_ATTEMPTS', '5'))
+AWS_S3_CONNECT_TIMEOUT = int(os.getenv('AWS_S3_CONNECT_TIMEOUT', '5'))  # secondes
+AWS_S3_READ_TIMEOUT = int(os.getenv('AWS_S3_READ_TIMEOUT', '60'))  # secondes
+
+# GenIA Configuration
+# Découpage des documents et nombre de passages envoyés au modèle par question
+GENIA_CHUNK_SIZE = int(os.getenv('GENIA_CHUNK_SIZE', '800'))
+GENIA_CHUNK_OVERLAP = int(os.getenv('GENIA_CHUNK_OVERLAP', '100'))
+GENIA_RETRIEVAL_TOP_K = int(os.getenv('GENIA_RETRIEVAL_TOP_K', '6'))
+GENIA_MAX_CONTEXT_LENGTH = int(os.getenv('GENIA_MAX_CONTEXT_LENGTH', '10000'))
+
+# File d'attente d'extraction des documents (python manage.py run_extraction_worker)
+GENIA_EXTRACTION_MAX_ATTEMPTS = int(os.getenv('GENIA_EXTRACTION_MAX_ATTEMPTS', '3'))
+GENIA_EXTRACTION_STALE_AFTER = int(os.getenv('GENIA_EXTRACTION_STALE_AFTER', '900'))  # secondes sans signe de vie du worker
+
+# Ollama (client partagé, voir genia/ollama.py)
+OLLAMA_BASE_URL = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
+OLLAMA_MODEL = os.getenv('OLLAMA_MODEL', 'llama2')
+OLLAMA_POOL_SIZE = int(os.getenv('OLLAMA_POOL_SIZE', '10'))
+OLLAMA_TAGS_CACHE_TTL = int(os.getenv('OLLAMA_TAGS_CACHE_TTL', '30'))  # secondes
+
+# Cache des réponses GenIA (par processus, voir genia/answer_cache.py)
+GENIA_ANSWER_CACHE_SIZE = int(os.getenv('GENIA_ANSWER_CACHE_SIZE', '256'))
+GENIA_ANSWER_CACHE_TTL = int(os.getenv('GENIA_ANSWER_CACHE_TTL', '3600'))  # secondes
+# Similarité minimale (0 à 1) pour servir une question reformulée ; 0 désactive la recherche
+GENIA_ANSWER_CACHE_SIMILARITY = float(os.getenv('GENIA_ANSWER_CACHE_SIMILARITY', '0.9'))
+
+# Extraction PDF en parallèle (0 = nombre de CPU du serveur)
+GENIA_PDF_WORKERS = int(os.getenv('GENIA_PDF_WORKERS', '0'))
+GENIA_PDF_PARALLEL_MIN_PAGES = int(os.getenv('GENIA_PDF_PARALLEL_MIN_PAGES', '40'))
+# Taille au-delà de laquelle un PDF lu depuis S3 est déversé sur disque (octets)
+GENIA_PDF_SPOOL_MAX_SIZE = int(os.getenv('GENIA_PDF_SPOOL_MAX_SIZE', str(32 * 1024 * 1024)))
+
+# Durée de vie (secondes) des pages de listing S3 en cache (list_s3_documents)
+GENIA_S3_LISTING_CACHE_TTL = int(os.getenv('GENIA_S3_LISTING_CACHE_TTL', '30'))
+
+# Nombre maximum de clés S3 par appel à bulk_import_from_s3
+GENIA_BULK_IMPORT_MAX_KEYS = int(os.getenv('GENIA_BULK_IMPORT_MAX_KEYS', '10000'))
+
+# Durée de vie (secondes) des facettes du catalogue en cache (/api/vehicles/facets/)
+VEHICLE_FACETS_CACHE_TTL = int(os.getenv('VEHICLE_FACETS_CACHE_TTL', '60'))
+
+# Nombre d'URL d'images de véhicules mémorisées par processus (vehicle/images.py)
+VEHICLE_IMAGE_URL_CACHE_SIZE = int(os.getenv('VEHICLE_IMAGE_URL_CACHE_SIZE', '16384'))
+
+# File d'attente des vignettes après un upload de photo (vehicle/thumbnails.py, run_thumbnail_worker)
+VEHICLE_THUMBNAIL_MAX_ATTEMPTS = int(os.getenv('VEHICLE_THUMBNAIL_MAX_ATTEMPTS', '3'))
+VEHICLE_THUMBNAIL_STALE_AFTER = int(os.getenv('VEHICLE_THUMBNAIL_STALE_AFTER', '300'))  # secondes
+
+# Cache des réponses du catalogue de véhicules (vehicle/response_cache.py) :
+# mémoire locale par défaut, Redis (redis://...) ou fichiers (file:///chemin) si VEHICLE_CACHE_URL est défini
+VEHICLE_CACHE_URL = os.getenv('VEHICLE_CACHE_URL', '')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+if VEHICLE_CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES['vehicles'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': VEHICLE_CACHE_URL,
+    }
+elif VEHICLE_CACHE_URL:
+    CACHES['vehicles'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': VEHICLE_CACHE_URL.removeprefix('file://'),
+    }
+VEHICLE_RESPONSE_CACHE_ALIAS = 'vehicles' if VEHICLE_CACHE_URL else 'default'
+VEHICLE_RESPONSE_CACHE_TTL = int(os.getenv('VEHICLE_RESPONSE_CACHE_TTL', '300'))
+
+# Uploads directs vers S3 par URL présignées (config/s3_uploads.py)
+S3_UPLOAD_URL_EXPIRES = int(os.getenv('S3_UPLOAD_URL_EXPIRES', '900'))  # secondes
+S3_UPLOAD_MAX_SIZE = int(os.getenv('S3_UPLOAD_MAX_SIZE', str(100 * 1024 * 1024)))  # octets
+# Au-delà de cette taille, l'upload se fait en plusieurs parties de S3_UPLOAD_PART_SIZE octets
+S3_UPLOAD_MULTIPART_THRESHOLD = int(os.getenv('S3_UPLOAD_MULTIPART_THRESHOLD', str(16 * 1024 * 1024)))
+S3_UPLOAD_PART_SIZE = int(os.getenv('S3_UPLOAD_PART_SIZE', str(8 * 1024 * 1024)))
+
+# Envois parallèles vers S3 lors d'un ajout groupé de fichiers à un dossier (folder/uploads.py)
+FOLDER_UPLOAD_THREADS = int(os.getenv('FOLDER_UPLOAD_THREADS', '4'))
+
+# Statistiques des dossiers lues dans la table de compteurs tenue à jour à chaque écriture
+# (folder/stats.py) ; après activation : python manage.py rebuild_folder_counters
+FOLDER_STATS_COUNTERS = os.getenv('FOLDER_STATS_COUNTERS', 'False') == 'True'
+
+# Export ZIP des fichiers d'un dossier (folder/archive.py) : taille des blocs lus sur S3
+# et nombre de blocs lus en avance sur l'envoi au client
+FOLDER_ARCHIVE_CHUNK_SIZE = int(os.getenv('FOLDER_ARCHIVE_CHUNK_SIZE', str(1024 * 1024)))  # octets
+FOLDER_ARCHIVE_READ_AHEAD = int(os.getenv('FOLDER_ARCHIVE_READ_AHEAD', '4'))
@@ -1,6 +1,26 @@
+import threading
+
+import boto3
+from botocore.config import Config
 from storages.backends.s3boto3 import S3Boto3Storage
 from django.conf import settings
 
+
+def s3_config():
+    """Configuration botocore commune : pool de connexions et stratégie de reprise."""
+    return Config(
+        region_name=settings.AWS_S3_REGION_NAME,
+        s3={'addressing_style': settings.AWS_S3_ADDRESSING_STYLE},
+        max_pool_connections=settings.AWS_S3_MAX_POOL_CONNECTIONS,
+        retries={
+            'max_attempts': settings.AWS_S3_MAX_ATTEMPTS,
+            'mode': 'standard',
+        },
+        connect_timeout=settings.AWS_S3_CONNECT_TIMEOUT,
+        read_timeout=settings.AWS_S3_READ_TIMEOUT,
+    )
+
+
 class StaticStorage(S3Boto3Storage):
     location = 'static'
     default_acl = None
@@ -11,5 +31,49 @@ class MediaStorage(S3Boto3Storage):
     default_acl = None
     custom_domain = settings.AWS_S3_CUSTOM_DOMAIN
     addressing_style = 'virtual'
-    url_protocol = 'https:' 
+    url_protocol = 'https:'
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.config = s3_config()
+
+
+class ThumbnailStorage(MediaStorage):
+    """Vignettes des photos de véhicules : noms déterministes, réécrits à chaque génération."""
+    file_overwrite = True
+    object_parameters = {
+        # Le nom d'une vignette dérive de celui de la photo, qui ne change jamais
+        'CacheControl': 'public, max-age=31536000, immutable',
+    }
+
+
+# Client S3 partagé par tout le processus. Les clients boto3 sont thread-safe :
+# un seul suffit, et sa création (chargement du modèle de service botocore)
+# n'est payée qu'une fois au lieu d'une fois par requête.
+_s3_client = None
+_s3_client_lock = threading.Lock()
+_s3_client_stats = {'created': 0, 'reused': 0}
+
+
+def get_s3_client():
+    """Retourne le client S3 du processus, créé au premier appel."""
+    global _s3_client
+    with _s3_client_lock:
+        if _s3_client is None:
+            _s3_client = boto3.session.Session().client(
+                's3',
+                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                endpoint_url=getattr(settings, 'AWS_S3_ENDPOINT_URL', None),
+                config=s3_config(),
+            )
+            _s3_client_stats['created'] += 1
+        else:
+            _s3_client_stats['reused'] += 1
+        return _s3_client
+
 
+def s3_client_stats():
+    """Nombre de créations et de réutilisations du client S3 partagé dans ce processus."""
+    with _s3_client_lock:
+        return dict(_s3_client_stats)
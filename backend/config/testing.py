@@ -0,0 +1,54 @@
+"""Outils communs aux tests des applications."""
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+
+from config import storage_backends
+
+
+class UnmanagedTablesTestCase(TestCase):
+    """
+    Crée les tables gérées hors de Django (managed = False) pour la durée des
+    tests : la base de test ne contient que les tables des modèles gérés.
+    """
+    unmanaged_models = ()
+
+    @classmethod
+    def setUpClass(cls):
+        existing = set(connection.introspection.table_names())
+        cls._created_models = [model for model in cls.unmanaged_models if model._meta.db_table not in existing]
+        with connection.schema_editor() as schema_editor:
+            for model in cls._created_models:
+                schema_editor.create_model(model)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as schema_editor:
+            for model in reversed(cls._created_models):
+                schema_editor.delete_model(model)
+
+
+class MockS3Mixin:
+    """
+    Remplace S3 par un bouchon moto (bucket ``AWS_STORAGE_BUCKET_NAME`` vide)
+    pour la durée de chaque test. ``self.s3`` est le client partagé du processus.
+    """
+
+    def setUp(self):
+        super().setUp()
+        from moto import mock_aws
+
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+        # Le client partagé ne doit pas survivre au bouchon
+        storage_backends._s3_client = None
+        self.addCleanup(setattr, storage_backends, '_s3_client', None)
+        self.bucket = settings.AWS_STORAGE_BUCKET_NAME
+        self.s3 = storage_backends.get_s3_client()
+        self.s3.create_bucket(
+            Bucket=self.bucket,
+            CreateBucketConfiguration={'LocationConstraint': settings.AWS_S3_REGION_NAME},
+        )
@@ -0,0 +1,75 @@
+import requests
+from django.core import signing
+from django.test import SimpleTestCase, override_settings
+
+from .s3_uploads import TOKEN_SALT, UploadError, finish_upload, read_token, s3_key, start_upload
+from .testing import MockS3Mixin
+
+PDF = 'application/pdf'
+
+
+class S3UploadTests(MockS3Mixin, SimpleTestCase):
+    def start(self, size, content_type=PDF):
+        response = start_upload('contrat signé.pdf', content_type, size, {'folder': 1}, [PDF])
+        return response, read_token(response['upload_token'])
+
+    def test_presigned_post_upload(self):
+        content = b'%PDF-1.4 contrat'
+        response, upload = self.start(len(content))
+        self.assertEqual(response['method'], 'POST')
+        post = response['post']
+        sent = requests.post(post['url'], data=post['fields'], files={'file': ('contrat.pdf', content)})
+        self.assertLess(sent.status_code, 300)
+
+        name = finish_upload(upload)
+        self.assertEqual(name, upload['name'])
+        self.assertTrue(name.startswith('documents/') and name.endswith('/contrat_signé.pdf'))
+        self.assertEqual(upload['metadata'], {'folder': 1})
+        body = self.s3.get_object(Bucket=self.bucket, Key=s3_key(name))['Body'].read()
+        self.assertEqual(body, content)
+
+    @override_settings(S3_UPLOAD_MULTIPART_THRESHOLD=10)
+    def test_multipart_upload(self):
+        content = b'x' * 100
+        response, upload = self.start(len(content))
+        self.assertEqual(response['method'], 'MULTIPART')
+        self.assertEqual(len(response['parts']), 1)
+        part = self.s3.upload_part(
+            Bucket=self.bucket, Key=response['key'], UploadId=response['upload_id'], PartNumber=1, Body=content
+        )
+        finish_upload(upload, parts=[{'part_number': 1, 'etag': part['ETag']}])
+        head = self.s3.head_object(Bucket=self.bucket, Key=response['key'])
+        self.assertEqual(head['ContentLength'], 100)
+
+    def test_tampered_token_is_rejected(self):
+        response, _ = self.start(10)
+        payload = signing.loads(response['upload_token'], salt=TOKEN_SALT)
+        payload['size'] = 10 * 1024 * 1024 * 1024
+        forged = signing.dumps(payload, salt='autre')
+        for token in (forged, response['upload_token'][:-2] + 'xx', ''):
+            with self.assertRaisesMessage(UploadError, "Jeton d'upload invalide"):
+                read_token(token)
+
+    @override_settings(S3_UPLOAD_MAX_SIZE=1000)
+    def test_oversized_object_is_rejected_and_deleted(self):
+        with self.assertRaisesMessage(UploadError, 'Fichier trop volumineux'):
+            self.start(1001)
+        response, upload = self.start(10)
+        self.s3.put_object(Bucket=self.bucket, Key=response['key'], Body=b'x' * 500, ContentType=PDF)
+        with self.assertRaisesMessage(UploadError, "ne correspond pas à l'upload annoncé"):
+            finish_upload(upload)
+        self.assertEqual(self.s3.list_objects_v2(Bucket=self.bucket).get('KeyCount'), 0)
+
+    def test_wrong_content_type_is_rejected(self):
+        with self.assertRaisesMessage(UploadError, 'Type de fichier non autorisé'):
+            self.start(10, content_type='text/html')
+        response, upload = self.start(10)
+        self.s3.put_object(Bucket=self.bucket, Key=response['key'], Body=b'x' * 10, ContentType='text/html')
+        with self.assertRaisesMessage(UploadError, "ne correspond pas à l'upload annoncé"):
+            finish_upload(upload)
+        self.assertEqual(self.s3.list_objects_v2(Bucket=self.bucket).get('KeyCount'), 0)
+
+    def test_missing_object_is_reported(self):
+        _, upload = self.start(10)
+        with self.assertRaisesMessage(UploadError, 'Fichier introuvable ou upload incomplet'):
+            finish_upload(upload)
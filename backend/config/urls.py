@@ -23,6 +23,8 @@ from django.http import JsonResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 import psycopg2
+from config.storage_backends import s3_client_stats
+from vehicle.response_cache import response_cache_stats
 import datetime
 
 def api_root(request):
@@ -67,6 +69,11 @@ def health_check(request):
         status['status'] = 'degraded'
         status['error'] = str(e)
     
+    # Réutilisation du client S3 partagé dans ce worker
+    status['s3_client'] = s3_client_stats()
+    # Efficacité du cache des réponses du catalogue dans ce worker
+    status['vehicle_response_cache'] = response_cache_stats()
+    
     return JsonResponse(status)
 
 urlpatterns = [
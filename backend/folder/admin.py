@@ -18,6 +18,7 @@ class FileInline(admin.TabularInline):
 @admin.register(Folder)
 class FolderAdmin(admin.ModelAdmin):
     list_display = ('client', 'vehicle', 'type_folder', 'status', 'creation_date')
+    list_select_related = ('client', 'vehicle')
     list_filter = ('type_folder', 'status')
     search_fields = ('client__username', 'vehicle__brand', 'vehicle__model')
     ordering = ('-creation_date',)
@@ -0,0 +1,165 @@
+"""
+Archive ZIP des fichiers d'un dossier, produite à la volée (``download_all``).
+
+Le ZIP est écrit par ``zipfile`` dans un tampon non positionnable que le
+générateur vide après chaque écriture : les entrées utilisent alors des
+descripteurs de données (taille et CRC écrits après le contenu), ce qui
+évite de connaître les tailles à l'avance ou de revenir en arrière. Les
+objets S3 sont lus par blocs (``iter_chunks``) dans un thread dédié, au plus
+``FOLDER_ARCHIVE_READ_AHEAD`` blocs en avance sur l'envoi au client : la
+mémoire utilisée ne dépend pas de la taille du dossier et rien n'est écrit
+sur disque.
+
+Les documents (PDF, JPEG, PNG) sont déjà compressés : ils sont stockés sans
+recompression. Un fichier absent de S3 est omis et listé dans
+``fichiers_manquants.txt`` à la fin de l'archive, l'en-tête HTTP étant déjà
+parti.
+"""
+import logging
+import os
+import queue
+import threading
+import zipfile
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+
+from config.s3_uploads import s3_key
+from config.storage_backends import get_s3_client
+
+logger = logging.getLogger(__name__)
+
+MISSING_FILES_NAME = 'fichiers_manquants.txt'
+_END = object()
+
+
+class _ZipSink:
+    """Destination non positionnable de ``zipfile`` : accumule les octets jusqu'au prochain ``drain``."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        if self._parts:
+            data = b''.join(self._parts)
+            self._parts = []
+            yield data
+
+
+def read_ahead(iterable, depth):
+    """
+    Parcourt ``iterable`` dans un thread, au plus ``depth`` éléments en avance
+    sur le consommateur. Les exceptions du producteur sont relancées côté
+    consommateur ; fermer le générateur (client déconnecté) arrête le producteur.
+    """
+    items = queue.Queue(maxsize=max(depth, 1))
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(_END)
+        except BaseException as e:  # relancée dans le thread du consommateur
+            put(e)
+        finally:
+            # Ferme les objets S3 en cours de lecture dès l'arrêt, sans attendre le ramasse-miettes
+            close = getattr(iterable, 'close', None)
+            if close:
+                close()
+
+    producer = threading.Thread(target=produce, name='folder-archive-read-ahead', daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join(timeout=5)
+
+
+def archive_name(file):
+    """Nom de l'entrée du fichier dans l'archive (unique grâce à l'identifiant)."""
+    return f"{file.id}_{file.document_type}_{os.path.basename(file.file.name)}"
+
+
+def _object_events(files, s3_client, chunk_size):
+    """Évènements ('start', fichier) / ('data', octets) / ('end', fichier) / ('missing', fichier)."""
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    for file in files:
+        try:
+            body = s3_client.get_object(Bucket=bucket, Key=s3_key(file.file.name))['Body']
+        except ClientError as e:
+            logger.error(f"Fichier {file.id} introuvable sur S3 pour l'archive: {str(e)}")
+            yield 'missing', file
+            continue
+        try:
+            yield 'start', file
+            for chunk in body.iter_chunks(chunk_size=chunk_size):
+                yield 'data', chunk
+            yield 'end', file
+        finally:
+            body.close()
+
+
+def stream_folder_archive(files, s3_client=None):
+    """Générateur des octets du ZIP contenant ``files`` (instances de ``File``)."""
+    chunk_size = getattr(settings, 'FOLDER_ARCHIVE_CHUNK_SIZE', 1024 * 1024)
+    depth = getattr(settings, 'FOLDER_ARCHIVE_READ_AHEAD', 4)
+    events = _object_events(files, s3_client or get_s3_client(), chunk_size)
+    sink = _ZipSink()
+    missing = []
+    reader = read_ahead(events, depth)
+    archive = zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED)
+    entry = None
+
+    try:
+        for kind, value in reader:
+            if kind == 'start':
+                info = zipfile.ZipInfo(archive_name(value), date_time=value.uploaded_at.timetuple()[:6])
+                # Taille inconnue à l'avance : ZIP64 pour ne pas être limité à 2 Go par fichier
+                entry = archive.open(info, mode='w', force_zip64=True)
+            elif kind == 'data':
+                entry.write(value)
+            elif kind == 'end':
+                entry.close()
+                entry = None
+            else:
+                missing.append(value)
+            yield from sink.drain()
+        if missing:
+            archive.writestr(MISSING_FILES_NAME, ''.join(f"{archive_name(file)}\n" for file in missing))
+        archive.close()
+    except BaseException:
+        # Lecture interrompue ou client déconnecté : l'archive restera tronquée. L'entrée
+        # ouverte est fermée pour que ZipFile ne masque pas l'erreur d'origine par la sienne
+        if entry is not None:
+            entry.close()
+        archive.close()
+        raise
+    finally:
+        reader.close()
+    # Répertoire central, écrit à la fermeture de l'archive
+    yield from sink.drain()
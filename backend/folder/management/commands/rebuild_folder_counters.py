@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from folder.stats import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs du tableau de bord des dossiers (table folder_counters)."
+
+    def handle(self, *args, **options):
+        rows = rebuild_counters()
+        for row in rows:
+            self.stdout.write(
+                f"{row['type_folder']:<10} {row['status']:<12} {row['folders']:>8} dossier(s), "
+                f"{row['pending_files']} fichier(s) à vérifier"
+            )
+        self.stdout.write(self.style.SUCCESS(f"{len(rows)} compteur(s) recalculé(s)"))
@@ -4,6 +4,7 @@ class Migration(migrations.Migration):
 
     dependencies = [
         ('folder', '0003_auto_match_database_schema'),
+        ('folder', '0002_initial'),
     ]
 
     operations = [
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('folder', '0004_adapt_file_model'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FolderCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('IN_PROGRESS', 'In progress'), ('VALIDATED', 'Validated'), ('REJECTED', 'Rejected')], max_length=20)),
+                ('type_folder', models.CharField(choices=[('PURCHASE', 'Folder of purchase'), ('RENTAL', 'Folder of rental')], max_length=20)),
+                ('folders', models.BigIntegerField(default=0)),
+                ('pending_files', models.BigIntegerField(default=0)),
+                ('validation_seconds', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'folder_counters',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='foldercounter',
+            constraint=models.UniqueConstraint(fields=('status', 'type_folder'), name='folder_counter_unique'),
+        ),
+    ]
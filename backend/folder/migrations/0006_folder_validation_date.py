@@ -0,0 +1,47 @@
+from django.db import migrations, models
+
+# La table ``folders`` est gérée hors de Django : la colonne est ajoutée en SQL,
+# sur PostgreSQL uniquement (base de production). Les dossiers déjà validés
+# reçoivent leur dernière modification, meilleure estimation disponible.
+
+
+def add_validation_date(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('ALTER TABLE folders ADD COLUMN IF NOT EXISTS validation_date timestamp with time zone NULL;')
+    schema_editor.execute(
+        "UPDATE folders SET validation_date = modification_date "
+        "WHERE status = 'VALIDATED' AND validation_date IS NULL;"
+    )
+
+
+def drop_validation_date(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('ALTER TABLE folders DROP COLUMN IF EXISTS validation_date;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('folder', '0005_foldercounter'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='folder',
+            options={'managed': False},
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='folder',
+                    name='validation_date',
+                    field=models.DateTimeField(blank=True, null=True),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(add_validation_date, drop_validation_date),
+            ],
+        ),
+    ]
@@ -21,6 +21,7 @@ class Folder(models.Model):
     status = models.CharField(max_length=20, choices=STATUS, default='PENDING')
     creation_date = models.DateTimeField(auto_now_add=True)
     modification_date = models.DateTimeField(auto_now=True)
+    validation_date = models.DateTimeField(null=True, blank=True)  # Passage au statut VALIDATED (folder/signals.py)
 
     class Meta:
         db_table = 'folders'
@@ -70,3 +71,28 @@ class File(models.Model):
     def __str__(self):
         # Modifié pour ne pas utiliser user qui est maintenant commenté
         return f"{self.get_document_type_display()} - {self.id}"
+
+
+class FolderCounter(models.Model):
+    """
+    Compteurs du tableau de bord des dossiers, par statut et type de dossier.
+
+    Tenus à jour à chaque écriture sur un dossier ou un fichier lorsque
+    ``FOLDER_STATS_COUNTERS`` est activé (voir folder/stats.py), et
+    recalculés par ``python manage.py rebuild_folder_counters``.
+    """
+    status = models.CharField(max_length=20, choices=Folder.STATUS)
+    type_folder = models.CharField(max_length=20, choices=Folder.TYPE_FOLDER)
+    folders = models.BigIntegerField(default=0)
+    pending_files = models.BigIntegerField(default=0)  # Fichiers non vérifiés
+    validation_seconds = models.FloatField(default=0)  # Somme des durées création → validation
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'folder_counters'
+        constraints = [
+            models.UniqueConstraint(fields=['status', 'type_folder'], name='folder_counter_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.type_folder} / {self.status}: {self.folders}"
@@ -0,0 +1,30 @@
+"""
+Plan de chargement des dossiers selon l'action de ``FolderViewSet``.
+
+``FolderSerializer`` imbrique le client, le véhicule et les fichiers de chaque
+dossier : sans plan, lister N dossiers coûte 1 + 2N + N requêtes. Les actions
+qui sérialisent des dossiers chargent donc le client et le véhicule par
+jointure (``select_related``) et les fichiers en une requête groupée
+(``Prefetch``), soit deux requêtes quel que soit le nombre de dossiers.
+"""
+from django.db.models import Prefetch
+
+from .models import File
+
+# Actions dont la réponse contient des dossiers sérialisés
+SERIALIZED_ACTIONS = {'list', 'retrieve', 'update', 'partial_update', 'change_status'}
+
+
+def files_prefetch():
+    """Fichiers des dossiers, dans l'ordre du modèle (les plus récents d'abord)."""
+    return Prefetch('files', queryset=File.objects.all())
+
+
+def plan_folder_queryset(queryset, action):
+    """Ajoute à ``queryset`` les jointures et préchargements utiles à ``action``."""
+    if action in SERIALIZED_ACTIONS:
+        return queryset.select_related('client', 'vehicle').prefetch_related(files_prefetch())
+    if action == 'destroy':
+        # IsOwnerOrStaff compare le client du dossier à l'utilisateur
+        return queryset.select_related('client')
+    return queryset
@@ -24,4 +24,4 @@ class FolderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Folder
         fields = '__all__'
-        read_only_fields = ('client',) 
\ No newline at end of file
+        read_only_fields = ('client', 'validation_date') 
\ No newline at end of file
@@ -0,0 +1,140 @@
+import threading
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import File, Folder
+from .stats import apply_delta, counters_enabled, validation_seconds
+
+
+# Dossiers en cours de suppression dans ce thread : leurs fichiers, supprimés en
+# cascade avant ou après eux selon l'ordre choisi par Django, sont décomptés avec le dossier
+_deleting = threading.local()
+
+
+def _deleting_folders():
+    if not hasattr(_deleting, 'folders'):
+        _deleting.folders = set()
+    return _deleting.folders
+
+
+def _folder_key(folder_id):
+    """(statut, type) du dossier, ou None s'il n'existe plus."""
+    if folder_id is None:
+        return None
+    return Folder.objects.filter(pk=folder_id).values_list('status', 'type_folder').first()
+
+
+def _validation_time(state):
+    if state['status'] != 'VALIDATED':
+        return 0
+    return validation_seconds(state['creation_date'], state['validation_date'])
+
+
+@receiver(pre_save, sender=Folder)
+def stamp_validation_date(sender, instance, **kwargs):
+    """Date du passage au statut VALIDATED, effacée si le dossier quitte ce statut."""
+    if instance.status != 'VALIDATED':
+        instance.validation_date = None
+    elif instance.validation_date is None:
+        instance.validation_date = timezone.now()
+
+
+@receiver(pre_save, sender=Folder)
+def remember_folder_state(sender, instance, **kwargs):
+    """Garde l'état enregistré du dossier pour calculer l'écart des compteurs après l'écriture."""
+    if counters_enabled() and instance.pk:
+        instance._counter_state = Folder.objects.filter(pk=instance.pk).values(
+            'status', 'type_folder', 'creation_date', 'validation_date'
+        ).first()
+
+
+@receiver(post_save, sender=Folder)
+def folder_saved(sender, instance, created, **kwargs):
+    if not counters_enabled():
+        return
+    old = None if created else getattr(instance, '_counter_state', None)
+    new = {
+        'status': instance.status,
+        'type_folder': instance.type_folder,
+        'creation_date': instance.creation_date,
+        'validation_date': instance.validation_date,
+    }
+    if old is None:
+        apply_delta(new['status'], new['type_folder'], folders=1, validation_seconds=_validation_time(new))
+        return
+    if (old['status'], old['type_folder']) == (new['status'], new['type_folder']):
+        apply_delta(
+            new['status'], new['type_folder'],
+            validation_seconds=_validation_time(new) - _validation_time(old),
+        )
+        return
+    # Le dossier change de compteur avec ses fichiers non vérifiés
+    pending = File.objects.filter(folder=instance, is_verified=False).count()
+    apply_delta(
+        old['status'], old['type_folder'],
+        folders=-1, pending_files=-pending, validation_seconds=-_validation_time(old),
+    )
+    apply_delta(
+        new['status'], new['type_folder'],
+        folders=1, pending_files=pending, validation_seconds=_validation_time(new),
+    )
+
+
+@receiver(pre_delete, sender=Folder)
+def folder_deleting(sender, instance, **kwargs):
+    if counters_enabled():
+        # Envoyé avant toute suppression de la cascade : les fichiers sont encore en base
+        instance._counter_pending = File.objects.filter(folder=instance, is_verified=False).count()
+        _deleting_folders().add(instance.pk)
+
+
+@receiver(post_delete, sender=Folder)
+def folder_deleted(sender, instance, **kwargs):
+    if counters_enabled():
+        state = {
+            'status': instance.status,
+            'creation_date': instance.creation_date,
+            'validation_date': instance.validation_date,
+        }
+        apply_delta(
+            instance.status, instance.type_folder,
+            folders=-1,
+            pending_files=-getattr(instance, '_counter_pending', 0),
+            validation_seconds=-_validation_time(state),
+        )
+        _deleting_folders().discard(instance.pk)
+
+
+@receiver(pre_save, sender=File)
+def remember_file_state(sender, instance, **kwargs):
+    if counters_enabled() and instance.pk:
+        instance._counter_state = File.objects.filter(pk=instance.pk).values('folder_id', 'is_verified').first()
+
+
+def _pending_folder(state):
+    """Dossier dont le fichier compte parmi les fichiers non vérifiés, ou None."""
+    return None if not state or state['is_verified'] else state['folder_id']
+
+
+@receiver(post_save, sender=File)
+def file_saved(sender, instance, created, **kwargs):
+    if not counters_enabled():
+        return
+    old_folder = None if created else _pending_folder(getattr(instance, '_counter_state', None))
+    new_folder = _pending_folder({'folder_id': instance.folder_id, 'is_verified': instance.is_verified})
+    if old_folder == new_folder:
+        return
+    for folder_id, delta in ((old_folder, -1), (new_folder, 1)):
+        key = _folder_key(folder_id)
+        if key:
+            apply_delta(*key, pending_files=delta)
+
+
+@receiver(post_delete, sender=File)
+def file_deleted(sender, instance, **kwargs):
+    if counters_enabled() and not instance.is_verified and instance.folder_id not in _deleting_folders():
+        key = _folder_key(instance.folder_id)
+        if key:
+            apply_delta(*key, pending_files=-1)
@@ -0,0 +1,132 @@
+"""
+Statistiques du tableau de bord des dossiers (``GET /api/folders/stats/``).
+
+Deux sources, pour un même format de réponse :
+- ``live`` : une seule requête groupée par statut et type de dossier (nombre de
+  dossiers, fichiers non vérifiés via une sous-requête corrélée, durée cumulée
+  jusqu'à la validation) ;
+- ``counters`` : la table ``FolderCounter``, tenue à jour à chaque écriture sur
+  un dossier ou un fichier (voir folder/signals.py) quand
+  ``FOLDER_STATS_COUNTERS`` est activé. Sa lecture coûte une requête sur
+  quelques lignes, quel que soit le nombre de dossiers. Après activation, les
+  compteurs s'initialisent avec ``python manage.py rebuild_folder_counters``.
+
+La durée de validation d'un dossier validé est l'écart entre sa création et
+son passage au statut VALIDATED (``validation_date``, renseignée par
+folder/signals.py).
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import File, Folder, FolderCounter
+
+
+def counters_enabled():
+    return getattr(settings, 'FOLDER_STATS_COUNTERS', False)
+
+
+def validation_seconds(creation_date, validation_date):
+    if validation_date is None:
+        return 0
+    return (validation_date - creation_date).total_seconds()
+
+
+def live_rows(queryset):
+    """Une ligne par couple (statut, type) des dossiers de ``queryset``, en une requête."""
+    pending = (
+        File.objects.filter(folder=OuterRef('pk'), is_verified=False)
+        .order_by()
+        .values('folder')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    duration = ExpressionWrapper(F('validation_date') - F('creation_date'), output_field=DurationField())
+    rows = (
+        queryset.order_by()
+        .annotate(folder_pending_files=Coalesce(Subquery(pending, output_field=IntegerField()), 0))
+        .values('status', 'type_folder')
+        .annotate(
+            folders=Count('id'),
+            pending_files=Sum('folder_pending_files'),
+            validation_time=Sum(duration, filter=Q(status='VALIDATED')),
+        )
+    )
+    return [
+        {
+            'status': row['status'],
+            'type_folder': row['type_folder'],
+            'folders': row['folders'],
+            'pending_files': row['pending_files'] or 0,
+            'validation_seconds': row['validation_time'].total_seconds() if row['validation_time'] else 0,
+        }
+        for row in rows
+    ]
+
+
+def counter_rows(params):
+    """Lignes de ``FolderCounter``, filtrées par ``status`` / ``type_folder`` comme la liste."""
+    counters = FolderCounter.objects.filter(folders__gt=0)
+    for name in ('status', 'type_folder'):
+        if params.get(name):
+            counters = counters.filter(**{name: params[name]})
+    return list(counters.values('status', 'type_folder', 'folders', 'pending_files', 'validation_seconds'))
+
+
+def summarize(rows, source):
+    by_status = {status: 0 for status, _ in Folder.STATUS}
+    by_type = {type_folder: 0 for type_folder, _ in Folder.TYPE_FOLDER}
+    for row in rows:
+        by_status[row['status']] = by_status.get(row['status'], 0) + row['folders']
+        by_type[row['type_folder']] = by_type.get(row['type_folder'], 0) + row['folders']
+    validated = by_status.get('VALIDATED', 0)
+    validation_total = sum(row['validation_seconds'] for row in rows if row['status'] == 'VALIDATED')
+    return {
+        'source': source,
+        'total': sum(row['folders'] for row in rows),
+        'by_status': by_status,
+        'by_type': by_type,
+        'by_status_and_type': sorted(
+            ({'status': row['status'], 'type_folder': row['type_folder'], 'count': row['folders']} for row in rows),
+            key=lambda item: (item['status'], item['type_folder']),
+        ),
+        'pending_files': sum(row['pending_files'] for row in rows),
+        'validated': validated,
+        'average_validation_seconds': round(validation_total / validated, 1) if validated else None,
+    }
+
+
+def folder_stats(queryset, params):
+    """Statistiques des dossiers de ``queryset`` (``params`` : filtres de la requête)."""
+    if counters_enabled():
+        return summarize(counter_rows(params), 'counters')
+    return summarize(live_rows(queryset), 'live')
+
+
+def apply_delta(status, type_folder, folders=0, pending_files=0, validation_seconds=0):
+    """Ajoute les écarts indiqués au compteur (status, type_folder)."""
+    if not (folders or pending_files or validation_seconds):
+        return
+    changes = {
+        'folders': F('folders') + folders,
+        'pending_files': F('pending_files') + pending_files,
+        'validation_seconds': F('validation_seconds') + validation_seconds,
+    }
+    if FolderCounter.objects.filter(status=status, type_folder=type_folder).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            FolderCounter.objects.create(status=status, type_folder=type_folder)
+    except IntegrityError:
+        pass  # Créé entre-temps par une autre requête
+    FolderCounter.objects.filter(status=status, type_folder=type_folder).update(**changes)
+
+
+def rebuild_counters():
+    """Recalcule tous les compteurs à partir des dossiers et fichiers en base."""
+    rows = live_rows(Folder.objects.all())
+    with transaction.atomic():
+        FolderCounter.objects.all().delete()
+        FolderCounter.objects.bulk_create([FolderCounter(**row) for row in rows])
+    return rows
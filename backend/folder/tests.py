@@ -1,3 +1,282 @@
-from django.test import TestCase
+import io
+import threading
+import zipfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.storage import InMemoryStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from config.s3_uploads import s3_key
+from config.testing import MockS3Mixin, UnmanagedTablesTestCase
+from user.models import User
+from vehicle.models import Vehicle
+from .archive import MISSING_FILES_NAME, archive_name, stream_folder_archive
+from .models import Folder, File, FolderCounter
+from .stats import counter_rows, live_rows, rebuild_counters, summarize
+
+# Nombre maximal de requêtes pour lister les dossiers, quel que soit leur nombre :
+# dossiers avec client et véhicule (jointure), puis fichiers (préchargement)
+FOLDER_LIST_QUERY_BUDGET = 2
+FOLDER_DETAIL_QUERY_BUDGET = 2
+
+
+class FolderTablesTestCase(UnmanagedTablesTestCase):
+    unmanaged_models = (User, Vehicle, Folder, File)
+
+
+class FolderQueryBudgetTests(FolderTablesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create(username='gestionnaire', email='g@abd.fr', role='GESTIONNAIRE')
+        clients = User.objects.bulk_create([
+            User(username=f'client{i}', email=f'client{i}@abd.fr', role='CLIENT') for i in range(10)
+        ])
+        vehicles = Vehicle.objects.bulk_create([
+            Vehicle(brand='Renault', model=f'Clio {i}', year=2020, mileage=i, type_offer='SALE', state='AVAILABLE')
+            for i in range(10)
+        ])
+        folders = Folder.objects.bulk_create([
+            Folder(client=clients[i % 10], vehicle=vehicles[i % 10], type_folder='PURCHASE')
+            for i in range(100)
+        ])
+        File.objects.bulk_create([
+            File(vehicle=folder.vehicle, folder=folder, document_type=document_type, file=f'documents/{folder.id}.pdf')
+            for folder in folders
+            for document_type in ('ID_CARD', 'DRIVING_LICENSE')
+        ])
+        cls.folder = folders[0]
+
+    def setUp(self):
+        # HTTPS imposé par SECURE_SSL_REDIRECT, hôte accepté par ALLOWED_HOSTS
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.manager)
+
+    def test_list_folders_within_query_budget(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/folders/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 100)
+        self.assertEqual(len(response.data[0]['files']), 2)
+        self.assertLessEqual(len(queries), FOLDER_LIST_QUERY_BUDGET, [query['sql'] for query in queries])
+
+    def test_retrieve_folder_within_query_budget(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/folders/{self.folder.id}/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['client']['username'], self.folder.client.username)
+        self.assertLessEqual(len(queries), FOLDER_DETAIL_QUERY_BUDGET, [query['sql'] for query in queries])
+
+
+class BatchUploadTests(FolderTablesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create(username='gestionnaire', email='g@abd.fr', role='GESTIONNAIRE')
+        client = User.objects.create(username='client', email='client@abd.fr', role='CLIENT')
+        vehicle = Vehicle.objects.create(
+            brand='Renault', model='Clio', year=2020, mileage=0, type_offer='SALE', state='AVAILABLE'
+        )
+        cls.folder = Folder.objects.create(client=client, vehicle=vehicle, type_folder='PURCHASE')
+
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.manager)
+        self.storage = InMemoryStorage()
+        patcher = mock.patch.object(File._meta.get_field('file'), 'storage', self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_duplicate_filenames_get_distinct_objects(self):
+        response = self.client.post(
+            f'/api/folders/{self.folder.id}/files/batch_upload/',
+            {
+                'ID_CARD': [
+                    SimpleUploadedFile('scan.pdf', b'recto', content_type='application/pdf'),
+                    SimpleUploadedFile('scan.pdf', b'verso', content_type='application/pdf'),
+                ],
+                'DRIVING_LICENSE': SimpleUploadedFile('scan.pdf', b'permis', content_type='application/pdf'),
+            },
+            format='multipart',
+            secure=True,
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        names = list(File.objects.filter(folder=self.folder).values_list('file', flat=True))
+        self.assertEqual(len(set(names)), 3)
+        self.assertTrue(all(name.endswith('/scan.pdf') for name in names))
+        contents = {self.storage.open(name).read() for name in names}
+        self.assertEqual(contents, {b'recto', b'verso', b'permis'})
+
+
+class FolderStatsTests(FolderTablesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create(username='gestionnaire', email='g@abd.fr', role='GESTIONNAIRE')
+        cls.customer = User.objects.create(username='client', email='client@abd.fr', role='CLIENT')
+        cls.vehicle = Vehicle.objects.create(
+            brand='Renault', model='Clio', year=2020, mileage=0, type_offer='SALE', state='AVAILABLE'
+        )
+
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.manager)
+
+    def folder(self, type_folder='PURCHASE', pending_files=0):
+        folder = Folder.objects.create(client=self.customer, vehicle=self.vehicle, type_folder=type_folder)
+        for i in range(pending_files):
+            File.objects.create(vehicle=self.vehicle, folder=folder, file=f'documents/{folder.id}_{i}.pdf')
+        return folder
+
+    def change_status(self, folder, new_status):
+        response = self.client.post(f'/api/folders/{folder.id}/change_status/', {'status': new_status}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        folder.refresh_from_db()
+        return folder
+
+    def test_validation_date_is_set_on_validation_only(self):
+        folder = self.change_status(self.folder(), 'IN_PROGRESS')
+        self.assertIsNone(folder.validation_date)
+        folder = self.change_status(folder, 'VALIDATED')
+        validated_at = folder.validation_date
+        self.assertIsNotNone(validated_at)
+        # Une modification ultérieure ne change pas la date de validation
+        folder.type_folder = 'RENTAL'
+        folder.save()
+        folder.refresh_from_db()
+        self.assertEqual(folder.validation_date, validated_at)
+        self.assertIsNone(self.change_status(folder, 'REJECTED').validation_date)
+
+    def test_live_stats(self):
+        validated = self.change_status(self.folder(pending_files=1), 'VALIDATED')
+        Folder.objects.filter(pk=validated.pk).update(
+            creation_date=validated.validation_date - timedelta(hours=2),
+            modification_date=timezone.now() + timedelta(days=5),  # Sans effet sur la durée de validation
+        )
+        self.folder(type_folder='RENTAL', pending_files=2)
+
+        response = self.client.get('/api/folders/stats/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        stats = response.data
+        self.assertEqual(stats['source'], 'live')
+        self.assertEqual(stats['total'], 2)
+        self.assertEqual(stats['by_status']['VALIDATED'], 1)
+        self.assertEqual(stats['by_status']['PENDING'], 1)
+        self.assertEqual(stats['by_type'], {'PURCHASE': 1, 'RENTAL': 1})
+        self.assertEqual(stats['pending_files'], 3)
+        self.assertEqual(stats['average_validation_seconds'], 7200.0)
+
+        response = self.client.get('/api/folders/stats/', {'type_folder': 'RENTAL'}, secure=True)
+        self.assertEqual((response.data['total'], response.data['pending_files']), (1, 2))
+
+    @override_settings(FOLDER_STATS_COUNTERS=True)
+    def test_counters_follow_writes(self):
+        def assertCountersMatchLive():
+            expected = summarize(live_rows(Folder.objects.all()), 'counters')
+            self.assertEqual(summarize(counter_rows({}), 'counters'), expected)
+
+        first = self.folder(pending_files=2)
+        second = self.folder(type_folder='RENTAL', pending_files=1)
+        assertCountersMatchLive()
+
+        self.change_status(first, 'VALIDATED')
+        assertCountersMatchLive()
+
+        file = first.files.first()
+        file.is_verified = True
+        file.save()
+        assertCountersMatchLive()
+
+        first.type_folder = 'RENTAL'
+        first.save()
+        assertCountersMatchLive()
+
+        second.delete()
+        assertCountersMatchLive()
+        self.assertEqual(summarize(counter_rows({}), 'counters')['pending_files'], 1)
+
+    @override_settings(FOLDER_STATS_COUNTERS=True)
+    def test_stats_read_counters_when_enabled(self):
+        self.folder(pending_files=1)
+        FolderCounter.objects.all().delete()
+        rebuild_counters()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/folders/stats/', secure=True)
+        self.assertEqual(response.data['source'], 'counters')
+        self.assertEqual((response.data['total'], response.data['pending_files']), (1, 1))
+        self.assertEqual(len(queries), 1, [query['sql'] for query in queries])
+
+
+class _FailingBody:
+    """Corps d'objet S3 dont la lecture échoue après le premier bloc."""
+
+    def __init__(self):
+        self.closed = False
+
+    def iter_chunks(self, chunk_size):
+        yield b'%PDF-1.4'
+        raise OSError('connexion S3 interrompue')
+
+    def close(self):
+        self.closed = True
+
+
+class FolderArchiveTests(MockS3Mixin, FolderTablesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create(username='gestionnaire', email='g@abd.fr', role='GESTIONNAIRE')
+        customer = User.objects.create(username='client', email='client@abd.fr', role='CLIENT')
+        vehicle = Vehicle.objects.create(
+            brand='Renault', model='Clio', year=2020, mileage=0, type_offer='SALE', state='AVAILABLE'
+        )
+        cls.folder = Folder.objects.create(client=customer, vehicle=vehicle, type_folder='PURCHASE')
+        cls.files = [
+            File.objects.create(vehicle=vehicle, folder=cls.folder, document_type=document_type, file=name)
+            for document_type, name in (
+                ('ID_CARD', 'documents/a/identite.jpg'),
+                ('SIGNED_CONTRACT', 'documents/b/contrat.pdf'),
+                ('OTHER', 'documents/c/absent.pdf'),
+            )
+        ]
+
+    def assertReaderStopped(self):
+        self.assertFalse([t for t in threading.enumerate() if t.name == 'folder-archive-read-ahead' and t.is_alive()])
+
+    @override_settings(FOLDER_ARCHIVE_CHUNK_SIZE=1024, FOLDER_ARCHIVE_READ_AHEAD=2)
+    def test_download_all_streams_a_valid_zip(self):
+        contents = {self.files[0]: b'\xff\xd8' * 5000, self.files[1]: b'%PDF-1.4 contrat'}
+        for file, content in contents.items():
+            self.s3.put_object(Bucket=self.bucket, Key=s3_key(file.file.name), Body=content)
+
+        client = APIClient(HTTP_HOST='localhost')
+        client.force_authenticate(self.manager)
+        response = client.get(f'/api/folders/{self.folder.id}/download_all/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        data = b''.join(response.streaming_content)
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertIsNone(archive.testzip())
+            for file, content in contents.items():
+                self.assertEqual(archive.read(archive_name(file)), content)
+            self.assertEqual(archive.read(MISSING_FILES_NAME).decode(), f"{archive_name(self.files[2])}\n")
+        self.assertReaderStopped()
+
+    def test_read_error_mid_stream_is_raised_and_stops_the_reader(self):
+        body = _FailingBody()
+        s3 = mock.Mock(get_object=mock.Mock(return_value={'Body': body}))
+        with self.assertRaisesMessage(OSError, 'connexion S3 interrompue'):
+            b''.join(stream_folder_archive(self.files, s3_client=s3))
+        self.assertTrue(body.closed)
+        self.assertReaderStopped()
+
+    @override_settings(FOLDER_ARCHIVE_CHUNK_SIZE=16, FOLDER_ARCHIVE_READ_AHEAD=1)
+    def test_client_disconnect_stops_the_reader(self):
+        self.s3.put_object(Bucket=self.bucket, Key=s3_key(self.files[0].file.name), Body=b'x' * 4096)
+        stream = stream_folder_archive(self.files[:1])
+        next(stream)
+        stream.close()  # Appelé par Django quand le client se déconnecte
+        self.assertReaderStopped()
@@ -0,0 +1,72 @@
+"""
+Enregistrement groupé des fichiers d'un dossier (``FileViewSet.batch_upload``).
+
+Chaque fichier reçoit un nom unique (sous-dossier uuid, comme les uploads
+directs) avant les envois : deux fichiers de même nom dans un lot ne peuvent
+pas obtenir la même clé. Les fichiers sont envoyés au stockage (S3) en parallèle, puis les lignes
+``File`` sont insérées en un seul ``bulk_create`` dans une transaction. Si un
+envoi ou l'insertion échoue, les objets déjà déposés sont supprimés : le
+dossier ne reçoit aucun fichier.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+
+from config.s3_uploads import storage_name
+
+from .models import File
+from .stats import apply_delta, counters_enabled
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_FILES = 10
+
+
+def _delete_stored(storage, names):
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception as e:
+            logger.error(f"Impossible de supprimer le fichier {name} après un échec: {str(e)}")
+
+
+def store_folder_files(folder, vehicle_id, uploads):
+    """
+    Enregistre ``uploads`` (couples ``(document_type, fichier reçu)``) pour
+    ``folder`` et retourne les ``File`` créés, dans l'ordre de la demande.
+    """
+    field = File._meta.get_field('file')
+    storage = field.storage
+    # Noms choisis ici, avant les envois parallèles : get_available_name (vérifier puis
+    # écrire) ne protège pas deux envois simultanés du même nom
+    targets = [(storage_name(content.name, upload_to=field.upload_to), content) for _, content in uploads]
+
+    def save(target):
+        name, content = target
+        return storage.save(name, content, max_length=field.max_length)
+
+    threads = max(1, min(len(uploads), getattr(settings, 'FOLDER_UPLOAD_THREADS', 4)))
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [executor.submit(save, target) for target in targets]
+    # Le bloc with attend la fin de tous les envois, y compris après un échec
+    names = [future.result() for future in futures if future.exception() is None]
+    errors = [future.exception() for future in futures if future.exception() is not None]
+    if errors:
+        _delete_stored(storage, names)
+        raise errors[0]
+
+    try:
+        with transaction.atomic():
+            files = File.objects.bulk_create([
+                File(folder=folder, vehicle_id=vehicle_id, document_type=document_type, file=name)
+                for (document_type, _), name in zip(uploads, names)
+            ])
+            # bulk_create n'émet pas post_save : compteurs du tableau de bord mis à jour ici
+            if counters_enabled():
+                apply_delta(folder.status, folder.type_folder, pending_files=len(files))
+            return files
+    except Exception:
+        _delete_stored(storage, names)
+        raise
@@ -3,17 +3,27 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import NotFound, PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
+from django.http import StreamingHttpResponse
 from user.permissions import IsGestionnaireOrAdmin, IsOwnerOrStaff
+from vehicle.models import Vehicle
 from .models import Folder, File
 from .serializers import FolderSerializer, FileSerializer
-from rest_framework.parsers import MultiPartParser, FormParser
+from .querysets import plan_folder_queryset
+from .uploads import MAX_BATCH_FILES, store_folder_files
+from .stats import folder_stats
+from .archive import stream_folder_archive
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from config.s3_uploads import UploadError, finish_upload, read_token, start_upload
 import os
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Types acceptés pour les pièces des dossiers (cartes d'identité, permis, contrats)
+FILE_UPLOAD_CONTENT_TYPES = ('application/pdf', 'image/jpeg', 'image/png')
+
 class FolderViewSet(viewsets.ModelViewSet):
     serializer_class = FolderSerializer
     filter_backends = [DjangoFilterBackend]
@@ -22,13 +32,17 @@ class FolderViewSet(viewsets.ModelViewSet):
     def get_permissions(self):
         if self.action in ['update', 'partial_update', 'destroy']:
             return [IsAuthenticated(), IsOwnerOrStaff()]
+        if self.action == 'stats':
+            return [IsAuthenticated(), IsGestionnaireOrAdmin()]
         return [IsAuthenticated()]
     
     def get_queryset(self):
         user = self.request.user
-        if user.role in ['GESTIONNAIRE', 'ADMIN']:
-            return Folder.objects.all()
-        return Folder.objects.filter(client=user)
+        queryset = Folder.objects.all()
+        if user.role not in ['GESTIONNAIRE', 'ADMIN']:
+            queryset = queryset.filter(client=user)
+        # Client, véhicule et fichiers chargés en deux requêtes (folder/querysets.py)
+        return plan_folder_queryset(queryset, self.action)
     
     def perform_create(self, serializer):
         serializer.save(client=self.request.user)
@@ -46,6 +60,31 @@ class FolderViewSet(viewsets.ModelViewSet):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    @action(detail=True, methods=['get'])
+    def download_all(self, request, pk=None):
+        """
+        Télécharge tous les fichiers du dossier dans une archive ZIP produite
+        à la volée depuis S3 (voir folder/archive.py).
+        """
+        folder = self.get_object()
+        # Liste chargée ici : le flux est produit hors de la requête, sans accès à la base
+        files = list(folder.files.all())
+        logger.info(f"Export ZIP du dossier {folder.id} ({len(files)} fichier(s)) par l'utilisateur {request.user.id}")
+        response = StreamingHttpResponse(stream_folder_archive(files), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="dossier_{folder.id}.zip"'
+        response['Cache-Control'] = 'no-store'
+        response['X-Accel-Buffering'] = 'no'  # Désactiver la mise en tampon de NGINX
+        return response
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """
+        Tableau de bord des dossiers : nombre par statut et par type, fichiers
+        en attente de vérification et durée moyenne avant validation
+        (mêmes filtres ``status`` / ``type_folder`` que la liste).
+        """
+        return Response(folder_stats(self.filter_queryset(self.get_queryset()), request.query_params))
+
 class FileViewSet(viewsets.ModelViewSet):
     queryset = File.objects.all()
     serializer_class = FileSerializer
@@ -98,3 +137,134 @@ class FileViewSet(viewsets.ModelViewSet):
         except Exception as e:
             logger.error(f"Erreur lors de la suppression du fichier: {str(e)}")
             raise
+
+    def _upload_folder(self, folder_id):
+        """Dossier auquel l'utilisateur peut ajouter des fichiers."""
+        try:
+            folder = Folder.objects.filter(id=folder_id).first()
+        except (TypeError, ValueError):
+            folder = None
+        if folder is None:
+            raise NotFound("Dossier introuvable")
+        if folder.client_id != self.request.user.id and self.request.user.role not in ['GESTIONNAIRE', 'ADMIN']:
+            raise PermissionDenied("Vous n'êtes pas autorisé à ajouter des fichiers à ce dossier.")
+        return folder
+
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser])
+    def upload_url(self, request, folder_pk=None):
+        """
+        Prépare l'envoi direct d'un fichier vers S3 (voir config/s3_uploads.py).
+
+        Corps : ``filename``, ``content_type``, ``size`` (octets),
+        ``document_type`` et ``vehicle`` (véhicule du dossier par défaut).
+        Le client dépose ensuite le fichier avec le formulaire ou les URL
+        retournés, puis appelle ``complete_upload`` avec ``upload_token``.
+        """
+        folder = self._upload_folder(folder_pk or request.data.get('folder'))
+        document_type = request.data.get('document_type', 'OTHER')
+        if document_type not in dict(File.DOCUMENT_TYPES):
+            return Response({'error': 'Type de document invalide'}, status=status.HTTP_400_BAD_REQUEST)
+        vehicle_id = request.data.get('vehicle') or folder.vehicle_id
+        if not isinstance(vehicle_id, int) or not Vehicle.objects.filter(id=vehicle_id).exists():
+            return Response({'error': 'Véhicule non trouvé'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            upload = start_upload(
+                request.data.get('filename'),
+                request.data.get('content_type'),
+                request.data.get('size'),
+                metadata={
+                    'kind': 'file',
+                    'user': request.user.id,
+                    'folder': folder.id,
+                    'vehicle': vehicle_id,
+                    'document_type': document_type,
+                },
+                content_types=FILE_UPLOAD_CONTENT_TYPES,
+            )
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Erreur lors de la préparation de l'upload S3: {str(e)}")
+            return Response(
+                {'error': f"Erreur lors de la préparation de l'upload S3: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        logger.info(f"Upload direct préparé pour le dossier {folder.id}: {upload['key']} ({upload['method']})")
+        return Response(upload, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser])
+    def complete_upload(self, request, folder_pk=None):
+        """
+        Crée le fichier après un envoi direct vers S3.
+
+        Corps : ``upload_token`` et, pour un upload multipart, ``parts``
+        (``[{"part_number": 1, "etag": "..."}]``).
+        """
+        try:
+            upload = read_token(request.data.get('upload_token'))
+            metadata = upload['metadata']
+            if metadata.get('kind') != 'file' or metadata.get('user') != request.user.id:
+                raise UploadError("Jeton d'upload invalide")
+            folder = self._upload_folder(metadata['folder'])
+            existing = File.objects.filter(file=upload['name']).first()
+            if existing is not None:
+                return Response(self.get_serializer(existing).data)
+            name = finish_upload(upload, request.data.get('parts'))
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        file = File.objects.create(
+            vehicle_id=metadata['vehicle'],
+            folder=folder,
+            document_type=metadata['document_type'],
+            file=name,
+        )
+        logger.info(f"Fichier créé après upload direct: {file.id}")
+        return Response(self.get_serializer(file).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def batch_upload(self, request, folder_pk=None):
+        """
+        Ajoute plusieurs fichiers au dossier en une seule requête multipart.
+
+        Chaque fichier est envoyé dans un champ nommé d'après son type
+        (``ID_CARD``, ``DRIVING_LICENSE``, ``SIGNED_CONTRACT``, ``OTHER`` ;
+        un même champ peut être répété). Les fichiers sont rattachés au
+        véhicule du dossier ; tous sont enregistrés, ou aucun.
+        """
+        folder = self._upload_folder(folder_pk)
+        unknown = [name for name in request.FILES if name not in dict(File.DOCUMENT_TYPES)]
+        if unknown:
+            return Response(
+                {'error': f"Type de document invalide: {', '.join(unknown)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        uploads = [
+            (document_type, content)
+            for document_type in request.FILES
+            for content in request.FILES.getlist(document_type)
+        ]
+        if not uploads:
+            return Response({'error': 'Aucun fichier fourni'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(uploads) > MAX_BATCH_FILES:
+            return Response(
+                {'error': f'{MAX_BATCH_FILES} fichiers au maximum par envoi'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        invalid = [content.name for _, content in uploads if content.content_type not in FILE_UPLOAD_CONTENT_TYPES]
+        if invalid:
+            return Response(
+                {'error': f"Type de fichier non autorisé: {', '.join(invalid)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            files = store_folder_files(folder, folder.vehicle_id, uploads)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'envoi groupé de fichiers pour le dossier {folder.id}: {str(e)}")
+            return Response(
+                {'error': f"Erreur lors de l'enregistrement des fichiers: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        logger.info(f"{len(files)} fichier(s) ajouté(s) au dossier {folder.id}")
+        return Response(self.get_serializer(files, many=True).data, status=status.HTTP_201_CREATED)
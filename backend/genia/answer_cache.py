@@ -0,0 +1,153 @@
+"""
+Cache des réponses GenIA.
+
+Une réponse est indexée par la question normalisée, les identifiants triés des
+documents interrogés, la version du contenu de chacun d'eux
+(``Document.content_version``) et les options de génération passées à Ollama
+(température, longueur maximale...). La normalisation garde tous les mots, y compris
+« ne », « pas » ou « n' » : une question niée n'a jamais la clé de sa forme
+affirmative. Une question reformulée peut aussi être servie depuis le cache si
+son vecteur (voir ``genia.retrieval.embed``) est assez proche d'une question
+déjà posée sur les mêmes documents, avec les mêmes options, et qu'elle emploie
+les mêmes mots de négation.
+
+Le cache est propre à chaque processus (LRU + durée de vie). Comme la version
+des documents fait partie de la clé, une entrée devenue obsolète dans un autre
+worker n'est jamais servie ; ``invalidate_document`` libère simplement la
+mémoire au plus tôt dans le processus courant.
+"""
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .retrieval import TOKEN_RE, embed, normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+# Mots qui inversent le sens d'une question (après normalize_text)
+NEGATION_WORDS = frozenset({'ne', 'n', 'pas', 'non', 'ni', 'jamais', 'aucun', 'aucune', 'rien', 'sans', 'not', 'no'})
+
+
+def normalize_query(query):
+    """Forme canonique d'une question : minuscules, sans accents ni ponctuation, espaces réduits."""
+    return ' '.join(TOKEN_RE.findall(normalize_text(query)))
+
+
+def negations(normalized):
+    """Mots de négation d'une question normalisée."""
+    return frozenset(word for word in normalized.split() if word in NEGATION_WORDS)
+
+
+def documents_signature(documents):
+    """Identifiants triés des documents avec la version de leur contenu."""
+    return tuple(sorted((doc.id, doc.content_version) for doc in documents))
+
+
+def options_signature(options):
+    """Options de génération triées (aucune option : valeurs par défaut d'Ollama)."""
+    return tuple(sorted((options or {}).items()))
+
+
+class AnswerCache:
+    """Cache LRU des réponses, avec expiration et recherche par similarité."""
+
+    def __init__(self, max_size=256, ttl=3600, similarity=0.9):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity = similarity
+        self._entries = OrderedDict()  # (question normalisée, signature) -> entrée
+        self._by_signature = {}        # signature (documents, options) -> ensemble de clés
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._by_signature.get(key[1])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_signature[key[1]]
+
+    def get(self, query, documents, options=None):
+        """Retourne la réponse en cache pour cette question et ces options de génération, ou None."""
+        normalized = normalize_query(query)
+        signature = (documents_signature(documents), options_signature(options))
+        key = (normalized, signature)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self.similarity:
+                # Question reformulée : chercher la plus proche sur les mêmes documents
+                candidates = self._by_signature.get(signature, ())
+                if candidates:
+                    vector = embed(normalized)
+                    polarity = negations(normalized)
+                    best_score = self.similarity
+                    for candidate in candidates:
+                        other = self._entries[candidate]
+                        # Le vecteur ignore les mots vides, donc la négation : elle doit correspondre
+                        if other['negations'] != polarity:
+                            continue
+                        score = sum(a * b for a, b in zip(vector, other['vector']))
+                        if score >= best_score:
+                            best_score, key, entry = score, candidate, other
+
+            if entry is not None and entry['expires_at'] < now:
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['response']
+
+    def set(self, query, documents, response, options=None):
+        """Enregistre une réponse pour cette question, ces documents et ces options de génération."""
+        normalized = normalize_query(query)
+        signature = (documents_signature(documents), options_signature(options))
+        key = (normalized, signature)
+        entry = {
+            'response': response,
+            'expires_at': time.monotonic() + self.ttl,
+            'vector': embed(normalized) if self.similarity else None,
+            'negations': negations(normalized),
+            'document_ids': frozenset(doc_id for doc_id, _ in signature[0]),
+        }
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._by_signature.setdefault(signature, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_document(self, document_id):
+        """Supprime toutes les réponses qui s'appuient sur ce document."""
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if document_id in entry['document_ids']]
+            for key in stale:
+                self._remove(key)
+        if stale:
+            logger.info(f"{len(stale)} réponse(s) en cache invalidée(s) pour le document {document_id}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_signature.clear()
+
+
+answer_cache = AnswerCache(
+    max_size=getattr(settings, 'GENIA_ANSWER_CACHE_SIZE', 256),
+    ttl=getattr(settings, 'GENIA_ANSWER_CACHE_TTL', 3600),
+    similarity=getattr(settings, 'GENIA_ANSWER_CACHE_SIMILARITY', 0.9),
+)
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class GeniaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'genia' 
\ No newline at end of file
+    name = 'genia'
+
+    def ready(self):
+        from . import signals  # noqa: F401
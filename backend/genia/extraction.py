@@ -0,0 +1,130 @@
+"""
+Extraction du texte des documents PDF GenIA.
+
+Ces fonctions sont appelées par le worker d'ingestion (voir ``genia.jobs``) et
+non plus dans le cycle de la requête HTTP.
+"""
+import io
+import logging
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from config.storage_backends import get_s3_client
+
+from .pdf import PARALLEL_MIN_PAGES, iter_page_texts
+from .retrieval import index_document
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+EXTRACTION_FAILED_TEXT = "Échec de l'extraction du texte. Veuillez réessayer plus tard."
+
+
+def is_pdf(document):
+    """Indique si le document pointe vers un fichier PDF."""
+    return bool(document.file) and (
+        document.file.name.endswith('.pdf') or (document.s3_key and document.s3_key.endswith('.pdf'))
+    )
+
+
+def _local_path(document):
+    """Chemin local du fichier, ou None si le stockage n'en fournit pas (S3)."""
+    try:
+        return document.file.path
+    except (AttributeError, NotImplementedError, ValueError):
+        return None
+
+
+@contextmanager
+def open_pdf_source(document, s3_client=None):
+    """
+    Ouvre le PDF d'un document sous forme de flux binaire positionnable.
+
+    Sur S3, le corps de l'objet est lu par blocs dans un ``SpooledTemporaryFile`` :
+    il reste en mémoire jusqu'à ``GENIA_PDF_SPOOL_MAX_SIZE`` octets et ne passe
+    par le disque que pour les très gros fichiers, sans fichier nommé à nettoyer.
+    Le flux est toujours fermé à la sortie du bloc ``with``, même en cas d'erreur.
+    ``s3_client`` permet d'injecter un client (par exemple un bouchon moto).
+    """
+    file_key = document.s3_key or document.file.name
+    bucket = getattr(settings, 'AWS_STORAGE_BUCKET_NAME', None)
+    source = None
+    s3_error = None
+
+    if bucket:
+        try:
+            logger.info(f"Lecture du document depuis S3: bucket={bucket}, fichier={file_key}")
+            s3 = s3_client or get_s3_client()
+            # La clé doit déjà contenir le préfixe complet
+            body = s3.get_object(Bucket=bucket, Key=file_key)['Body']
+            source = tempfile.SpooledTemporaryFile(
+                max_size=getattr(settings, 'GENIA_PDF_SPOOL_MAX_SIZE', 32 * 1024 * 1024)
+            )
+            try:
+                for chunk in body.iter_chunks(chunk_size=STREAM_CHUNK_SIZE):
+                    source.write(chunk)
+            except Exception:
+                source.close()
+                raise
+            finally:
+                body.close()
+            logger.info(f"Document lu depuis S3: {source.tell()} octets")
+            source.seek(0)
+        except Exception as e:
+            source = None
+            s3_error = e
+            logger.error(f"Erreur lors de la lecture depuis S3: {str(e)}")
+
+    if source is None:
+        # Fallback: utiliser le fichier local
+        local_path = _local_path(document)
+        if not local_path:
+            message = "Impossible d'accéder au fichier PDF. Abandon de l'extraction de texte."
+            if s3_error is not None:
+                raise FileNotFoundError(f"{message} Erreur S3: {str(s3_error)}") from s3_error
+            raise FileNotFoundError(message)
+        logger.info(f"Utilisation du chemin local: {local_path}")
+        source = open(local_path, 'rb')
+
+    try:
+        yield source
+    finally:
+        source.close()
+
+
+def extract_document_text(document, progress_callback=None, s3_client=None):
+    """
+    Extrait le texte d'un document PDF, l'enregistre dans ``content_text`` et
+    met à jour l'index de recherche.
+
+    ``progress_callback(pages_traitees, total_pages)`` est appelé après chaque page.
+    Lève une exception en cas d'échec.
+    """
+    logger.info(f"Traitement du document PDF: {document.id} - {document.title}")
+    with open_pdf_source(document, s3_client=s3_client) as source:
+        logger.info(f"Extraction du texte avec PyPDF2: document {document.id}")
+        # Les pages sont écrites au fil de l'eau dans un tampon : pas de concaténation quadratique
+        buffer = io.StringIO()
+        pages = iter_page_texts(
+            source,
+            workers=getattr(settings, 'GENIA_PDF_WORKERS', None),
+            min_parallel_pages=getattr(settings, 'GENIA_PDF_PARALLEL_MIN_PAGES', PARALLEL_MIN_PAGES),
+        )
+        for page_number, page_text, total in pages:
+            buffer.write(f"[Page {page_number}]\n{page_text}\n\n")
+            if progress_callback:
+                progress_callback(page_number, total)
+        text = buffer.getvalue()
+
+    document.content_text = text
+    document.save(update_fields=['content_text'])
+    logger.info(f"Texte extrait: {len(text)} caractères")
+
+    try:
+        index_document(document)
+    except Exception as e:
+        # L'index sera reconstruit à la volée lors de la prochaine requête
+        logger.error(f"Erreur lors de l'indexation du document {document.id}: {str(e)}")
@@ -0,0 +1,126 @@
+"""
+File d'attente d'ingestion des documents GenIA, stockée en base de données.
+
+Les vues se contentent de créer un ``ExtractionJob`` ; la commande
+``python manage.py run_extraction_worker`` réserve les tâches une par une
+(``SELECT ... FOR UPDATE SKIP LOCKED``) et exécute l'extraction hors du
+cycle des requêtes HTTP (cycle de vie commun : config/job_queue.py). Pendant
+l'extraction, le worker met à jour ``heartbeat_at`` à chaque avancement : seule
+une tâche sans signe de vie depuis ``GENIA_EXTRACTION_STALE_AFTER`` secondes est
+considérée comme abandonnée.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db.models import F
+
+from config import job_queue
+
+from .answer_cache import answer_cache
+from .extraction import EXTRACTION_FAILED_TEXT, extract_document_text, is_pdf
+from .models import Document, ExtractionJob
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = 30  # secondes entre deux signes de vie, hors avancement notable
+
+
+def enqueue_extraction(document):
+    """
+    Place l'extraction d'un document dans la file d'attente.
+
+    Retourne le ``ExtractionJob`` créé, ou None si le document n'est pas un PDF.
+    """
+    if not is_pdf(document):
+        Document.objects.filter(pk=document.pk).update(extraction_status='SKIPPED', extraction_progress=0)
+        document.extraction_status = 'SKIPPED'
+        return None
+
+    Document.objects.filter(pk=document.pk).update(extraction_status='PENDING', extraction_progress=0)
+    document.extraction_status = 'PENDING'
+    document.extraction_progress = 0
+    job = ExtractionJob.objects.create(document=document)
+    logger.info(f"Extraction du document {document.id} mise en file d'attente (tâche {job.id})")
+    return job
+
+
+def extraction_in_progress(document):
+    """Vrai si une tâche d'extraction du document est en attente ou en cours."""
+    return ExtractionJob.objects.filter(document=document, status__in=['QUEUED', 'RUNNING']).exists()
+
+
+def enqueue_extractions(documents):
+    """
+    Version groupée de ``enqueue_extraction`` pour les imports en masse.
+
+    Retourne un dictionnaire {id du document: ``ExtractionJob``} (les documents
+    qui ne sont pas des PDF n'y figurent pas).
+    """
+    pdfs = [document for document in documents if is_pdf(document)]
+    others = [document.pk for document in documents if not is_pdf(document)]
+    if others:
+        Document.objects.filter(pk__in=others).update(extraction_status='SKIPPED', extraction_progress=0)
+    jobs = ExtractionJob.objects.bulk_create([ExtractionJob(document=document) for document in pdfs])
+    logger.info(f"{len(jobs)} extraction(s) mise(s) en file d'attente")
+    return {job.document_id: job for job in jobs}
+
+
+def requeue_stale_jobs(stale_after=None):
+    """
+    Remet en file d'attente les tâches dont le worker ne donne plus signe de vie
+    (worker arrêté) et repasse leurs documents en attente.
+    """
+    def reset_documents(jobs):
+        Document.objects.filter(pk__in={job.document_id for job in jobs}).update(
+            extraction_status='PENDING', extraction_progress=0
+        )
+
+    stale_after = stale_after or getattr(settings, 'GENIA_EXTRACTION_STALE_AFTER', 900)
+    return job_queue.requeue_stale_jobs(ExtractionJob, stale_after, on_requeue=reset_documents)
+
+
+def claim_next_job():
+    """Réserve la plus ancienne tâche d'extraction en attente, ou retourne None si la file est vide."""
+    return job_queue.claim_next_job(ExtractionJob)
+
+
+def run_job(job, max_attempts=None):
+    """Exécute une tâche réservée et enregistre son résultat."""
+    max_attempts = max_attempts or getattr(settings, 'GENIA_EXTRACTION_MAX_ATTEMPTS', 3)
+    document = job.document
+    Document.objects.filter(pk=document.pk).update(extraction_status='PROCESSING', extraction_progress=0)
+
+    last_progress = [0]
+    last_heartbeat = [time.monotonic()]
+
+    def report_progress(done, total):
+        progress = int(done * 100 / total) if total else 100
+        # Limiter les écritures en base : une mise à jour tous les 5 %
+        if progress - last_progress[0] >= 5 or progress == 100:
+            last_progress[0] = progress
+            Document.objects.filter(pk=document.pk).update(extraction_progress=progress)
+        elif time.monotonic() - last_heartbeat[0] < HEARTBEAT_INTERVAL:
+            return
+        last_heartbeat[0] = time.monotonic()
+        job_queue.heartbeat(job)
+
+    try:
+        extract_document_text(document, progress_callback=report_progress)
+    except Exception as e:
+        logger.error(f"Erreur lors de l'extraction du document {document.id} (tentative {job.attempts}): {str(e)}")
+        if job_queue.record_failure(job, e, max_attempts):
+            Document.objects.filter(pk=document.pk).update(extraction_status='PENDING', extraction_progress=0)
+        else:
+            Document.objects.filter(pk=document.pk).update(
+                extraction_status='FAILED',
+                content_text=EXTRACTION_FAILED_TEXT,
+                content_version=F('content_version') + 1
+            )
+            answer_cache.invalidate_document(document.pk)
+        return False
+
+    job_queue.record_success(job)
+    Document.objects.filter(pk=document.pk).update(extraction_status='DONE', extraction_progress=100)
+    logger.info(f"Extraction du document {document.id} terminée")
+    return True
@@ -0,0 +1,95 @@
+import os
+import time
+import tempfile
+
+from django.core.management.base import BaseCommand
+from PyPDF2 import PdfReader
+
+from genia.pdf import iter_page_texts
+
+LOREM = (
+    "Contrat de location de vehicule entre ABD Motors et le locataire. "
+    "Le locataire s'engage a restituer le vehicule dans l'etat ou il l'a recu. "
+    "La duree de location, le kilometrage autorise et le montant du depot de garantie "
+    "sont precises dans les conditions particulieres du present contrat."
+)
+
+
+def build_synthetic_pdf(path, pages, lines_per_page=40):
+    """Écrit un PDF texte de ``pages`` pages (Helvetica), sans dépendance supplémentaire."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Arbre des pages, complété une fois les pages créées
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in range(pages):
+        lines = [f"BT /F1 9 Tf 40 {800 - 18 * i} Td (Page {page + 1} ligne {i + 1} - {LOREM[:90]}) Tj ET"
+                 for i in range(lines_per_page)]
+        stream = "\n".join(lines).encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    with open(path, 'wb') as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def extract_legacy(path):
+    """Ancienne implémentation : parcours séquentiel et concaténation ``text +=``."""
+    reader = PdfReader(path)
+    text = ""
+    for i, page in enumerate(reader.pages):
+        page_text = page.extract_text()
+        text += f"[Page {i+1}]\n{page_text}\n\n"
+    return text
+
+
+def extract_current(path, workers):
+    parts = []
+    for page_number, page_text, total in iter_page_texts(path, workers=workers):
+        parts.append(f"[Page {page_number}]\n{page_text}\n\n")
+    return "".join(parts)
+
+
+class Command(BaseCommand):
+    help = "Compare l'extraction PDF séquentielle et parallèle sur des PDF synthétiques."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, nargs='+', default=[10, 100, 500])
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        self.stdout.write(f"{'pages':>6} {'ancienne (s)':>14} {'nouvelle (s)':>14} {'gain':>7}")
+        with tempfile.TemporaryDirectory() as directory:
+            for pages in options['pages']:
+                path = os.path.join(directory, f"synthetic_{pages}.pdf")
+                build_synthetic_pdf(path, pages)
+
+                start = time.perf_counter()
+                legacy_text = extract_legacy(path)
+                legacy = time.perf_counter() - start
+
+                start = time.perf_counter()
+                current_text = extract_current(path, workers)
+                current = time.perf_counter() - start
+
+                if legacy_text != current_text:
+                    self.stderr.write(f"Résultats différents pour {pages} pages")
+                self.stdout.write(f"{pages:>6} {legacy:>14.3f} {current:>14.3f} {legacy / current:>6.2f}x")
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.9 on 2026-10-18 09:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('genia', '0002_folder_document_folder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('page', models.PositiveIntegerField(blank=True, null=True)),
+                ('text', models.TextField()),
+                ('embedding', models.BinaryField()),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='genia.document')),
+            ],
+            options={
+                'ordering': ['document', 'position'],
+                'unique_together': {('document', 'position')},
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.9 on 2026-10-18 07:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def mark_existing_documents(apps, schema_editor):
+    """
+    Les documents déjà extraits avant l'introduction de la file d'attente sont
+    terminés ; les autres n'ont aucune tâche : ils ne sont pas « en attente »
+    et restent extractibles à la demande (``POST /documents/{id}/extract/``).
+    """
+    Document = apps.get_model('genia', 'Document')
+    extracted = Document.objects.exclude(content_text__isnull=True).exclude(content_text='')
+    extracted.update(extraction_status='DONE', extraction_progress=100)
+    Document.objects.exclude(pk__in=extracted.values('pk')).update(extraction_status='SKIPPED', extraction_progress=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('genia', '0003_documentchunk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='extraction_progress',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='extraction_status',
+            field=models.CharField(choices=[('PENDING', 'En attente'), ('PROCESSING', 'En cours'), ('DONE', 'Terminée'), ('FAILED', 'Échec'), ('SKIPPED', 'Non applicable')], default='PENDING', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='ExtractionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('QUEUED', "En file d'attente"), ('RUNNING', 'En cours'), ('DONE', 'Terminée'), ('FAILED', 'Échec')], default='QUEUED', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='extraction_jobs', to='genia.document')),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='genia_extra_status_d9c381_idx')],
+            },
+        ),
+        migrations.RunPython(mark_existing_documents, migrations.RunPython.noop),
+    ]
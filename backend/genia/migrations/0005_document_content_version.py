@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-18 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('genia', '0004_extraction_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='content_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
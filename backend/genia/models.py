@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
 
+from config.job_queue import QueuedJob
+
 
 class Folder(models.Model):
     """Modèle pour les dossiers de l'application."""
@@ -23,6 +25,14 @@ class Document(models.Model):
         ('vente', 'Dossier de vente'),
     )
     
+    EXTRACTION_STATUS = (
+        ('PENDING', 'En attente'),
+        ('PROCESSING', 'En cours'),
+        ('DONE', 'Terminée'),
+        ('FAILED', 'Échec'),
+        ('SKIPPED', 'Non applicable'),
+    )
+    
     title = models.CharField(max_length=255)
     file = models.FileField(upload_to='documents/')
     document_type = models.CharField(max_length=20, choices=TYPE_CHOICES)
@@ -31,9 +41,49 @@ class Document(models.Model):
     uploaded_at = models.DateTimeField(auto_now_add=True)
     content_text = models.TextField(blank=True, null=True)  # Texte extrait pour l'IA
     folder = models.ForeignKey(Folder, related_name='documents', null=True, blank=True, on_delete=models.SET_NULL)
+    extraction_status = models.CharField(max_length=20, choices=EXTRACTION_STATUS, default='PENDING')
+    extraction_progress = models.PositiveSmallIntegerField(default=0)  # Pourcentage de pages traitées
+    content_version = models.PositiveIntegerField(default=0)  # Incrémenté à chaque modification
     
     def __str__(self):
         return self.title
+    
+    def save(self, *args, **kwargs):
+        # Toute modification rend obsolètes les réponses mises en cache pour ce document
+        self.content_version = (self.content_version or 0) + 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content_version' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['content_version']
+        super().save(*args, **kwargs)
+
+
+class ExtractionJob(QueuedJob):
+    """Tâche d'extraction de texte en file d'attente, traitée par le worker d'ingestion."""
+    
+    document = models.ForeignKey(Document, related_name='extraction_jobs', on_delete=models.CASCADE)
+    
+    class Meta(QueuedJob.Meta):
+        indexes = [models.Index(fields=['status', 'created_at'])]
+    
+    def __str__(self):
+        return f"Extraction {self.document_id} ({self.status})"
+
+
+class DocumentChunk(models.Model):
+    """Fragment du texte d'un document, indexé pour la recherche des passages pertinents."""
+    
+    document = models.ForeignKey(Document, related_name='chunks', on_delete=models.CASCADE)
+    position = models.PositiveIntegerField()
+    page = models.PositiveIntegerField(blank=True, null=True)
+    text = models.TextField()
+    embedding = models.BinaryField()  # Vecteur float32 sérialisé (voir genia.retrieval)
+    
+    class Meta:
+        ordering = ['document', 'position']
+        unique_together = ('document', 'position')
+    
+    def __str__(self):
+        return f"{self.document.title} - fragment {self.position}"
 
 
 class AIInteraction(models.Model):
@@ -0,0 +1,193 @@
+"""
+Client Ollama partagé par les vues GenIA.
+
+Une seule ``requests.Session`` par processus conserve les connexions HTTP
+ouvertes (keep-alive) vers Ollama, et la disponibilité du modèle
+(``/api/tags``) est mise en cache quelques secondes : une question ne coûte
+plus qu'un aller-retour vers Ollama au lieu de deux.
+
+Comme les anciennes méthodes ``_query_ollama`` des vues, le client renvoie
+les erreurs sous forme de message texte destiné à l'utilisateur ; ces messages
+sont des instances de ``OllamaErrorMessage`` pour pouvoir les distinguer d'une
+vraie réponse (par exemple pour ne pas les mettre en cache).
+"""
+import json
+import time
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class OllamaErrorMessage(str):
+    """Message d'erreur renvoyé à la place d'une réponse du modèle."""
+
+
+MESSAGE_UNAVAILABLE = OllamaErrorMessage("Le service Ollama n'est pas disponible actuellement. Veuillez vérifier que Ollama est installé et en cours d'exécution sur votre serveur.")
+MESSAGE_TIMEOUT = OllamaErrorMessage("Le temps de réponse d'Ollama a été dépassé. Le contexte est peut-être trop volumineux ou le modèle est occupé.")
+
+
+class OllamaClient:
+    """Client HTTP vers l'API Ollama, sûr pour une utilisation multi-thread."""
+
+    def __init__(self, base_url, model, pool_size=10, tags_ttl=30):
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.tags_ttl = tags_ttl
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._lock = threading.Lock()
+        self._model_checked_at = None
+
+    def invalidate(self):
+        """Oublie la disponibilité du modèle : la prochaine question refera la vérification."""
+        with self._lock:
+            self._model_checked_at = None
+
+    def _unreachable_message(self):
+        return OllamaErrorMessage(f"Impossible de se connecter au service Ollama. Veuillez vérifier que Ollama est installé et en cours d'exécution sur votre serveur ({self.base_url}).")
+
+    def _model_missing_message(self):
+        return OllamaErrorMessage(f"Le modèle {self.model} n'est pas disponible. Veuillez l'installer avec la commande 'ollama pull {self.model}'.")
+
+    def check_model(self, timeout=5):
+        """
+        Vérifie qu'Ollama répond et que le modèle est installé.
+
+        Retourne None si tout va bien, sinon le message d'erreur à afficher.
+        Seul un résultat positif est mis en cache (``tags_ttl`` secondes).
+        """
+        with self._lock:
+            if self._model_checked_at and time.monotonic() - self._model_checked_at < self.tags_ttl:
+                return None
+
+        try:
+            health_check = self.session.get(f"{self.base_url}/api/tags", timeout=timeout)
+            if health_check.status_code != 200:
+                logger.error(f"Ollama n'est pas accessible (status code: {health_check.status_code})")
+                return MESSAGE_UNAVAILABLE
+
+            models = health_check.json().get('models', [])
+            if not any(model.get('name', '').startswith(self.model) for model in models):
+                logger.error(f"Le modèle {self.model} n'est pas disponible dans Ollama")
+                return self._model_missing_message()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Impossible de se connecter à Ollama: {str(e)}")
+            return self._unreachable_message()
+
+        with self._lock:
+            self._model_checked_at = time.monotonic()
+        return None
+
+    def _payload(self, query, context, options, stream):
+        payload = {
+            'model': self.model,
+            'prompt': f"""Contexte: {context}\n\nQuestion: {query}\n\nRéponse:""",
+            'stream': stream,
+        }
+        if options:
+            payload['options'] = options
+        return payload
+
+    def _error_message(self, response):
+        error_msg = f"Erreur API Ollama: {response.status_code}"
+        try:
+            error_msg += f" - {response.json().get('error', '')}"
+        except ValueError:
+            pass
+        logger.error(error_msg)
+        if response.status_code == 404:
+            # Modèle supprimé depuis la dernière vérification
+            self.invalidate()
+        return OllamaErrorMessage(f"Erreur lors de la communication avec Ollama: {error_msg}")
+
+    def generate(self, query, context, options=None, timeout=90, check_timeout=5):
+        """Génère une réponse complète (``stream: False``) et la retourne sous forme de texte."""
+        error = self.check_model(timeout=check_timeout)
+        if error:
+            return error
+
+        try:
+            logger.info(f"Envoi de la requête à Ollama avec {len(context)} caractères de contexte")
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json=self._payload(query, context, options, stream=False),
+                timeout=timeout
+            )
+            logger.info(f"Réponse reçue de Ollama: status={response.status_code}")
+
+            if response.status_code != 200:
+                return self._error_message(response)
+            result = response.json().get('response', '')
+            logger.info(f"Réponse de l'IA obtenue ({len(result)} caractères)")
+            return result
+        except requests.exceptions.Timeout:
+            logger.error("Timeout lors de la communication avec Ollama")
+            return MESSAGE_TIMEOUT
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Erreur lors de la requête à Ollama: {str(e)}")
+            self.invalidate()
+            return OllamaErrorMessage(f"Erreur de communication avec Ollama: {str(e)}")
+
+    def stream(self, query, context, options=None, timeout=90, check_timeout=5):
+        """Génère une réponse en streaming et produit les fragments de texte au fil de l'eau."""
+        error = self.check_model(timeout=check_timeout)
+        if error:
+            yield error
+            return
+
+        try:
+            logger.info(f"Envoi de la requête en streaming à Ollama avec {len(context)} caractères de contexte")
+            with self.session.post(
+                f"{self.base_url}/api/generate",
+                json=self._payload(query, context, options, stream=True),
+                stream=True,
+                timeout=(check_timeout, timeout)  # Connexion, puis délai maximum entre deux fragments
+            ) as response:
+                if response.status_code != 200:
+                    yield self._error_message(response)
+                    return
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get('error'):
+                        logger.error(f"Erreur API Ollama: {chunk['error']}")
+                        yield OllamaErrorMessage(f"Erreur lors de la communication avec Ollama: {chunk['error']}")
+                        return
+                    if chunk.get('response'):
+                        yield chunk['response']
+                    if chunk.get('done'):
+                        return
+        except requests.exceptions.Timeout:
+            logger.error("Timeout lors de la communication avec Ollama")
+            yield MESSAGE_TIMEOUT
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Erreur lors de la requête à Ollama: {str(e)}")
+            self.invalidate()
+            yield OllamaErrorMessage(f"Erreur de communication avec Ollama: {str(e)}")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_ollama_client():
+    """Retourne le client Ollama du processus, créé au premier appel."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OllamaClient(
+                    base_url=getattr(settings, 'OLLAMA_BASE_URL', 'http://localhost:11434'),
+                    model=getattr(settings, 'OLLAMA_MODEL', 'llama2'),
+                    pool_size=getattr(settings, 'OLLAMA_POOL_SIZE', 10),
+                    tags_ttl=getattr(settings, 'OLLAMA_TAGS_CACHE_TTL', 30),
+                )
+    return _client
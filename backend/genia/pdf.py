@@ -0,0 +1,77 @@
+"""
+Lecture page par page des PDF avec PyPDF2.
+
+Ce module n'importe pas Django : ses fonctions doivent pouvoir être exécutées
+dans les processus d'un ``ProcessPoolExecutor`` (démarrés en mode ``spawn``
+pour ne pas hériter des connexions à la base de données du worker).
+"""
+import io
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from PyPDF2 import PdfReader
+
+# En dessous de ce nombre de pages, le coût de démarrage des processus dépasse le gain
+PARALLEL_MIN_PAGES = 40
+PAGES_PER_TASK = 10
+
+
+# PDF partagé par les lots d'un même processus du pool (voir _init_worker)
+_worker_pdf = None
+
+
+def _init_worker(data):
+    """Reçoit une seule fois, par processus, le contenu du PDF à traiter."""
+    global _worker_pdf
+    _worker_pdf = data
+
+
+def extract_page_range(source, start, stop):
+    """
+    Extrait le texte des pages ``start`` à ``stop - 1`` (exécuté dans un processus du pool).
+    Si ``source`` vaut None, le PDF transmis à ``_init_worker`` est utilisé.
+    """
+    reader = PdfReader(source if source is not None else io.BytesIO(_worker_pdf))
+    return [reader.pages[i].extract_text() or '' for i in range(start, stop)]
+
+
+def iter_page_texts(source, workers=None, min_parallel_pages=PARALLEL_MIN_PAGES, pages_per_task=PAGES_PER_TASK):
+    """
+    Produit les couples (numéro de page à partir de 1, texte, nombre total de pages)
+    dans l'ordre du document.
+
+    Les gros PDF sont découpés en lots de ``pages_per_task`` pages répartis sur
+    ``workers`` processus. Au plus ``2 * workers`` lots sont en cours à la fois :
+    le texte est consommé au fur et à mesure au lieu d'être accumulé en mémoire.
+    ``source`` est un chemin ou un flux binaire positionnable ; dans ce dernier
+    cas, son contenu est transmis une seule fois à chaque processus du pool.
+    """
+    reader = PdfReader(source)
+    total = len(reader.pages)
+    workers = workers or multiprocessing.cpu_count()
+
+    if total < min_parallel_pages or workers < 2:
+        for i, page in enumerate(reader.pages):
+            yield i + 1, page.extract_text() or '', total
+        return
+
+    del reader
+    if isinstance(source, str):
+        task_source, initializer, initargs = source, None, ()
+    else:
+        source.seek(0)
+        task_source, initializer, initargs = None, _init_worker, (source.read(),)
+
+    ranges = deque((start, min(start + pages_per_task, total)) for start in range(0, total, pages_per_task))
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=initializer, initargs=initargs) as executor:
+        pending = deque()
+        while ranges or pending:
+            while ranges and len(pending) < 2 * workers:
+                start, stop = ranges.popleft()
+                pending.append((start, executor.submit(extract_page_range, task_source, start, stop)))
+            start, future = pending.popleft()
+            for offset, text in enumerate(future.result()):
+                yield start + offset + 1, text, total
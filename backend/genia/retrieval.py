@@ -0,0 +1,240 @@
+"""
+Index de recherche local pour les documents GenIA.
+
+Le texte extrait d'un document est découpé en fragments (chunks) qui respectent
+les marqueurs ``[Page N]`` posés lors de l'extraction. Chaque fragment reçoit un
+vecteur obtenu par hachage de ses termes (aucun service externe), stocké en base
+dans ``DocumentChunk``. Au moment d'une question, seuls les fragments les plus
+proches de la requête sont envoyés au modèle.
+"""
+import heapq
+import logging
+import math
+import re
+import unicodedata
+import zlib
+from array import array
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 512
+
+PAGE_MARKER_RE = re.compile(r'\[Page (\d+)\]\n?')
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Mots vides trop fréquents pour aider à distinguer les fragments
+STOP_WORDS = frozenset("""
+    a au aux avec ce ces dans de des du elle en et eux il je la le les leur lui
+    ma mais me meme mes moi mon ne nos notre nous on ou par pas pour qu que qui
+    sa se ses son sur ta te tes toi ton tu un une vos votre vous c d j l n s t y
+    est sont ete etre avoir quel quelle quels quelles the of and to in is
+""".split())
+
+
+def _get_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def normalize_text(text):
+    """Met le texte en minuscules et retire les accents."""
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    """Découpe un texte en termes normalisés, sans les mots vides."""
+    return [t for t in TOKEN_RE.findall(normalize_text(text)) if t not in STOP_WORDS]
+
+
+def embed(text):
+    """
+    Calcule le vecteur normalisé d'un texte.
+
+    Les unigrammes et bigrammes sont projetés sur EMBEDDING_DIM dimensions par
+    hachage signé (crc32, stable entre processus) avec une pondération
+    sous-linéaire des fréquences.
+    """
+    tokens = tokenize(text)
+    features = tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+    counts = {}
+    for feature in features:
+        counts[feature] = counts.get(feature, 0) + 1
+
+    vector = [0.0] * EMBEDDING_DIM
+    for feature, count in counts.items():
+        h = zlib.crc32(feature.encode('utf-8'))
+        sign = 1.0 if h & 0x80000000 else -1.0
+        vector[h % EMBEDDING_DIM] += sign * (1.0 + math.log(count))
+
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm:
+        vector = [v / norm for v in vector]
+    return vector
+
+
+def vector_to_bytes(vector):
+    return array('f', vector).tobytes()
+
+
+def vector_from_bytes(data):
+    vector = array('f')
+    vector.frombytes(bytes(data))
+    return vector
+
+
+def sparse_terms(vector):
+    """Couples (dimension, valeur) non nuls : une requête n'occupe que quelques dimensions."""
+    return [(i, v) for i, v in enumerate(vector) if v]
+
+
+def sparse_score(terms, data):
+    """Produit scalaire entre ``terms`` (``sparse_terms``) et un vecteur sérialisé, sans copie."""
+    vector = memoryview(data).cast('B').cast('f')
+    return sum(v * vector[i] for i, v in terms)
+
+
+def split_pages(content_text):
+    """
+    Sépare le texte extrait selon les marqueurs ``[Page N]``.
+
+    Retourne une liste de couples (numéro de page ou None, texte).
+    """
+    parts = PAGE_MARKER_RE.split(content_text)
+    pages = []
+    if parts[0].strip():
+        pages.append((None, parts[0]))
+    for i in range(1, len(parts), 2):
+        pages.append((int(parts[i]), parts[i + 1]))
+    return pages
+
+
+def chunk_text(content_text, chunk_size=None, overlap=None):
+    """
+    Découpe le texte en fragments d'environ ``chunk_size`` caractères.
+
+    Un fragment ne chevauche jamais deux pages ; les coupures se font de
+    préférence sur un paragraphe ou une fin de phrase. Retourne une liste de
+    couples (page, texte).
+    """
+    chunk_size = chunk_size or _get_setting('GENIA_CHUNK_SIZE', 800)
+    overlap = overlap if overlap is not None else _get_setting('GENIA_CHUNK_OVERLAP', 100)
+    overlap = min(overlap, chunk_size // 2)
+
+    chunks = []
+    for page, text in split_pages(content_text):
+        text = text.strip()
+        start = 0
+        while start < len(text):
+            end = min(start + chunk_size, len(text))
+            if end < len(text):
+                # Reculer jusqu'à une coupure naturelle dans la seconde moitié du fragment
+                window = text[start + chunk_size // 2:end]
+                for separator in ('\n\n', '\n', '. ', ' '):
+                    cut = window.rfind(separator)
+                    if cut != -1:
+                        end = start + chunk_size // 2 + cut + len(separator)
+                        break
+            piece = text[start:end].strip()
+            if piece:
+                chunks.append((page, piece))
+            if end >= len(text):
+                break
+            start = max(end - overlap, start + 1)
+    return chunks
+
+
+def index_document(document):
+    """(Ré)indexe les fragments d'un document à partir de son ``content_text``."""
+    chunks = chunk_text(document.content_text or '')
+    with transaction.atomic():
+        DocumentChunk.objects.filter(document=document).delete()
+        DocumentChunk.objects.bulk_create([
+            DocumentChunk(
+                document=document,
+                position=position,
+                page=page,
+                text=text,
+                embedding=vector_to_bytes(embed(text)),
+            )
+            for position, (page, text) in enumerate(chunks)
+        ])
+    logger.info(f"Document {document.id} indexé: {len(chunks)} fragments")
+    return len(chunks)
+
+
+def ensure_indexed(documents):
+    """Indexe à la volée les documents qui possèdent un texte mais aucun fragment."""
+    indexed_ids = set(
+        DocumentChunk.objects.filter(document__in=documents)
+        .values_list('document_id', flat=True)
+        .distinct()
+    )
+    for document in documents:
+        if document.id not in indexed_ids and document.content_text and document.extraction_status != 'FAILED':
+            index_document(document)
+
+
+def retrieve(query, documents, top_k=None):
+    """
+    Retourne les ``top_k`` fragments les plus proches de la requête parmi les
+    documents donnés, sous forme de dictionnaires triés par score décroissant.
+    """
+    top_k = top_k or _get_setting('GENIA_RETRIEVAL_TOP_K', 6)
+    ensure_indexed(documents)
+
+    # Seules les dimensions non nulles de la requête comptent dans le produit scalaire
+    terms = sparse_terms(embed(query))
+    rows = DocumentChunk.objects.filter(document__in=documents).values_list(
+        'document_id', 'position', 'page', 'text', 'embedding'
+    )
+
+    scored = (
+        (sparse_score(terms, embedding), document_id, position, page, text)
+        for document_id, position, page, text, embedding in rows
+    )
+    best = heapq.nlargest(top_k, scored, key=lambda item: item[0])
+    return [
+        {'score': score, 'document_id': document_id, 'position': position, 'page': page, 'text': text}
+        for score, document_id, position, page, text in best
+    ]
+
+
+def build_context(query, documents, top_k=None, max_length=None):
+    """
+    Construit le contexte envoyé au modèle à partir des fragments pertinents.
+
+    Les fragments retenus sont regroupés par document puis remis dans l'ordre
+    du texte d'origine, précédés de leur numéro de page.
+    """
+    max_length = max_length or _get_setting('GENIA_MAX_CONTEXT_LENGTH', 10000)
+    documents = list(documents)
+    chunks = retrieve(query, documents, top_k)
+
+    by_document = {}
+    for chunk in chunks:
+        by_document.setdefault(chunk['document_id'], []).append(chunk)
+
+    context_parts = []
+    for doc in documents:
+        selected = sorted(by_document.get(doc.id, []), key=lambda c: c['position'])
+        if selected:
+            content = "\n\n".join(
+                f"[Page {c['page']}]\n{c['text']}" if c['page'] else c['text']
+                for c in selected
+            )
+        else:
+            content = 'Contenu non disponible'
+        context_parts.append(
+            f"Document: {doc.title}\nType: {doc.get_document_type_display()}\nExtraits pertinents:\n{content}"
+        )
+
+    context = "\n\n".join(context_parts)
+    if len(context) > max_length:
+        context = context[:max_length - 3] + "..."
+        logger.warning(f"Contexte tronqué: longueur > {max_length}")
+    return context
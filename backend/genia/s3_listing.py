@@ -0,0 +1,104 @@
+"""
+Listing paginé des documents du bucket S3, avec cache de courte durée.
+
+Chaque page est obtenue via le paginator ``list_objects_v2`` de boto3 ; le
+curseur renvoyé au client est le jeton de continuation opaque de botocore.
+Les pages sont gardées ``GENIA_S3_LISTING_CACHE_TTL`` secondes dans le cache
+Django. Un upload ou un import incrémente la génération du listing, ce qui
+rend toutes les pages en cache obsolètes.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from config.storage_backends import get_s3_client
+
+logger = logging.getLogger(__name__)
+
+DOCUMENTS_PREFIX = 'media/documents/'
+GENERATION_KEY = 'genia:s3_listing:generation'
+
+
+def resolve_prefix(prefix=None, folder=None):
+    """
+    Construit le préfixe S3 à lister à partir d'un sous-préfixe et/ou du
+    ``s3_prefix`` d'un dossier GenIA. Le résultat reste toujours sous
+    ``media/documents/``.
+    """
+    parts = []
+    for value in (folder.s3_prefix if folder else None, prefix):
+        if not value:
+            continue
+        value = value.lstrip('/')
+        if value.startswith(DOCUMENTS_PREFIX):
+            value = value[len(DOCUMENTS_PREFIX):]
+        if '..' in value.split('/'):
+            raise ValueError("Préfixe S3 invalide")
+        parts.append(value.strip('/'))
+    sub_prefix = '/'.join(part for part in parts if part)
+    return DOCUMENTS_PREFIX + (sub_prefix + '/' if sub_prefix else '')
+
+
+def invalidate_listing():
+    """Rend obsolètes toutes les pages de listing en cache (après un upload ou un import)."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def list_documents(prefix, cursor=None, page_size=100, s3_client=None):
+    """
+    Retourne une page de documents sous ``prefix`` :
+    ``{'results': [...], 'next_cursor': str ou None, 'prefix': prefix}``.
+    """
+    generation = cache.get_or_set(GENERATION_KEY, 0, None)
+    signature = hashlib.md5(f"{prefix}:{page_size}:{cursor or ''}".encode('utf-8')).hexdigest()
+    cache_key = f"genia:s3_listing:{generation}:{signature}"
+    page = cache.get(cache_key)
+    if page is not None:
+        return page
+
+    s3 = s3_client or get_s3_client()
+    logger.info(f"Recherche des documents dans S3 avec préfixe: {prefix}")
+    paginator = s3.get_paginator('list_objects_v2')
+    result = paginator.paginate(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Prefix=prefix,
+        PaginationConfig={'MaxItems': page_size, 'PageSize': page_size, 'StartingToken': cursor},
+    ).build_full_result()
+
+    documents = []
+    for obj in result.get('Contents', []):
+        key = obj['Key']
+        # Ignorer le dossier lui-même
+        if key.endswith('/'):
+            continue
+        documents.append({
+            'key': key,
+            'size': obj['Size'],
+            'last_modified': obj['LastModified'].isoformat(),
+            'url': f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{key}" if hasattr(settings, 'AWS_S3_CUSTOM_DOMAIN') else None
+        })
+    logger.info(f"Nombre de documents trouvés: {len(documents)}")
+
+    page = {'results': documents, 'next_cursor': result.get('NextToken'), 'prefix': prefix}
+    cache.set(cache_key, page, getattr(settings, 'GENIA_S3_LISTING_CACHE_TTL', 30))
+    return page
+
+
+def iter_keys(prefix, limit=None, s3_client=None):
+    """Parcourt toutes les clés (hors « dossiers ») sous ``prefix``, dans la limite de ``limit``."""
+    s3 = s3_client or get_s3_client()
+    paginator = s3.get_paginator('list_objects_v2')
+    pages = paginator.paginate(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Prefix=prefix,
+        PaginationConfig={'MaxItems': limit, 'PageSize': 1000},
+    )
+    for page in pages:
+        for obj in page.get('Contents', []):
+            if not obj['Key'].endswith('/'):
+                yield obj['Key']
@@ -33,9 +33,9 @@ class DocumentSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'file', 'document_type', 'document_type_display',
             'uploaded_by', 'uploaded_by_username', 'uploaded_at', 'content_text',
-            'folder', 'folder_name'
+            'folder', 'folder_name', 'extraction_status', 'extraction_progress'
         ]
-        read_only_fields = ['uploaded_by', 'uploaded_at', 'content_text']
+        read_only_fields = ['uploaded_by', 'uploaded_at', 'content_text', 'extraction_status', 'extraction_progress']
 
 
 class AIInteractionSerializer(serializers.ModelSerializer):
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .answer_cache import answer_cache
+from .models import Document
+
+
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+def invalidate_cached_answers(sender, instance, **kwargs):
+    """Libère les réponses en cache qui s'appuient sur un document modifié ou supprimé."""
+    answer_cache.invalidate_document(instance.id)
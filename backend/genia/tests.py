@@ -0,0 +1,310 @@
+from datetime import timedelta
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import mock
+
+from botocore.exceptions import ClientError
+from django.apps import apps as django_apps
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from config.testing import MockS3Mixin, UnmanagedTablesTestCase
+from user.models import User
+from .answer_cache import AnswerCache, answer_cache, normalize_query
+from .extraction import extract_document_text, open_pdf_source
+from .jobs import claim_next_job, requeue_stale_jobs, run_job
+from .models import AIInteraction, Document, DocumentChunk, ExtractionJob
+from .retrieval import (
+    chunk_text, embed, ensure_indexed, retrieve, sparse_score, sparse_terms, vector_from_bytes, vector_to_bytes,
+)
+from .views import QUERY_OPTIONS, _stream_response
+
+
+def pdf_bytes(pages):
+    """PDF minimal d'une page de texte par élément de ``pages``."""
+    count = len(pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(count)) + b"] /Count %d >>" % count,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode('latin-1') + b") Tj ET"
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+class AnswerCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = AnswerCache(max_size=16, ttl=60, similarity=0.9)
+        self.documents = [SimpleNamespace(id=1, content_version=3)]
+        self.cache.set("Le contrat est-il résiliable ?", self.documents, "Oui, avec un préavis d'un mois.")
+
+    def test_normalize_query_keeps_negation(self):
+        self.assertEqual(normalize_query("  Le CONTRAT est-il résiliable ?"), "le contrat est il resiliable")
+        self.assertEqual(normalize_query("Le contrat n'est-il pas résiliable ?"), "le contrat n est il pas resiliable")
+
+    def test_same_question_hits(self):
+        self.assertEqual(
+            self.cache.get("le contrat   est il RÉSILIABLE", self.documents),
+            "Oui, avec un préavis d'un mois.",
+        )
+
+    def test_negated_question_misses(self):
+        self.assertIsNone(self.cache.get("Le contrat n'est-il pas résiliable ?", self.documents))
+        self.assertIsNone(self.cache.get("Le contrat n'est-il jamais résiliable ?", self.documents))
+
+    def test_new_document_version_misses(self):
+        self.assertIsNone(
+            self.cache.get("Le contrat est-il résiliable ?", [SimpleNamespace(id=1, content_version=4)])
+        )
+
+    def test_generation_options_are_part_of_the_key(self):
+        options = {'temperature': 0.7, 'num_predict': 1000}
+        self.assertIsNone(self.cache.get("Le contrat est-il résiliable ?", self.documents, options))
+        self.cache.set("Le contrat est-il résiliable ?", self.documents, "Réponse longue.", options)
+        self.assertEqual(
+            self.cache.get("Le contrat est-il résiliable ?", self.documents, dict(reversed(options.items()))),
+            "Réponse longue.",
+        )
+        self.assertEqual(
+            self.cache.get("Le contrat est-il résiliable ?", self.documents), "Oui, avec un préavis d'un mois."
+        )
+
+
+class ChunkingTests(SimpleTestCase):
+    def test_chunks_never_span_two_pages(self):
+        text = "[Page 1]\n" + "Le loueur entretient le véhicule. " * 40 + "\n[Page 2]\nDépôt de garantie de 500 euros."
+        chunks = chunk_text(text, chunk_size=200, overlap=50)
+        self.assertEqual({page for page, _ in chunks}, {1, 2})
+        self.assertEqual(chunks[-1], (2, 'Dépôt de garantie de 500 euros.'))
+        self.assertTrue(all(len(piece) <= 200 for _, piece in chunks))
+
+    def test_consecutive_chunks_overlap_on_sentence_boundaries(self):
+        text = ' '.join(f"Phrase numéro {i}." for i in range(60))
+        chunks = [piece for _, piece in chunk_text(text, chunk_size=120, overlap=30)]
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(piece.endswith('.') for piece in chunks[:-1]))
+        for previous, following in zip(chunks, chunks[1:]):
+            self.assertIn(following[:10], previous)
+
+    def test_sparse_score_matches_full_dot_product(self):
+        query, chunk = embed("durée de location"), embed("La durée de location est de 36 mois.")
+        full = sum(q * c for q, c in zip(query, vector_from_bytes(vector_to_bytes(chunk))))
+        self.assertAlmostEqual(sparse_score(sparse_terms(query), vector_to_bytes(chunk)), full, places=5)
+
+
+class UsersTableTestCase(UnmanagedTablesTestCase):
+    unmanaged_models = (User,)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='gestionnaire', email='g@abd.fr', role='GESTIONNAIRE')
+        cls.document = Document.objects.create(
+            title='Contrat', file='documents/contrat.pdf', document_type='vente', uploaded_by=cls.user
+        )
+
+
+class StreamResponseTests(UsersTableTestCase):
+    def test_unexpected_error_sends_error_event_and_saves_interaction(self):
+        def stream(query, context, options=None):
+            yield 'Oui, '
+            raise ValueError('réponse illisible')
+
+        client = SimpleNamespace(stream=stream)
+        with mock.patch('genia.views.get_ollama_client', return_value=client):
+            response = _stream_response(self.user, 'Résiliable ?', 'contexte', [self.document])
+            body = b''.join(response.streaming_content).decode('utf-8')
+
+        events = [block.split('\n', 1)[0] for block in body.strip().split('\n\n')]
+        self.assertEqual(events, ['event: token', 'event: error', 'event: done'])
+        interaction = AIInteraction.objects.get()
+        self.assertTrue(interaction.response.startswith('Oui, '))
+        self.assertIn('réponse illisible', interaction.response)
+        self.assertEqual(list(interaction.documents.all()), [self.document])
+
+
+class ExtractionJobTests(UsersTableTestCase):
+    def setUp(self):
+        ExtractionJob.objects.create(document=self.document)
+        self.job = claim_next_job()
+        Document.objects.filter(pk=self.document.pk).update(extraction_status='PROCESSING', extraction_progress=40)
+
+    def test_job_with_recent_heartbeat_is_not_requeued(self):
+        # Commencée il y a longtemps, mais l'extraction avance encore
+        ExtractionJob.objects.filter(pk=self.job.pk).update(
+            started_at=timezone.now() - timedelta(hours=2), heartbeat_at=timezone.now()
+        )
+        self.assertEqual(requeue_stale_jobs(stale_after=900), 0)
+        self.assertEqual(ExtractionJob.objects.get(pk=self.job.pk).status, 'RUNNING')
+
+    def test_stale_job_is_requeued_with_its_document(self):
+        ExtractionJob.objects.filter(pk=self.job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(stale_after=900), 1)
+        self.assertEqual(ExtractionJob.objects.get(pk=self.job.pk).status, 'QUEUED')
+        document = Document.objects.get(pk=self.document.pk)
+        self.assertEqual((document.extraction_status, document.extraction_progress), ('PENDING', 0))
+
+    def test_progress_updates_heartbeat(self):
+        past = timezone.now() - timedelta(hours=1)
+        ExtractionJob.objects.filter(pk=self.job.pk).update(heartbeat_at=past)
+
+        def extract(document, progress_callback):
+            progress_callback(1, 2)
+            self.assertGreater(ExtractionJob.objects.get(pk=self.job.pk).heartbeat_at, past)
+
+        with mock.patch('genia.jobs.extract_document_text', side_effect=extract):
+            self.assertTrue(run_job(self.job))
+
+
+class ExtractActionTests(UsersTableTestCase):
+    def extract(self):
+        client = APIClient(HTTP_HOST='localhost')
+        client.force_authenticate(self.user)
+        return client.post(f'/api/genia/documents/{self.document.id}/extract/', secure=True)
+
+    def test_document_without_job_can_be_extracted(self):
+        # Statut PENDING hérité, mais aucune tâche : l'extraction doit pouvoir être lancée
+        self.assertEqual(Document.objects.get(pk=self.document.pk).extraction_status, 'PENDING')
+        response = self.extract()
+        self.assertEqual(response.status_code, 202, response.data)
+        self.assertEqual(ExtractionJob.objects.filter(document=self.document, status='QUEUED').count(), 1)
+
+    def test_migration_marks_unextracted_documents_skipped(self):
+        extracted = Document.objects.create(
+            title='Facture', file='documents/facture.pdf', document_type='vente', uploaded_by=self.user,
+            content_text='Montant: 100 €'
+        )
+        migration = import_module('genia.migrations.0004_extraction_jobs')
+        migration.mark_existing_documents(django_apps, None)
+        self.assertEqual(Document.objects.get(pk=extracted.pk).extraction_status, 'DONE')
+        self.assertEqual(Document.objects.get(pk=self.document.pk).extraction_status, 'SKIPPED')
+        self.assertEqual(self.extract().status_code, 202)
+
+    def test_queued_job_conflicts(self):
+        ExtractionJob.objects.create(document=self.document)
+        self.assertEqual(self.extract().status_code, 409)
+        self.assertEqual(ExtractionJob.objects.filter(document=self.document).count(), 1)
+
+
+class BulkImportTests(UsersTableTestCase):
+    def test_results_are_reported_per_item(self):
+        Document.objects.filter(pk=self.document.pk).update(s3_key='documents/contrat.pdf')
+        client = APIClient(HTTP_HOST='localhost')
+        client.force_authenticate(self.user)
+        keys = [1, ['documents/a.pdf'], '', 'documents/a.pdf', 'documents/a.pdf', 'documents/contrat.pdf']
+        response = client.post(
+            '/api/genia/documents/bulk_import_from_s3/', {'keys': keys}, format='json', secure=True
+        )
+        self.assertEqual(response.status_code, 202, response.data)
+        results = response.data['results']
+        self.assertEqual([item['index'] for item in results], list(range(len(keys))))
+        self.assertEqual(
+            [item['status'] for item in results], ['error', 'error', 'error', 'created', 'error', 'skipped']
+        )
+        self.assertEqual(results[1]['key'], ['documents/a.pdf'])
+        self.assertEqual(results[4]['error'], 'Clé en double dans la demande')
+        self.assertEqual(response.data['summary'], {'created': 1, 'skipped': 1, 'error': 4})
+
+
+class RetrievalTests(UsersTableTestCase):
+    def create_document(self, title, content_text, extraction_status='DONE'):
+        return Document.objects.create(
+            title=title, file=f'documents/{title}.pdf', document_type='location', uploaded_by=self.user,
+            content_text=content_text, extraction_status=extraction_status,
+        )
+
+    def test_ensure_indexed_skips_indexed_empty_and_failed_documents(self):
+        indexed = self.create_document('indexe', "[Page 1]\nTexte déjà indexé.")
+        DocumentChunk.objects.create(document=indexed, position=0, page=1, text='ancien', embedding=b'')
+        pending = self.create_document('nouveau', "[Page 1]\nKilométrage illimité.")
+        failed = self.create_document('echec', "[Page 1]\nTexte partiel.", extraction_status='FAILED')
+        empty = self.create_document('vide', '')
+
+        ensure_indexed([indexed, pending, failed, empty])
+        self.assertEqual(list(indexed.chunks.values_list('text', flat=True)), ['ancien'])
+        self.assertEqual(list(pending.chunks.values_list('page', 'text')), [(1, 'Kilométrage illimité.')])
+        self.assertFalse(failed.chunks.exists())
+        self.assertFalse(empty.chunks.exists())
+
+    def test_retrieve_returns_top_k_by_score(self):
+        contract = self.create_document('contrat', (
+            "[Page 1]\nLe véhicule est assuré tous risques par le loueur.\n"
+            "[Page 2]\nLe dépôt de garantie est fixé à 500 euros.\n"
+            "[Page 3]\nLe kilométrage annuel est limité à 15000 km."
+        ))
+        other = self.create_document('facture', "[Page 1]\nFacture d'entretien du véhicule.")
+
+        chunks = retrieve("Quel est le montant du dépôt de garantie ?", [contract, other], top_k=2)
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual((chunks[0]['document_id'], chunks[0]['page']), (contract.id, 2))
+        self.assertGreaterEqual(chunks[0]['score'], chunks[1]['score'])
+        self.assertEqual(len(retrieve("garantie", [contract, other], top_k=10)), 4)
+
+
+class S3ExtractionTests(MockS3Mixin, UsersTableTestCase):
+    @override_settings(GENIA_PDF_SPOOL_MAX_SIZE=256)
+    def test_pdf_is_streamed_from_s3_by_chunks(self):
+        self.s3.put_object(Bucket=self.bucket, Key=self.document.file.name, Body=pdf_bytes(
+            ["Conditions generales", "Depot de garantie de 500 euros"]
+        ))
+        # Blocs plus petits que le fichier, qui dépasse la taille gardée en mémoire
+        with mock.patch('genia.extraction.STREAM_CHUNK_SIZE', 64):
+            extract_document_text(self.document)
+        self.document.refresh_from_db()
+        self.assertIn("[Page 2]\nDepot de garantie de 500 euros", self.document.content_text)
+        self.assertTrue(self.document.chunks.exists())
+
+    def test_s3_error_is_chained(self):
+        with self.assertRaises(FileNotFoundError) as raised:
+            with open_pdf_source(self.document):
+                pass
+        self.assertIsInstance(raised.exception.__cause__, ClientError)
+        self.assertIn('NoSuchKey', str(raised.exception))
+
+
+class CachedAnswerViewTests(UsersTableTestCase):
+    def setUp(self):
+        answer_cache.clear()
+        self.addCleanup(answer_cache.clear)
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.user)
+        self.payload = {'query': 'Le contrat est-il résiliable ?', 'document_ids': [self.document.id]}
+
+    def test_cache_hit_is_recorded_as_an_interaction(self):
+        answer_cache.set(self.payload['query'], [self.document], 'Oui.', QUERY_OPTIONS)
+        response = self.client.post('/api/genia/query/', self.payload, format='json', secure=True)
+        self.assertEqual((response.status_code, response.data['cached']), (200, True))
+        interaction = AIInteraction.objects.get()
+        self.assertEqual(
+            (interaction.user, interaction.query, interaction.response), (self.user, self.payload['query'], 'Oui.')
+        )
+        self.assertEqual(list(interaction.documents.all()), [self.document])
+
+        response = self.client.post('/api/genia/query/', {**self.payload, 'stream': True}, format='json', secure=True)
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn(f'"interaction_id": {AIInteraction.objects.latest("id").id}', body)
+        self.assertEqual(AIInteraction.objects.count(), 2)
+
+    def test_answers_with_other_options_are_not_shared(self):
+        answer_cache.set(self.payload['query'], [self.document], 'Réponse de /query/.', QUERY_OPTIONS)
+        with mock.patch('genia.views.get_ollama_client') as client:
+            client.return_value.generate.return_value = 'Réponse de ask.'
+            response = self.client.post('/api/genia/interactions/ask/', self.payload, format='json', secure=True)
+        self.assertEqual(response.data['response'], 'Réponse de ask.')
+        self.assertEqual(client.return_value.generate.call_args.kwargs.get('options'), None)
+        self.assertEqual(answer_cache.get(self.payload['query'], [self.document]), 'Réponse de ask.')
@@ -12,4 +12,7 @@ urlpatterns = [
     path('query/', QueryView.as_view(), name='query'),
     path('documents/list_s3_documents/', DocumentViewSet.as_view({'get': 'list_s3_documents'}), name='list_s3_documents'),
     path('documents/import_from_s3/', DocumentViewSet.as_view({'post': 'import_from_s3'}), name='import_from_s3'),
+    path('documents/bulk_import_from_s3/', DocumentViewSet.as_view({'post': 'bulk_import_from_s3'}), name='bulk_import_from_s3'),
+    path('documents/upload_url/', DocumentViewSet.as_view({'post': 'upload_url'}), name='document_upload_url'),
+    path('documents/complete_upload/', DocumentViewSet.as_view({'post': 'complete_upload'}), name='document_complete_upload'),
 ] 
\ No newline at end of file
@@ -1,18 +1,128 @@
-import os
-import boto3
-import tempfile
-import subprocess
+import json
 import logging
 from rest_framework import viewsets, status, views
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from rest_framework.parsers import JSONParser
+from config.s3_uploads import UploadError, finish_upload, read_token, s3_key, start_upload
 from .models import Document, AIInteraction, Folder
 from .serializers import DocumentSerializer, AIInteractionSerializer, FolderSerializer
+from .retrieval import build_context
+from .jobs import enqueue_extraction, enqueue_extractions, extraction_in_progress
+from .ollama import OllamaErrorMessage, get_ollama_client
+from .answer_cache import answer_cache
+from .s3_listing import invalidate_listing, iter_keys, list_documents, resolve_prefix
 
 logger = logging.getLogger(__name__)
 
+# Types acceptés pour l'upload direct des documents (le texte n'est extrait que des PDF)
+DOCUMENT_UPLOAD_CONTENT_TYPES = ('application/pdf',)
+
+# Options de génération de QueryView (``ask`` utilise les valeurs par défaut d'Ollama)
+QUERY_OPTIONS = {
+    'temperature': 0.7,
+    'num_predict': 1000,  # Limite la longueur de la réponse
+}
+
+
+def _wants_stream(request):
+    """Le client demande-t-il une réponse en streaming (``stream`` dans le corps ou l'URL) ?"""
+    value = request.data.get('stream', request.query_params.get('stream', False))
+    return str(value).lower() in ['1', 'true', 'yes']
+
+
+def _cached_stream_response(query, response, documents, interaction_id):
+    """Renvoie une réponse déjà en cache sous la forme d'un flux SSE (un seul évènement ``token``)."""
+    def generate():
+        yield f"event: token\ndata: {json.dumps({'token': response}, ensure_ascii=False)}\n\n"
+        done = {
+            'interaction_id': interaction_id,
+            'cached': True,
+            'documents': DocumentSerializer(documents, many=True).data,
+        }
+        yield f"event: done\ndata: {json.dumps(done, ensure_ascii=False)}\n\n"
+
+    streaming_response = StreamingHttpResponse(generate(), content_type='text/event-stream')
+    streaming_response['Cache-Control'] = 'no-cache'
+    return streaming_response
+
+
+def _cached_answer(request, query, documents, options=None):
+    """
+    Retourne la réponse HTTP à renvoyer si la question est déjà dans le cache
+    (mêmes documents et mêmes options de génération), sinon None. L'interaction
+    est enregistrée comme pour une réponse générée : l'historique reste complet.
+    """
+    response = answer_cache.get(query, documents, options)
+    if response is None:
+        return None
+    logger.info(f"Réponse servie depuis le cache pour l'utilisateur {request.user.id}: {query}")
+    interaction = AIInteraction.objects.create(user=request.user, query=query, response=response)
+    interaction.documents.set(documents)
+    if _wants_stream(request):
+        return _cached_stream_response(query, response, documents, interaction.id)
+    return Response({
+        'query': query,
+        'response': response,
+        'documents': DocumentSerializer(documents, many=True).data,
+        'cached': True
+    })
+
+
+def _stream_response(user, query, context, documents, options=None):
+    """
+    Relaie les tokens d'Ollama au client en Server-Sent Events.
+
+    Chaque fragment est envoyé dans un évènement ``token`` ; l'interaction est
+    enregistrée une fois la génération terminée, puis un évènement ``done``
+    transmet son identifiant et la liste des documents utilisés. Une erreur
+    pendant la génération (l'en-tête HTTP étant déjà parti) est signalée par un
+    évènement ``error`` ; la réponse partielle est tout de même enregistrée.
+    """
+    def event(name, data):
+        return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    def generate():
+        parts = []
+        failed = False
+        try:
+            for token in get_ollama_client().stream(query, context, options):
+                failed = failed or isinstance(token, OllamaErrorMessage)
+                parts.append(token)
+                yield event('token', {'token': token})
+        except Exception as e:
+            logger.error(f"Erreur lors de la génération en streaming: {str(e)}")
+            failed = True
+            message = f"Erreur lors de la communication avec l'IA: {str(e)}"
+            parts.append(message)
+            yield event('error', {'error': message})
+
+        response = ''.join(parts)
+        logger.info(f"Réponse de l'IA obtenue en streaming ({len(response)} caractères)")
+        try:
+            if not failed:
+                answer_cache.set(query, documents, response, options)
+            interaction = AIInteraction.objects.create(user=user, query=query, response=response)
+            interaction.documents.set(documents)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'enregistrement de l'interaction: {str(e)}")
+            yield event('error', {'error': f"Erreur lors de l'enregistrement de l'interaction: {str(e)}"})
+            return
+        yield event('done', {
+            'interaction_id': interaction.id,
+            'documents': DocumentSerializer(documents, many=True).data,
+        })
+
+    streaming_response = StreamingHttpResponse(generate(), content_type='text/event-stream')
+    streaming_response['Cache-Control'] = 'no-cache'
+    streaming_response['X-Accel-Buffering'] = 'no'  # Désactiver la mise en tampon de NGINX
+    return streaming_response
+
+
 class FolderViewSet(viewsets.ModelViewSet):
     """API endpoint pour gérer les dossiers."""
     
@@ -63,31 +173,30 @@ class QueryView(views.APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Limiter la taille du contexte pour éviter les surcharges
-        max_context_length = 10000
-        
-        # Préparer le contexte pour l'IA avec le contenu des documents
-        context_parts = []
-        for doc in documents:
-            content = doc.content_text or 'Contenu non disponible'
-            # Tronquer le contenu si nécessaire
-            if len(content) > 2000:  # Limiter la taille par document
-                content = content[:1997] + "..."
-            context_parts.append(
-                f"Document: {doc.title}\nType: {doc.get_document_type_display()}\nContenu:\n{content}"
-            )
-        
-        context = "\n\n".join(context_parts)
+        # Question déjà posée sur les mêmes documents : pas de nouvelle génération
+        cached = _cached_answer(request, query, documents, QUERY_OPTIONS)
+        if cached is not None:
+            return cached
         
-        # Limiter la taille totale du contexte
-        if len(context) > max_context_length:
-            context = context[:max_context_length - 3] + "..."
-            logger.warning(f"Contexte tronqué pour l'utilisateur {request.user.id}: longueur > {max_context_length}")
-        
-        # Appel à Ollama (en local)
         try:
+            # Ne garder que les passages des documents les plus proches de la question
+            context = build_context(query, documents)
+            
+            # Mode streaming : relayer les tokens au fur et à mesure de leur génération
+            if _wants_stream(request):
+                logger.info(f"Requête IA en streaming de l'utilisateur {request.user.id}: {query} (contexte: {len(context)} caractères)")
+                return _stream_response(request.user, query, context, documents, options=QUERY_OPTIONS)
+            
+            # Appel à Ollama (en local)
             logger.info(f"Requête IA de l'utilisateur {request.user.id}: {query} (contexte: {len(context)} caractères)")
-            response = self._query_ollama(query, context)
+            response = get_ollama_client().generate(
+                query, context,
+                options=QUERY_OPTIONS,
+                timeout=90  # Timeout élevé pour les documents longs
+            )
+            
+            if not isinstance(response, OllamaErrorMessage):
+                answer_cache.set(query, documents, response, QUERY_OPTIONS)
             
             # Sauvegarder l'interaction
             interaction = AIInteraction.objects.create(
@@ -108,78 +217,6 @@ class QueryView(views.APIView):
                 {'error': f'Erreur lors de la communication avec l\'IA: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    
-    def _query_ollama(self, query, context):
-        """Interroger Ollama en local."""
-        try:
-            import requests
-            logger.debug(f"Tentative de communication avec Ollama sur http://localhost:11434/api/generate")
-            
-            # Vérifier si Ollama est accessible
-            try:
-                health_check = requests.get('http://localhost:11434/api/tags', timeout=5)
-                if health_check.status_code != 200:
-                    logger.error(f"Ollama n'est pas accessible (status code: {health_check.status_code})")
-                    return "Le service Ollama n'est pas disponible actuellement. Veuillez vérifier que Ollama est installé et en cours d'exécution sur votre serveur."
-                
-                # Vérifier si le modèle llama2 est disponible
-                models = health_check.json().get('models', [])
-                llama2_available = any(model.get('name', '').startswith('llama2') for model in models)
-                if not llama2_available:
-                    logger.error("Le modèle llama2 n'est pas disponible dans Ollama")
-                    return "Le modèle llama2 n'est pas disponible. Veuillez l'installer avec la commande 'ollama pull llama2'."
-                    
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Impossible de se connecter à Ollama: {str(e)}")
-                return "Impossible de se connecter au service Ollama. Veuillez vérifier que Ollama est installé et en cours d'exécution sur votre serveur (http://localhost:11434)."
-                
-            # Tenter d'envoyer la requête à Ollama
-            try:
-                logger.info(f"Envoi de la requête à Ollama avec {len(context)} caractères de contexte")
-                response = requests.post(
-                    'http://localhost:11434/api/generate',
-                    json={
-                        'model': 'llama2',
-                        'prompt': f"""Contexte: {context}\n\nQuestion: {query}\n\nRéponse:""",
-                        'stream': False,
-                        'options': {
-                            'temperature': 0.7,
-                            'num_predict': 1000  # Limite la longueur de la réponse
-                        }
-                    },
-                    timeout=90  # Augmenter le timeout pour les documents longs
-                )
-                
-                logger.info(f"Réponse reçue de Ollama: status={response.status_code}")
-                
-                if response.status_code == 200:
-                    result = response.json().get('response', '')
-                    logger.info(f"Réponse de l'IA obtenue ({len(result)} caractères)")
-                    return result
-                else:
-                    error_msg = f"Erreur API Ollama: {response.status_code}"
-                    if hasattr(response, 'json'):
-                        try:
-                            error_details = response.json()
-                            error_msg += f" - {error_details.get('error', '')}"
-                        except:
-                            pass
-                    logger.error(error_msg)
-                    return f"Erreur lors de la communication avec Ollama: {error_msg}"
-            except requests.exceptions.Timeout:
-                logger.error("Timeout lors de la communication avec Ollama")
-                return "Le temps de réponse d'Ollama a été dépassé. Le contexte est peut-être trop volumineux ou le modèle est occupé."
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Erreur lors de la requête à Ollama: {str(e)}")
-                return f"Erreur de communication avec Ollama: {str(e)}"
-                
-        except ImportError:
-            # Fallback si requests n'est pas disponible
-            logger.error("Module 'requests' non disponible")
-            return "Je suis désolé, je ne peux pas répondre à cette question pour le moment. Le module 'requests' n'est pas disponible sur le serveur."
-        except Exception as e:
-            logger.error(f"Erreur inattendue lors de la communication avec Ollama: {str(e)}")
-            return f"Une erreur inattendue s'est produite lors de la communication avec Ollama: {str(e)}"
 
 
 class DocumentViewSet(viewsets.ModelViewSet):
@@ -200,104 +237,141 @@ class DocumentViewSet(viewsets.ModelViewSet):
         try:
             logger.info(f"Tentative de création d'un document par l'utilisateur {self.request.user.id}")
             document = serializer.save(uploaded_by=self.request.user)
+            invalidate_listing()
             logger.info(f"Document créé avec succès: {document.id} - {document.title}")
             
-            # Si S3 est configuré, extraire le texte et stocker la clé S3
+            # Si S3 est configuré, mettre l'extraction du texte en file d'attente
             if settings.USE_S3 and document.file:
                 logger.info(f"Traitement S3 pour le document: {document.id}")
-                # Extraction du texte du PDF
-                self._extract_text_from_pdf(document)
+                enqueue_extraction(document)
             else:
+                # Aucune tâche créée : le document ne doit pas rester « en attente »
+                Document.objects.filter(pk=document.pk).update(extraction_status='SKIPPED', extraction_progress=0)
+                document.extraction_status = 'SKIPPED'
                 logger.debug(f"Pas d'extraction de texte: USE_S3={settings.USE_S3}, file={bool(document.file)}")
         except Exception as e:
             logger.error(f"Exception lors de la création du document: {str(e)}")
             raise
     
-    def _extract_text_from_pdf(self, document):
-        """Extraire le texte d'un document PDF."""
-        if document.file and (document.file.name.endswith('.pdf') or (document.s3_key and document.s3_key.endswith('.pdf'))):
-            try:
-                file_key = document.s3_key or document.file.name
-                logger.info(f"Traitement du document PDF: {document.id} - {document.title}, fichier: {file_key}")
-                
-                # Télécharger le fichier depuis S3
-                temp_path = None
-                if hasattr(settings, 'AWS_STORAGE_BUCKET_NAME') and settings.AWS_STORAGE_BUCKET_NAME:
-                    try:
-                        logger.info(f"Tentative de téléchargement depuis S3: bucket={settings.AWS_STORAGE_BUCKET_NAME}, fichier={file_key}")
-                        # Configuration du client S3
-                        s3 = boto3.client(
-                            's3',
-                            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                            region_name=settings.AWS_S3_REGION_NAME
-                        )
-                        
-                        # Créer un fichier temporaire pour stocker le contenu du fichier S3
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                            temp_path = temp_file.name
-                            # Utiliser la clé telle quelle, car elle doit déjà contenir le préfixe complet
-                            s3_key = file_key
-                            logger.info(f"Téléchargement depuis S3: {s3_key} -> {temp_path}")
-                            
-                            # Télécharger le fichier
-                            s3.download_file(
-                                settings.AWS_STORAGE_BUCKET_NAME,
-                                s3_key,
-                                temp_path
-                            )
-                            logger.info(f"Fichier téléchargé avec succès: {temp_path}")
-                    except Exception as e:
-                        logger.error(f"Erreur lors du téléchargement depuis S3: {str(e)}")
-                        # Fallback: Essayez d'utiliser le chemin local du fichier
-                        if hasattr(document.file, 'path'):
-                            temp_path = document.file.path
-                            logger.info(f"Utilisation du chemin local: {temp_path}")
-                        else:
-                            logger.error("Impossible d'accéder au fichier PDF. Abandon de l'extraction de texte.")
-                            return
-                else:
-                    # Utiliser le chemin local du fichier
-                    if hasattr(document.file, 'path'):
-                        temp_path = document.file.path
-                        logger.info(f"Utilisation du chemin local: {temp_path}")
-                    else:
-                        logger.error("Impossible d'accéder au fichier PDF. Abandon de l'extraction de texte.")
-                        return
-                
-                # Utiliser PyPDF2 pour extraire le texte
-                try:
-                    logger.info(f"Extraction du texte avec PyPDF2: {temp_path}")
-                    from PyPDF2 import PdfReader
-                    reader = PdfReader(temp_path)
-                    text = ""
-                    for i, page in enumerate(reader.pages):
-                        page_text = page.extract_text()
-                        text += f"[Page {i+1}]\n{page_text}\n\n"
-                    document.content_text = text
-                    logger.info(f"Texte extrait: {len(text)} caractères")
-                    document.save()
-                    logger.info(f"Document sauvegardé avec succès")
-                except Exception as e2:
-                    logger.error(f"Erreur avec PyPDF2: {str(e2)}")
-                    document.content_text = "Échec de l'extraction du texte. Veuillez réessayer plus tard."
-                    document.save()
-                
-                # Nettoyer les fichiers temporaires si nécessaire
-                if temp_path and hasattr(settings, 'AWS_STORAGE_BUCKET_NAME') and settings.AWS_STORAGE_BUCKET_NAME:
-                    try:
-                        os.unlink(temp_path)
-                        logger.info(f"Fichier temporaire supprimé: {temp_path}")
-                    except Exception as e:
-                        logger.error(f"Erreur lors de la suppression du fichier temporaire: {str(e)}")
-            except Exception as e:
-                logger.error(f"Erreur générale lors de l'extraction du texte: {str(e)}")
-                document.content_text = "Échec de l'extraction du texte. Veuillez réessayer plus tard."
-                document.save()
+    @action(detail=True, methods=['get'])
+    def extraction_status(self, request, pk=None):
+        """Retourne l'état d'avancement de l'extraction du texte d'un document."""
+        document = self.get_object()
+        last_job = document.extraction_jobs.order_by('-created_at').first()
+        return Response({
+            'id': document.id,
+            'extraction_status': document.extraction_status,
+            'extraction_progress': document.extraction_progress,
+            'attempts': last_job.attempts if last_job else 0,
+            'error': last_job.error if last_job else None,
+        })
+    
+    @action(detail=True, methods=['post'])
+    def extract(self, request, pk=None):
+        """Relance l'extraction du texte d'un document."""
+        document = self.get_object()
+        if extraction_in_progress(document):
+            return Response(
+                {'error': 'Une extraction est déjà en cours pour ce document'},
+                status=status.HTTP_409_CONFLICT
+            )
+        enqueue_extraction(document)
+        return Response(DocumentSerializer(document).data, status=status.HTTP_202_ACCEPTED)
 
+    def _genia_folder(self, folder_id):
+        """Dossier GenIA accessible à l'utilisateur, ou None s'il n'existe pas."""
+        folders = Folder.objects.all()
+        if self.request.user.role not in ['GESTIONNAIRE', 'ADMIN']:
+            folders = folders.filter(created_by=self.request.user)
+        return folders.filter(id=folder_id).first()
+    
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser])
+    def upload_url(self, request):
+        """
+        Prépare l'envoi direct d'un document vers S3 (voir config/s3_uploads.py).
+        
+        Corps : ``filename``, ``content_type``, ``size`` (octets), ``title``
+        (nom du fichier par défaut), ``document_type`` et ``folder`` optionnel.
+        Le client dépose ensuite le fichier avec le formulaire ou les URL
+        retournés, puis appelle ``complete_upload`` avec ``upload_token``.
+        """
+        document_type = request.data.get('document_type', 'location')  # Par défaut: location
+        if document_type not in dict(Document.TYPE_CHOICES):
+            return Response({'error': 'Type de document invalide'}, status=status.HTTP_400_BAD_REQUEST)
+        folder_id = request.data.get('folder')
+        if folder_id and self._genia_folder(folder_id) is None:
+            return Response({'error': 'Dossier introuvable'}, status=status.HTTP_404_NOT_FOUND)
+        filename = request.data.get('filename')
+        try:
+            upload = start_upload(
+                filename,
+                request.data.get('content_type'),
+                request.data.get('size'),
+                metadata={
+                    'kind': 'document',
+                    'user': request.user.id,
+                    'title': request.data.get('title') or str(filename or '').split('/')[-1],
+                    'document_type': document_type,
+                    'folder': folder_id or None,
+                },
+                content_types=DOCUMENT_UPLOAD_CONTENT_TYPES,
+            )
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Erreur lors de la préparation de l'upload S3: {str(e)}")
+            return Response(
+                {'error': f'Erreur lors de la préparation de l\'upload S3: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        logger.info(f"Upload direct préparé par l'utilisateur {request.user.id}: {upload['key']} ({upload['method']})")
+        return Response(upload, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser])
+    def complete_upload(self, request):
+        """
+        Crée le document après un envoi direct vers S3 et met son extraction
+        en file d'attente.
+        
+        Corps : ``upload_token`` et, pour un upload multipart, ``parts``
+        (``[{"part_number": 1, "etag": "..."}]``).
+        """
+        try:
+            upload = read_token(request.data.get('upload_token'))
+            metadata = upload['metadata']
+            if metadata.get('kind') != 'document' or metadata.get('user') != request.user.id:
+                raise UploadError("Jeton d'upload invalide")
+            existing = Document.objects.filter(s3_key=s3_key(upload['name'])).first()
+            if existing is not None:
+                return Response(DocumentSerializer(existing).data)
+            name = finish_upload(upload, request.data.get('parts'))
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        with transaction.atomic():
+            document = Document.objects.create(
+                title=metadata['title'][:255],
+                document_type=metadata['document_type'],
+                file=name,
+                s3_key=s3_key(name),
+                uploaded_by=request.user,
+                folder=self._genia_folder(metadata['folder']) if metadata['folder'] else None
+            )
+            enqueue_extraction(document)
+        invalidate_listing()
+        logger.info(f"Document créé après upload direct: {document.id} - {document.title}")
+        return Response(DocumentSerializer(document).data, status=status.HTTP_201_CREATED)
+    
     @action(detail=False, methods=['get'])
     def list_s3_documents(self, request):
-        """Liste les documents disponibles dans le bucket S3."""
+        """
+        Liste les documents disponibles dans le bucket S3, page par page.
+        
+        Paramètres : ``cursor`` (curseur de la page suivante), ``page_size``
+        (100 par défaut, 1000 au maximum), ``prefix`` (sous-dossier de
+        media/documents/) et ``folder`` (id d'un dossier GenIA dont le
+        ``s3_prefix`` est utilisé).
+        """
         try:
             if not hasattr(settings, 'AWS_STORAGE_BUCKET_NAME') or not settings.AWS_STORAGE_BUCKET_NAME:
                 return Response(
@@ -305,45 +379,28 @@ class DocumentViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
                 
-            # Configuration du client S3
-            s3 = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_S3_REGION_NAME
-            )
-            
-            # Préfixe pour la recherche dans S3
-            prefix = 'media/documents/'
-            logger.info(f"Recherche des documents dans S3 avec préfixe: {prefix}")
-            
-            # Lister les objets dans le dossier media/documents/
-            response = s3.list_objects_v2(
-                Bucket=settings.AWS_STORAGE_BUCKET_NAME,
-                Prefix=prefix
-            )
-            
-            # Formater la réponse
-            documents = []
-            if 'Contents' in response:
-                for obj in response['Contents']:
-                    key = obj['Key']
-                    # Ignorer le dossier lui-même
-                    if key == prefix:
-                        continue
-                        
-                    documents.append({
-                        'key': key,
-                        'size': obj['Size'],
-                        'last_modified': obj['LastModified'].isoformat(),
-                        'url': f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{key}" if hasattr(settings, 'AWS_S3_CUSTOM_DOMAIN') else None
-                    })
-                
-                logger.info(f"Nombre de documents trouvés: {len(documents)}")
-            else:
-                logger.info("Aucun document trouvé dans le bucket S3")
+            # Filtre par préfixe : sous-dossier explicite et/ou préfixe d'un dossier GenIA
+            folder = None
+            folder_id = request.query_params.get('folder')
+            if folder_id:
+                folders = Folder.objects.all()
+                if request.user.role not in ['GESTIONNAIRE', 'ADMIN']:
+                    folders = folders.filter(created_by=request.user)
+                folder = folders.filter(id=folder_id).first()
+                if folder is None:
+                    return Response(
+                        {'error': 'Dossier introuvable'},
+                        status=status.HTTP_404_NOT_FOUND
+                    )
+            try:
+                prefix = resolve_prefix(request.query_params.get('prefix'), folder)
+                page_size = min(int(request.query_params.get('page_size', 100)), 1000)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
-            return Response(documents)
+            # Une page à la fois, via le curseur de continuation S3
+            page = list_documents(prefix, cursor=request.query_params.get('cursor'), page_size=max(page_size, 1))
+            return Response(page)
         except Exception as e:
             logger.error(f"Erreur lors de la liste des documents S3: {str(e)}")
             return Response(
@@ -381,16 +438,127 @@ class DocumentViewSet(viewsets.ModelViewSet):
                 uploaded_by=request.user
             )
             
-            # Extraire le texte du document
-            self._extract_text_from_pdf(document)
+            # Mettre l'extraction du texte en file d'attente
+            enqueue_extraction(document)
+            invalidate_listing()
             
-            return Response(DocumentSerializer(document).data)
+            return Response(DocumentSerializer(document).data, status=status.HTTP_202_ACCEPTED)
         except Exception as e:
             logger.error(f"Erreur lors de l'importation depuis S3: {str(e)}")
             return Response(
                 {'error': f'Erreur lors de l\'importation depuis S3: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    @action(detail=False, methods=['post'])
+    def bulk_import_from_s3(self, request):
+        """
+        Importe en une fois de nombreux documents depuis S3.
+        
+        Corps : ``keys`` (liste de clés) ou ``prefix`` (toutes les clés sous
+        media/documents/<prefix>), ``document_type`` et ``folder`` optionnels.
+        Les clés déjà importées (même ``s3_key``) sont ignorées ; les extractions
+        sont mises en file d'attente et traitées par le worker. La réponse
+        détaille le résultat de chaque élément de ``keys``, repéré par son indice.
+        """
+        keys = request.data.get('keys')
+        prefix = request.data.get('prefix')
+        document_type = request.data.get('document_type', 'location')  # Par défaut: location
+        folder_id = request.data.get('folder')
+        max_keys = getattr(settings, 'GENIA_BULK_IMPORT_MAX_KEYS', 10000)
+        
+        if document_type not in dict(Document.TYPE_CHOICES):
+            return Response({'error': 'Type de document invalide'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        folder = None
+        if folder_id:
+            folders = Folder.objects.all()
+            if request.user.role not in ['GESTIONNAIRE', 'ADMIN']:
+                folders = folders.filter(created_by=request.user)
+            folder = folders.filter(id=folder_id).first()
+            if folder is None:
+                return Response({'error': 'Dossier introuvable'}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            if keys is None and prefix is not None:
+                keys = list(iter_keys(resolve_prefix(prefix), limit=max_keys + 1))
+            if not isinstance(keys, list) or not keys:
+                return Response(
+                    {'error': 'Aucune clé S3 fournie (keys ou prefix)'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if len(keys) > max_keys:
+                return Response(
+                    {'error': f'Trop de clés: {max_keys} au maximum par import'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            logger.info(f"Import en masse depuis S3 de {len(keys)} clé(s) par l'utilisateur {request.user.id}")
+            
+            # Un résultat par élément de la demande, dans l'ordre (repéré par son indice)
+            results = [None] * len(keys)
+            first_index = {}  # clé valide -> indice de sa première occurrence
+            for index, key in enumerate(keys):
+                if not isinstance(key, str) or not key.strip():
+                    results[index] = {'index': index, 'key': key, 'status': 'error', 'error': 'Clé S3 invalide'}
+                elif key in first_index:
+                    results[index] = {
+                        'index': index, 'key': key, 'status': 'error', 'error': 'Clé en double dans la demande'
+                    }
+                else:
+                    first_index[key] = index
+            candidates = list(first_index)
+            
+            # Écarter les clés déjà importées en une seule requête
+            existing = dict(
+                Document.objects.filter(s3_key__in=candidates).values_list('s3_key', 'id')
+            )
+            for key in candidates:
+                if key in existing:
+                    results[first_index[key]] = {
+                        'index': first_index[key], 'key': key, 'status': 'skipped', 'document_id': existing[key]
+                    }
+            
+            new_keys = [key for key in candidates if key not in existing]
+            with transaction.atomic():
+                documents = Document.objects.bulk_create([
+                    Document(
+                        title=key.split('/')[-1],
+                        document_type=document_type,
+                        file=key,  # Stocker la clé S3 comme chemin du fichier
+                        s3_key=key,
+                        uploaded_by=request.user,
+                        folder=folder
+                    )
+                    for key in new_keys
+                ])
+                jobs = enqueue_extractions(documents)
+            invalidate_listing()
+            
+            for document in documents:
+                job = jobs.get(document.id)
+                index = first_index[document.s3_key]
+                results[index] = {
+                    'index': index,
+                    'key': document.s3_key,
+                    'status': 'created',
+                    'document_id': document.id,
+                    'job_id': job.id if job else None,
+                }
+            
+            summary = {
+                name: sum(1 for item in results if item['status'] == name)
+                for name in ['created', 'skipped', 'error']
+            }
+            return Response({'summary': summary, 'results': results}, status=status.HTTP_202_ACCEPTED)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'import en masse depuis S3: {str(e)}")
+            return Response(
+                {'error': f'Erreur lors de l\'import en masse depuis S3: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
 
 
 class AIInteractionViewSet(viewsets.ModelViewSet):
@@ -422,15 +590,24 @@ class AIInteractionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Préparer le contexte pour l'IA avec le contenu des documents
-        context = "\n\n".join([
-            f"Document: {doc.title}\nType: {doc.get_document_type_display()}\nContenu:\n{doc.content_text or 'Contenu non disponible'}"
-            for doc in documents
-        ])
+        # Question déjà posée sur les mêmes documents : pas de nouvelle génération
+        cached = _cached_answer(request, query, documents)
+        if cached is not None:
+            return cached
         
-        # Appel à Ollama (en local)
         try:
-            response = self._query_ollama(query, context)
+            # Ne garder que les passages des documents les plus proches de la question
+            context = build_context(query, documents)
+            
+            # Mode streaming : relayer les tokens au fur et à mesure de leur génération
+            if _wants_stream(request):
+                return _stream_response(request.user, query, context, documents)
+            
+            # Appel à Ollama (en local)
+            response = get_ollama_client().generate(query, context, timeout=60, check_timeout=2)
+            
+            if not isinstance(response, OllamaErrorMessage):
+                answer_cache.set(query, documents, response)
             
             # Sauvegarder l'interaction
             interaction = AIInteraction.objects.create(
@@ -450,72 +627,3 @@ class AIInteractionViewSet(viewsets.ModelViewSet):
                 {'error': f'Erreur lors de la communication avec l\'IA: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    
-    def _query_ollama(self, query, context):
-        """Interroger Ollama en local."""
-        # En production, remplacez cette méthode par un vrai appel à l'API Ollama
-        try:
-            import requests
-            logger.debug(f"Tentative de communication avec Ollama sur http://localhost:11434/api/generate")
-            
-            # Vérifier si Ollama est accessible
-            try:
-                health_check = requests.get('http://localhost:11434/api/tags', timeout=2)
-                if health_check.status_code != 200:
-                    logger.error(f"Ollama n'est pas accessible (status code: {health_check.status_code})")
-                    return "Le service Ollama n'est pas disponible actuellement. Veuillez vérifier que Ollama est installé et en cours d'exécution sur votre serveur."
-                
-                # Vérifier si le modèle llama2 est disponible
-                models = health_check.json().get('models', [])
-                llama2_available = any(model.get('name', '').startswith('llama2') for model in models)
-                if not llama2_available:
-                    logger.error("Le modèle llama2 n'est pas disponible dans Ollama")
-                    return "Le modèle llama2 n'est pas disponible. Veuillez l'installer avec la commande 'ollama pull llama2'."
-                    
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Impossible de se connecter à Ollama: {str(e)}")
-                return "Impossible de se connecter au service Ollama. Veuillez vérifier que Ollama est installé et en cours d'exécution sur votre serveur (http://localhost:11434)."
-                
-            # Tenter d'envoyer la requête à Ollama
-            try:
-                logger.info(f"Envoi de la requête à Ollama avec {len(context)} caractères de contexte")
-                response = requests.post(
-                    'http://localhost:11434/api/generate',
-                    json={
-                        'model': 'llama2',
-                        'prompt': f"""Contexte: {context}\n\nQuestion: {query}\n\nRéponse:""",
-                        'stream': False
-                    },
-                    timeout=60  # Augmenter le timeout pour les documents longs
-                )
-                
-                logger.info(f"Réponse reçue de Ollama: status={response.status_code}")
-                
-                if response.status_code == 200:
-                    result = response.json().get('response', '')
-                    logger.info(f"Réponse de l'IA obtenue ({len(result)} caractères)")
-                    return result
-                else:
-                    error_msg = f"Erreur API Ollama: {response.status_code}"
-                    if hasattr(response, 'json'):
-                        try:
-                            error_details = response.json()
-                            error_msg += f" - {error_details.get('error', '')}"
-                        except:
-                            pass
-                    logger.error(error_msg)
-                    return f"Erreur lors de la communication avec Ollama: {error_msg}"
-            except requests.exceptions.Timeout:
-                logger.error("Timeout lors de la communication avec Ollama")
-                return "Le temps de réponse d'Ollama a été dépassé. Le contexte est peut-être trop volumineux ou le modèle est occupé."
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Erreur lors de la requête à Ollama: {str(e)}")
-                return f"Erreur de communication avec Ollama: {str(e)}"
-                
-        except ImportError:
-            # Fallback si requests n'est pas disponible
-            logger.error("Module 'requests' non disponible")
-            return "Je suis désolé, je ne peux pas répondre à cette question pour le moment. Le module 'requests' n'est pas disponible sur le serveur."
-        except Exception as e:
-            logger.error(f"Erreur inattendue lors de la communication avec Ollama: {str(e)}")
-            return f"Une erreur inattendue s'est produite lors de la communication avec Ollama: {str(e)}" 
\ No newline at end of file
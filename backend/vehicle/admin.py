@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Vehicle
+from .models import Booking, Vehicle
+from .images import image_url
 
 @admin.register(Vehicle)
 class VehicleAdmin(admin.ModelAdmin):
@@ -8,7 +9,12 @@ class VehicleAdmin(admin.ModelAdmin):
     search_fields = ('brand', 'model')
 
     def get_image_url(self, obj):
-        if obj.image:
-            return obj.image.url
-        return "Pas d'image"
+        return image_url(obj.image) or "Pas d'image"
     get_image_url.short_description = "URL de l'image"
+
+
+@admin.register(Booking)
+class BookingAdmin(admin.ModelAdmin):
+    list_display = ('vehicle', 'renter', 'start_date', 'end_date', 'status')
+    list_filter = ('status',)
+    date_hierarchy = 'start_date'
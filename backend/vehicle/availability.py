@@ -0,0 +1,68 @@
+"""
+Disponibilité des véhicules sur une période.
+
+Un véhicule est indisponible du ``début`` à la ``fin`` (dates incluses) si
+une réservation confirmée (``Booking``) ou sa location en cours
+(``rental_start_date`` / ``rental_end_date``) chevauche cette période.
+
+La recherche est un seul ``NOT EXISTS`` corrélé sur les réservations
+confirmées du véhicule qui chevauchent la période. Sur PostgreSQL, le
+chevauchement s'écrit ``daterange(start_date, end_date, '[]') && période`` :
+la même expression que l'index GiST de la contrainte d'exclusion
+``booking_no_overlap``, qui sert donc la recherche. Les autres bases comparent
+les bornes.
+"""
+from django.db import connection
+from django.db.models import Exists, Func, OuterRef, Q, Value
+
+from .models import Booking
+
+
+class BookingConflict(Exception):
+    """La période demandée chevauche une réservation confirmée."""
+
+
+def _overlaps_legacy_rental(start, end):
+    return Q(rental_start_date__lte=end, rental_end_date__gte=start)
+
+
+def _overlapping_bookings(start, end):
+    """Réservations confirmées du véhicule courant (``OuterRef('pk')``) qui chevauchent la période."""
+    # Expressions ORM uniquement : Django renomme la table (U0) dans la sous-requête
+    bookings = Booking.objects.filter(vehicle=OuterRef('pk'), status='CONFIRMED')
+    if connection.vendor != 'postgresql':
+        return bookings.filter(start_date__lte=end, end_date__gte=start)
+
+    # Importés ici : les types d'intervalles PostgreSQL exigent psycopg
+    from django.contrib.postgres.fields import DateRangeField
+    from django.db.backends.postgresql.psycopg_any import DateRange
+
+    period = Func('start_date', 'end_date', Value('[]'), function='daterange', output_field=DateRangeField())
+    return bookings.alias(period=period).filter(period__overlap=DateRange(start, end, '[]'))
+
+
+def exclude_booked(queryset, start, end):
+    """Exclut par ``NOT EXISTS`` les véhicules réservés sur la période."""
+    return queryset.filter(~Exists(_overlapping_bookings(start, end)))
+
+
+def available_between(queryset, start, end):
+    """Véhicules de ``queryset`` libres du ``start`` au ``end`` inclus."""
+    if end < start:
+        start, end = end, start
+    return exclude_booked(queryset.exclude(_overlaps_legacy_rental(start, end)), start, end)
+
+
+def check_booking_available(vehicle, start, end, exclude_booking_id=None):
+    """
+    Lève ``BookingConflict`` si ``vehicle`` a déjà une réservation confirmée
+    sur la période. Sur PostgreSQL, la contrainte d'exclusion reste la
+    garantie finale en cas d'écritures concurrentes.
+    """
+    conflicts = Booking.objects.filter(
+        vehicle=vehicle, status='CONFIRMED', start_date__lte=end, end_date__gte=start
+    )
+    if exclude_booking_id is not None:
+        conflicts = conflicts.exclude(id=exclude_booking_id)
+    if conflicts.exists():
+        raise BookingConflict("Le véhicule est déjà réservé sur cette période")
@@ -0,0 +1,176 @@
+"""
+Opérations groupées sur les véhicules (création, état, propriétaire, type d'offre).
+
+Chaque opération valide toute la demande en une passe, applique les
+modifications valides en quelques requêtes (``bulk_create`` ou
+``UPDATE ... WHERE id IN``) dans une seule transaction, puis incrémente la
+version du catalogue. Le résultat est détaillé élément par élément.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Value, When
+
+from user.models import User
+
+from .catalogue import bump_catalogue_version
+from .models import Vehicle
+
+MAX_BATCH_SIZE = 1000
+
+
+class BulkRequestError(ValueError):
+    """Demande groupée mal formée (rejetée en entier)."""
+
+
+def parse_items(data, value_field):
+    """
+    Lit ``items`` (``[{"id": .., value_field: ..}]``) ou ``ids`` accompagné
+    d'une valeur commune ``value_field``. Retourne une liste de couples (id, valeur).
+    """
+    if 'items' in data:
+        items = data['items']
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise BulkRequestError("'items' doit être une liste d'objets")
+        pairs = [(item.get('id'), item.get(value_field)) for item in items]
+    elif 'ids' in data:
+        ids = data['ids']
+        if not isinstance(ids, list):
+            raise BulkRequestError("'ids' doit être une liste")
+        pairs = [(vehicle_id, data.get(value_field)) for vehicle_id in ids]
+    else:
+        raise BulkRequestError("'items' ou 'ids' est requis")
+    if not pairs:
+        raise BulkRequestError("Aucun véhicule indiqué")
+    if len(pairs) > MAX_BATCH_SIZE:
+        raise BulkRequestError(f"{MAX_BATCH_SIZE} véhicules au maximum par demande")
+    return pairs
+
+
+def _existing_ids(pairs):
+    """Identifiants valides de la demande qui existent en base (une requête)."""
+    ids = {vehicle_id for vehicle_id, _ in pairs if isinstance(vehicle_id, int)}
+    return set(Vehicle.objects.filter(id__in=ids).values_list('id', flat=True))
+
+
+def summarize(results):
+    counts = defaultdict(int)
+    for result in results:
+        counts[result['status']] += 1
+    return {'summary': dict(counts), 'results': results}
+
+
+def bulk_create_vehicles(items, owner, serializer_class):
+    """Valide chaque véhicule avec ``serializer_class`` puis crée les valides en un ``bulk_create``."""
+    if not isinstance(items, list) or not items:
+        raise BulkRequestError("'vehicles' doit être une liste non vide")
+    if len(items) > MAX_BATCH_SIZE:
+        raise BulkRequestError(f"{MAX_BATCH_SIZE} véhicules au maximum par demande")
+
+    results = []
+    to_create = []
+    for index, item in enumerate(items):
+        serializer = serializer_class(data=item)
+        if serializer.is_valid():
+            to_create.append((index, Vehicle(owner=owner, **serializer.validated_data)))
+            results.append(None)
+        else:
+            results.append({'index': index, 'status': 'error', 'errors': serializer.errors})
+
+    with transaction.atomic():
+        created = Vehicle.objects.bulk_create([vehicle for _, vehicle in to_create])
+        bump_catalogue_version([vehicle.id for vehicle in created])
+    for (index, _), vehicle in zip(to_create, created):
+        results[index] = {'index': index, 'status': 'created', 'id': vehicle.id}
+    return summarize(results)
+
+
+def _is_scalar(value):
+    """Valeur utilisable comme clé de regroupement : texte ou entier (pas de liste, d'objet ni de booléen)."""
+    return isinstance(value, (str, int)) and not isinstance(value, bool)
+
+
+def _apply_grouped(pairs, validate, update, value_required=True):
+    """
+    Valide chaque couple (id, valeur) puis applique ``update(ids, valeur)``
+    une fois par valeur distincte, dans une seule transaction.
+    """
+    existing = _existing_ids(pairs)
+    results = []
+    groups = defaultdict(list)
+    seen = set()
+    for vehicle_id, value in pairs:
+        if not isinstance(vehicle_id, int) or isinstance(vehicle_id, bool):
+            results.append({'id': vehicle_id, 'status': 'error', 'error': 'Identifiant invalide'})
+            continue
+        if vehicle_id in seen:
+            results.append({'id': vehicle_id, 'status': 'error', 'error': 'Véhicule en double dans la demande'})
+            continue
+        seen.add(vehicle_id)
+        if vehicle_id not in existing:
+            results.append({'id': vehicle_id, 'status': 'not_found', 'error': 'Véhicule non trouvé'})
+            continue
+        # Une liste ou un objet JSON ne peut pas servir de clé de regroupement
+        error = 'Valeur invalide' if value_required and not _is_scalar(value) else validate(value)
+        if error:
+            results.append({'id': vehicle_id, 'status': 'error', 'error': error})
+            continue
+        groups[value].append(vehicle_id)
+        results.append({'id': vehicle_id, 'status': 'updated'})
+
+    updated_ids = [vehicle_id for ids in groups.values() for vehicle_id in ids]
+    if updated_ids:
+        with transaction.atomic():
+            for value, ids in groups.items():
+                update(ids, value)
+            bump_catalogue_version(updated_ids)
+    return summarize(results)
+
+
+def bulk_change_state(pairs):
+    states = dict(Vehicle.STATES)
+
+    def validate(state):
+        return None if state in states else 'État invalide'
+
+    def update(ids, state):
+        Vehicle.objects.filter(id__in=ids).update(state=state)
+
+    return _apply_grouped(pairs, validate, update)
+
+
+def bulk_assign_owner(pairs):
+    owner_ids = {owner_id for _, owner_id in pairs if isinstance(owner_id, int) and not isinstance(owner_id, bool)}
+    owners = set(User.objects.filter(id__in=owner_ids).values_list('id', flat=True))
+
+    def validate(owner_id):
+        return None if owner_id in owners else 'Utilisateur non trouvé'
+
+    def update(ids, owner_id):
+        Vehicle.objects.filter(id__in=ids).update(owner_id=owner_id)
+
+    return _apply_grouped(pairs, validate, update)
+
+
+def bulk_switch_type(ids):
+    """Bascule vente/location et réinitialise état et relations, comme ``switch_type``, en un UPDATE."""
+    pairs = [(vehicle_id, None) for vehicle_id in ids]
+
+    def update(vehicle_ids, _):
+        Vehicle.objects.filter(id__in=vehicle_ids).update(
+            type_offer=Case(When(type_offer='SALE', then=Value('RENTAL')), default=Value('SALE')),
+            state='AVAILABLE',
+            owner=None,
+            renter=None,
+            rental_start_date=None,
+            rental_end_date=None,
+        )
+
+    result = _apply_grouped(pairs, lambda _: None, update, value_required=False)
+    # Nouveau type de chaque véhicule basculé
+    switched = [item['id'] for item in result['results'] if item['status'] == 'updated']
+    types = dict(Vehicle.objects.filter(id__in=switched).values_list('id', 'type_offer'))
+    for item in result['results']:
+        if item['id'] in types:
+            item['type_offer'] = types[item['id']]
+    return result
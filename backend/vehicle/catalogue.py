@@ -0,0 +1,85 @@
+"""
+Version du catalogue et requêtes conditionnelles (ETag / Last-Modified).
+
+Toute écriture sur un véhicule incrémente ``CatalogueVersion.counter`` :
+les signaux ``post_save`` / ``post_delete`` couvrent les ``save()`` et
+``delete()``, et les mises à jour groupées (``QuerySet.update``,
+``bulk_update``, ``bulk_create``) doivent appeler ``bump_catalogue_version``
+explicitement.
+
+Les réponses du catalogue portent un ETag dérivé de ce compteur : un client
+qui renvoie ``If-None-Match`` reçoit ``304 Not Modified`` sans que la liste
+soit relue ni sérialisée.
+"""
+import hashlib
+from calendar import timegm
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .models import CatalogueVersion
+from .response_cache import invalidate_vehicles
+
+VERSION_ID = 1
+
+
+def catalogue_version():
+    """Retourne la ligne de version du catalogue, créée au premier appel."""
+    version = CatalogueVersion.objects.filter(pk=VERSION_ID).first()
+    if version is None:
+        try:
+            with transaction.atomic():
+                version = CatalogueVersion.objects.create(pk=VERSION_ID)
+        except IntegrityError:
+            version = CatalogueVersion.objects.get(pk=VERSION_ID)
+    return version
+
+
+def bump_catalogue_version(vehicle_ids=()):
+    """
+    Signale une modification du catalogue (à appeler après toute écriture groupée)
+    et invalide le détail en cache des véhicules ``vehicle_ids``.
+    """
+    invalidate_vehicles(vehicle_ids)
+    updated = CatalogueVersion.objects.filter(pk=VERSION_ID).update(
+        counter=F('counter') + 1, updated_at=timezone.now()
+    )
+    if not updated:
+        catalogue_version()
+        CatalogueVersion.objects.filter(pk=VERSION_ID).update(
+            counter=F('counter') + 1, updated_at=timezone.now()
+        )
+
+
+def _timestamp(value):
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return timegm(value.utctimetuple())
+
+
+def conditional_response(request, render):
+    """
+    Répond ``304 Not Modified`` si le client possède déjà la version courante
+    du catalogue, sinon appelle ``render(version)`` et ajoute les validateurs.
+
+    Les réponses sont privées (elles exigent une authentification) et doivent
+    être revalidées à chaque utilisation.
+    """
+    version = catalogue_version()
+    # Le contenu dépend aussi du format demandé (JSON ou API navigable)
+    variant = hashlib.md5(request.META.get('HTTP_ACCEPT', '').encode('utf-8')).hexdigest()[:8]
+    etag = quote_etag(f"{version.counter}-{variant}")
+    last_modified = _timestamp(version.updated_at)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = render(version)
+    if response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+        response.headers.setdefault('Last-Modified', http_date(last_modified))
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization', 'Accept'])
+    return response
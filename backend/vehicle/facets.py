@@ -0,0 +1,162 @@
+"""
+Facettes du catalogue : nombre de véhicules par valeur (marque, type d'offre,
+état, carburant, boîte) et histogrammes de prix, d'année et de kilométrage.
+
+Toutes les facettes sont calculées en une seule requête agrégée sur le
+queryset déjà filtré. Sur PostgreSQL, un ``GROUP BY GROUPING SETS`` produit
+directement un groupe par facette ; sur les autres bases, la requête groupe
+par combinaison de valeurs et les totaux par facette sont faits en Python.
+Le résultat est gardé ``VEHICLE_FACETS_CACHE_TTL`` secondes dans le cache.
+"""
+import hashlib
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, ExpressionWrapper, F, IntegerField, Max, Min
+from django.db.models.functions import Floor
+
+FACET_FIELDS = ['brand', 'type_offer', 'state', 'fuel_type', 'transmission']
+
+# Largeur des tranches des histogrammes
+HISTOGRAM_WIDTHS = {
+    'sale_price': 5000,
+    'rental_price': 50,
+    'year': 5,
+    'mileage': 25000,
+}
+
+# Paramètres sans effet sur le contenu des facettes
+IGNORED_PARAMS = {'cursor', 'page_size', 'ordering', 'view'}
+
+
+def _bucket(field):
+    return f'{field}_bucket'
+
+
+def _number(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+def _base_queryset(queryset):
+    """Valeurs des facettes et tranches d'histogramme de chaque véhicule filtré."""
+    buckets = {
+        _bucket(field): ExpressionWrapper(Floor(F(field) / width) * width, output_field=IntegerField())
+        for field, width in HISTOGRAM_WIDTHS.items()
+    }
+    return queryset.order_by().annotate(**buckets)
+
+
+def _aggregate_postgres(queryset):
+    """Une ligne par valeur de chaque facette, plus une ligne de totaux (GROUPING SETS)."""
+    dimensions = FACET_FIELDS + [_bucket(field) for field in HISTOGRAM_WIDTHS]
+    inner = _base_queryset(queryset).values(*FACET_FIELDS, *HISTOGRAM_WIDTHS, *dimensions[len(FACET_FIELDS):])
+    inner_sql, params = inner.query.sql_with_params()
+
+    columns = ', '.join(f'"{name}"' for name in dimensions)
+    ranges = ', '.join(f'MIN("{field}"), MAX("{field}")' for field in HISTOGRAM_WIDTHS)
+    sets = ', '.join(f'("{name}")' for name in dimensions)
+    sql = (
+        f'SELECT {columns}, GROUPING({columns}), COUNT(*), {ranges} '
+        f'FROM ({inner_sql}) AS catalogue '
+        f'GROUP BY GROUPING SETS ({sets}, ())'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    size = len(dimensions)
+    all_grouped = (1 << size) - 1
+    counts = defaultdict(dict)
+    total, ranges_row = 0, None
+    for row in rows:
+        grouping, count = row[size], row[size + 1]
+        if grouping == all_grouped:
+            total, ranges_row = count, row[size + 2:]
+            continue
+        for index, name in enumerate(dimensions):
+            # Le bit de la dimension groupée est à 0
+            if not grouping & (1 << (size - 1 - index)):
+                counts[name][row[index]] = count
+                break
+    ranges = {
+        field: (ranges_row[2 * i], ranges_row[2 * i + 1]) if ranges_row else (None, None)
+        for i, field in enumerate(HISTOGRAM_WIDTHS)
+    }
+    return total, counts, ranges
+
+
+def _aggregate_fallback(queryset):
+    """Une ligne par combinaison de valeurs, totalisée en Python par facette."""
+    dimensions = FACET_FIELDS + [_bucket(field) for field in HISTOGRAM_WIDTHS]
+    aggregates = {}
+    for field in HISTOGRAM_WIDTHS:
+        aggregates[f'{field}_min'] = Min(field)
+        aggregates[f'{field}_max'] = Max(field)
+    rows = _base_queryset(queryset).values(*dimensions).annotate(count=Count('id'), **aggregates)
+
+    total = 0
+    counts = defaultdict(lambda: defaultdict(int))
+    ranges = {field: (None, None) for field in HISTOGRAM_WIDTHS}
+    for row in rows:
+        total += row['count']
+        for name in dimensions:
+            counts[name][row[name]] += row['count']
+        for field in HISTOGRAM_WIDTHS:
+            low, high = ranges[field]
+            row_low, row_high = row[f'{field}_min'], row[f'{field}_max']
+            if row_low is not None:
+                ranges[field] = (
+                    row_low if low is None else min(low, row_low),
+                    row_high if high is None else max(high, row_high),
+                )
+    return total, counts, ranges
+
+
+def compute_facets(queryset):
+    if connection.vendor == 'postgresql':
+        total, counts, ranges = _aggregate_postgres(queryset)
+    else:
+        total, counts, ranges = _aggregate_fallback(queryset)
+
+    facets = {}
+    for field in FACET_FIELDS:
+        values = sorted(counts.get(field, {}).items(), key=lambda item: (-item[1], str(item[0])))
+        facets[field] = [{'value': value, 'count': count} for value, count in values]
+
+    histograms = {}
+    for field, width in HISTOGRAM_WIDTHS.items():
+        buckets = counts.get(_bucket(field), {})
+        low, high = ranges[field]
+        histograms[field] = {
+            'min': _number(low),
+            'max': _number(high),
+            'interval': width,
+            'buckets': [
+                {'from': _number(start), 'to': _number(start) + width, 'count': buckets[start]}
+                for start in sorted(value for value in buckets if value is not None)
+            ],
+            'missing': buckets.get(None, 0),
+        }
+    return {'count': total, 'facets': facets, 'histograms': histograms}
+
+
+def cached_facets(queryset, params):
+    """``compute_facets`` mis en cache selon les paramètres de filtre de la requête."""
+    key_params = sorted(
+        (name, value)
+        for name in params
+        if name not in IGNORED_PARAMS
+        for value in params.getlist(name)
+    )
+    signature = hashlib.md5(repr(key_params).encode('utf-8')).hexdigest()
+    cache_key = f'vehicle:facets:{signature}'
+    facets = cache.get(cache_key)
+    if facets is None:
+        facets = compute_facets(queryset)
+        cache.set(cache_key, facets, getattr(settings, 'VEHICLE_FACETS_CACHE_TTL', 60))
+    return facets
@@ -0,0 +1,60 @@
+"""
+Résolution des URL d'images des véhicules.
+
+Le nom d'une image (``vehicles/<fichier>``) ne change jamais une fois
+enregistré (``file_overwrite = False``) : son URL est calculée une seule fois
+par processus puis mémorisée, au lieu d'être reconstruite pour chaque
+véhicule sérialisé. Le sérialiseur, l'admin et ``check_image`` partagent ce
+résolveur.
+
+Les résolutions sont journalisées au niveau DEBUG sur le logger
+``vehicle.images`` (champs ``image_name``, ``s3_key``, ``image_url``).
+"""
+import logging
+from collections import namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+ResolvedImage = namedtuple('ResolvedImage', ['name', 's3_key', 'url', 'storage_url'])
+
+
+@lru_cache(maxsize=getattr(settings, 'VEHICLE_IMAGE_URL_CACHE_SIZE', 16384))
+def resolve(name):
+    """Clé S3 et URL publiques d'une image à partir de son nom, mémorisées par processus."""
+    # Seul le nom du fichier est conservé : les images sont toutes sous media/vehicles/
+    file_name = name.split('/')[-1]
+    s3_key = f"media/vehicles/{file_name}"
+    resolved = ResolvedImage(
+        name=name,
+        s3_key=s3_key,
+        url=f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{s3_key}",
+        storage_url=default_storage.url(name),
+    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("URL d'image résolue", extra={
+            'image_name': name, 's3_key': s3_key, 'image_url': resolved.url,
+        })
+    return resolved
+
+
+def image_url(image):
+    """URL publique de l'image d'un véhicule, ou None s'il n'en a pas."""
+    if not image:
+        return None
+    return resolve(image.name).url
+
+
+def image_s3_key(image):
+    """Clé S3 de l'image d'un véhicule, ou None s'il n'en a pas."""
+    if not image:
+        return None
+    return resolve(image.name).s3_key
+
+
+def cache_info():
+    """Statistiques du cache du résolveur (hits, misses, taille)."""
+    return resolve.cache_info()
@@ -0,0 +1,47 @@
+"""
+Génération des vignettes des photos de véhicules avec Pillow.
+
+Ce module n'importe pas Django : ``render_derivatives`` doit pouvoir être
+exécutée dans les processus d'un ``ProcessPoolExecutor`` (commande
+``generate_vehicle_thumbnails``).
+"""
+import io
+
+from PIL import Image, ImageOps
+
+# Largeurs (en pixels) des vignettes générées pour chaque photo
+WIDTHS = (320, 640, 1024)
+
+# Format Pillow, extension et qualité de chaque déclinaison
+FORMATS = {
+    'webp': ('WEBP', 'webp', 80),
+    'jpeg': ('JPEG', 'jpg', 82),
+}
+
+
+def render_derivatives(data, widths=WIDTHS, formats=tuple(FORMATS)):
+    """
+    Retourne ``{(format, largeur): contenu}`` pour une image source en octets.
+
+    L'image n'est jamais agrandie : pour une largeur supérieure à celle de
+    l'original, la vignette garde la taille de l'original.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        # Appliquer l'orientation EXIF des photos prises au téléphone
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+        derivatives = {}
+        for width in sorted(widths, reverse=True):
+            resized = image.copy()
+            resized.thumbnail((width, width * 10), Image.LANCZOS)
+            for name in formats:
+                pil_format, _, quality = FORMATS[name]
+                frame = resized.convert('RGB') if pil_format == 'JPEG' else resized
+                buffer = io.BytesIO()
+                frame.save(buffer, pil_format, quality=quality, optimize=pil_format == 'JPEG')
+                derivatives[(name, width)] = buffer.getvalue()
+            # La vignette suivante, plus petite, part de celle-ci : moins de pixels à rééchantillonner
+            image = resized
+        return derivatives
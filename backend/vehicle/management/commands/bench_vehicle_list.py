@@ -0,0 +1,51 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from vehicle.models import Vehicle
+from vehicle.projections import card_data, card_rows
+from vehicle.serializers import VehicleSerializer
+
+
+def build_vehicles(count):
+    description = "Véhicule d'occasion en très bon état, entretien suivi, carnet à jour. " * 20
+    return [
+        Vehicle(
+            brand=('Peugeot', 'Renault', 'Tesla')[i % 3], model='Modèle', year=2015 + i % 10,
+            mileage=1000 * i, sale_price=15000 + i, rental_price=None, type_offer='SALE',
+            state='AVAILABLE', description=description, image=f"vehicles/photo_{i % 500}.jpg",
+            engine_size='1.6', fuel_type='ESSENCE', power=110, transmission='MANUELLE',
+        )
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = ("Compare le débit de la liste complète (VehicleSerializer) et de la projection "
+            "« carte » (?view=card). Les véhicules de test sont créés dans une transaction annulée.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        count = options['count']
+        with transaction.atomic():
+            Vehicle.objects.bulk_create(build_vehicles(count), batch_size=500)
+            queryset = Vehicle.objects.order_by('-date_added', '-id')
+
+            full = card = float('inf')
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                VehicleSerializer(list(queryset[:count]), many=True).data
+                full = min(full, time.perf_counter() - start)
+
+                start = time.perf_counter()
+                card_data(card_rows(queryset)[:count])
+                card = min(card, time.perf_counter() - start)
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'mode':>8} {'durée (s)':>10} {'véhicules/s':>12}")
+        self.stdout.write(f"{'complet':>8} {full:>10.3f} {count / full:>12.0f}")
+        self.stdout.write(f"{'carte':>8} {card:>10.3f} {count / card:>12.0f}")
+        self.stdout.write(f"Gain: {full / card:.2f}x")
@@ -0,0 +1,72 @@
+import os
+import time
+import contextlib
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework import serializers
+from vehicle.images import resolve
+from vehicle.models import Vehicle
+from vehicle.serializers import VehicleSerializer
+
+
+class LegacyVehicleSerializer(VehicleSerializer):
+    """Ancienne implémentation : URL reconstruite et trois print() par véhicule."""
+    serializer_field_mapping = serializers.ModelSerializer.serializer_field_mapping
+
+    def get_image_url(self, obj):
+        if obj.image:
+            image_name = obj.image.name
+            if '/' in image_name:
+                image_name = image_name.split('/')[-1]
+            s3_url = f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/media/vehicles/{image_name}"
+            print("Image details:")
+            print(f"Original name: {obj.image.name}")
+            print(f"S3 URL: {s3_url}")
+            return s3_url
+        return None
+
+
+def build_vehicles(count, distinct_images):
+    """Véhicules en mémoire (non enregistrés), partageant ``distinct_images`` images."""
+    return [
+        Vehicle(
+            id=i + 1, brand='Peugeot', model='208', year=2020, mileage=1000 * i,
+            sale_price=15000, rental_price=None, type_offer='SALE', state='AVAILABLE',
+            description='Citadine', image=f"vehicles/photo_{i % distinct_images}.jpg",
+        )
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Mesure le coût de sérialisation par véhicule, avant et après le résolveur d'URL d'images."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument('--distinct-images', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--log-file', default=os.devnull,
+                            help="Fichier recevant les print() de l'ancienne version (journal d'erreurs de gunicorn).")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'véhicules':>10} {'ancienne (µs/véh.)':>19} {'nouvelle (µs/véh.)':>19} {'gain':>7}")
+        for count in options['count']:
+            vehicles = build_vehicles(count, options['distinct_images'])
+            legacy = current = float('inf')
+            # Meilleur temps sur plusieurs passes ; le cache du résolveur est vidé à chaque passe
+            for _ in range(options['repeat']):
+                resolve.cache_clear()
+                with open(options['log_file'], 'a') as log, contextlib.redirect_stdout(log):
+                    start = time.perf_counter()
+                    legacy_data = LegacyVehicleSerializer(vehicles, many=True).data
+                    legacy = min(legacy, time.perf_counter() - start)
+
+                start = time.perf_counter()
+                current_data = VehicleSerializer(vehicles, many=True).data
+                current = min(current, time.perf_counter() - start)
+
+            if [item['image_url'] for item in legacy_data] != [item['image_url'] for item in current_data]:
+                self.stderr.write(f"URL différentes pour {count} véhicules")
+            self.stdout.write(
+                f"{count:>10} {legacy * 1e6 / count:>19.1f} {current * 1e6 / count:>19.1f} {legacy / current:>6.2f}x"
+            )
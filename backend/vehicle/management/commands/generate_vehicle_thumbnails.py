@@ -0,0 +1,69 @@
+import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from vehicle.imaging import WIDTHS, render_derivatives
+from vehicle.models import Vehicle
+from vehicle.thumbnails import derivative_name, mark_generated, store_derivatives, thumbnail_storage
+
+
+class Command(BaseCommand):
+    help = "Génère les vignettes WebP/JPEG des photos de véhicules existantes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help="Nombre de processus de redimensionnement.")
+        parser.add_argument('--force', action='store_true',
+                            help="Régénérer les vignettes déjà présentes.")
+        parser.add_argument('--ids', type=int, nargs='+',
+                            help="Limiter aux véhicules indiqués.")
+
+    def handle(self, *args, **options):
+        vehicles = Vehicle.objects.exclude(image='').exclude(image__isnull=True)
+        if options['ids']:
+            vehicles = vehicles.filter(id__in=options['ids'])
+        names = sorted(set(vehicles.values_list('image', flat=True)))
+
+        storage = thumbnail_storage()
+        if not options['force']:
+            # La plus grande vignette WebP est écrite en dernier : elle sert de témoin
+            present = [
+                name for name in names
+                if storage.exists(derivative_name(name, max(WIDTHS), 'webp'))
+            ]
+            mark_generated(present)
+            names = sorted(set(names) - set(present))
+        self.stdout.write(f"{len(names)} photo(s) à traiter")
+
+        workers = max(options['workers'] or 1, 1)
+        done = failed = 0
+        # Les processus ne font que le calcul Pillow : lecture et écriture restent ici
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            queue = deque(names)
+            pending = deque()
+            while queue or pending:
+                while queue and len(pending) < 2 * workers:
+                    name = queue.popleft()
+                    try:
+                        with default_storage.open(name, 'rb') as original:
+                            data = original.read()
+                    except Exception as e:
+                        failed += 1
+                        self.stderr.write(f"{name}: lecture impossible ({str(e)})")
+                        continue
+                    pending.append((name, executor.submit(render_derivatives, data)))
+                if not pending:
+                    continue
+                name, future = pending.popleft()
+                try:
+                    store_derivatives(name, future.result())
+                    mark_generated([name])
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{name}: {str(e)}")
+
+        self.stdout.write(self.style.SUCCESS(f"Vignettes générées: {done}, échecs: {failed}"))
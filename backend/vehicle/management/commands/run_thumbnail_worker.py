@@ -0,0 +1,16 @@
+from config.job_queue import JobWorkerCommand
+from vehicle.thumbnails import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(JobWorkerCommand):
+    help = "Traite la file d'attente de génération des vignettes des photos de véhicules."
+    name = "Worker de vignettes"
+
+    def requeue_stale_jobs(self):
+        return requeue_stale_jobs()
+
+    def claim_next_job(self):
+        return claim_next_job()
+
+    def run_job(self, job, max_attempts=None):
+        return run_job(job, max_attempts=max_attempts)
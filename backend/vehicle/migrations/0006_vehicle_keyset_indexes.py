@@ -0,0 +1,31 @@
+from django.db import migrations
+
+# Index composites (colonne, id) utilisés par la pagination par curseur du catalogue
+# (vehicle/pagination.py). La table est gérée hors de Django : les index sont créés en
+# SQL, sur PostgreSQL uniquement (base de production).
+KEYSET_COLUMNS = ['date_added', 'year', 'mileage', 'sale_price', 'rental_price']
+
+
+def add_keyset_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in KEYSET_COLUMNS:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS vehicles_{column}_id_idx ON vehicles ({column}, id);')
+
+
+def drop_keyset_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in KEYSET_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS vehicles_{column}_id_idx;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicle', '0005_auto_match_database_schema'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_keyset_indexes, drop_keyset_indexes),
+    ]
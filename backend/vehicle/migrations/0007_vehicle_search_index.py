@@ -0,0 +1,96 @@
+from django.db import migrations
+
+# Index de recherche plein texte du catalogue (voir vehicle/search.py).
+# La table vehicles est gérée hors de Django : la colonne search_vector, le
+# trigger qui la tient à jour et les index sont créés en SQL, uniquement sur
+# PostgreSQL (les autres bases utilisent la recherche de repli en Python).
+
+FORWARD_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent;",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+    # unaccent() n'est pas IMMUTABLE : une fonction enveloppe permet de l'utiliser dans un index
+    """
+    CREATE OR REPLACE FUNCTION vehicles_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+    """,
+    # Configuration française insensible aux accents : « electrique » trouve « Électrique »
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'french_unaccent') THEN
+            CREATE TEXT SEARCH CONFIGURATION french_unaccent (COPY = french);
+            ALTER TEXT SEARCH CONFIGURATION french_unaccent
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+        END IF;
+    END
+    $$;
+    """,
+    "ALTER TABLE vehicles ADD COLUMN IF NOT EXISTS search_vector tsvector;",
+    """
+    CREATE OR REPLACE FUNCTION vehicles_search_vector_update() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('french_unaccent', coalesce(NEW.brand, '')), 'A') ||
+            setweight(to_tsvector('french_unaccent', coalesce(NEW.model, '')), 'A') ||
+            setweight(to_tsvector('french_unaccent', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$;
+    """,
+    "DROP TRIGGER IF EXISTS vehicles_search_vector_trigger ON vehicles;",
+    """
+    CREATE TRIGGER vehicles_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF brand, model, description ON vehicles
+    FOR EACH ROW EXECUTE FUNCTION vehicles_search_vector_update();
+    """,
+    # Remplir la colonne pour les véhicules existants (le trigger s'en charge ensuite)
+    "UPDATE vehicles SET brand = brand;",
+    "CREATE INDEX IF NOT EXISTS vehicles_search_vector_idx ON vehicles USING gin (search_vector);",
+    # Autocomplétion sur « marque modèle » et filtres brand/model__icontains (ILIKE '%x%')
+    """
+    CREATE INDEX IF NOT EXISTS vehicles_name_trgm_idx ON vehicles
+    USING gin (vehicles_unaccent(lower(brand || ' ' || model)) gin_trgm_ops);
+    """,
+    "CREATE INDEX IF NOT EXISTS vehicles_brand_trgm_idx ON vehicles USING gin (brand gin_trgm_ops);",
+    "CREATE INDEX IF NOT EXISTS vehicles_model_trgm_idx ON vehicles USING gin (model gin_trgm_ops);",
+]
+
+REVERSE_SQL = [
+    "DROP INDEX IF EXISTS vehicles_model_trgm_idx;",
+    "DROP INDEX IF EXISTS vehicles_brand_trgm_idx;",
+    "DROP INDEX IF EXISTS vehicles_name_trgm_idx;",
+    "DROP INDEX IF EXISTS vehicles_search_vector_idx;",
+    "DROP TRIGGER IF EXISTS vehicles_search_vector_trigger ON vehicles;",
+    "DROP FUNCTION IF EXISTS vehicles_search_vector_update();",
+    "ALTER TABLE vehicles DROP COLUMN IF EXISTS search_vector;",
+    "DROP TEXT SEARCH CONFIGURATION IF EXISTS french_unaccent;",
+    "DROP FUNCTION IF EXISTS vehicles_unaccent(text);",
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in FORWARD_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in REVERSE_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicle', '0006_vehicle_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,58 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Sur PostgreSQL : deux réservations confirmées d'un même véhicule ne peuvent pas se
+# chevaucher. L'index GiST de la contrainte sert aussi aux recherches de disponibilité.
+EXCLUSION_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist;",
+    """
+    ALTER TABLE vehicle_booking ADD CONSTRAINT booking_no_overlap
+    EXCLUDE USING gist (vehicle_id WITH =, daterange(start_date, end_date, '[]') WITH &&)
+    WHERE (status = 'CONFIRMED');
+    """,
+]
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in EXCLUSION_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("ALTER TABLE vehicle_booking DROP CONSTRAINT IF EXISTS booking_no_overlap;")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('vehicle', '0008_catalogueversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Booking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('status', models.CharField(choices=[('CONFIRMED', 'Confirmée'), ('CANCELLED', 'Annulée')], default='CONFIRMED', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('renter', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to=settings.AUTH_USER_MODEL)),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='vehicle.vehicle')),
+            ],
+            options={
+                'ordering': ['start_date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.CheckConstraint(check=models.Q(('end_date__gte', models.F('start_date'))), name='booking_end_after_start'),
+        ),
+        migrations.RunPython(add_exclusion_constraint, drop_exclusion_constraint),
+    ]
@@ -4,6 +4,8 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 import logging
 from django.conf import settings
 
+from config.job_queue import QueuedJob
+
 logger = logging.getLogger(__name__)
 
 # Models vehicle.
@@ -124,3 +126,68 @@ class Vehicle(models.Model):
         # Log après la sauvegarde
         if self.image:
             logger.info(f"Vehicle saved. Image URL: {self.image.url}")
+
+
+class CatalogueVersion(models.Model):
+    """
+    Version du catalogue de véhicules (une seule ligne).
+
+    Le compteur est incrémenté à chaque écriture sur un véhicule ; il sert de
+    validateur HTTP (ETag / Last-Modified) aux réponses du catalogue.
+    """
+    counter = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Catalogue v{self.counter}"
+
+
+class Booking(models.Model):
+    """
+    Réservation d'un véhicule en location sur une période (dates incluses).
+
+    Sur PostgreSQL, une contrainte d'exclusion GiST sur
+    ``daterange(start_date, end_date, '[]')`` interdit deux réservations
+    confirmées qui se chevauchent pour un même véhicule (migration 0009).
+    """
+    STATUS = (
+        ('CONFIRMED', 'Confirmée'),
+        ('CANCELLED', 'Annulée'),
+    )
+
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='bookings')
+    renter = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bookings'
+    )
+    start_date = models.DateField()
+    end_date = models.DateField()
+    status = models.CharField(max_length=20, choices=STATUS, default='CONFIRMED')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['start_date']
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(end_date__gte=models.F('start_date')),
+                name='booking_end_after_start',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Réservation {self.vehicle_id} du {self.start_date} au {self.end_date}"
+
+
+class ThumbnailJob(QueuedJob):
+    """Génération des vignettes d'une photo, en file d'attente (voir vehicle/thumbnails.py)."""
+
+    image = models.CharField(max_length=255)  # Nom de stockage de la photo
+
+    class Meta(QueuedJob.Meta):
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"Vignettes {self.image} ({self.status})"
@@ -0,0 +1,173 @@
+"""
+Pagination par curseur (keyset) du catalogue de véhicules.
+
+Chaque page est obtenue par une condition ``(colonne, id) > (valeur, id)`` sur
+la dernière ligne de la page précédente au lieu d'un ``OFFSET`` : le coût d'une
+page reste constant quelle que soit sa position dans le catalogue, et les
+curseurs restent stables lorsque des véhicules sont ajoutés entre deux appels.
+
+L'ordre suit le paramètre ``ordering`` (limité aux ``ordering_fields`` de la
+vue) ou, à défaut, l'ordre par défaut du modèle (``-date_added``). L'``id``
+départage toujours les égalités et les valeurs NULL sont placées en fin de liste.
+"""
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering_param = 'ordering'
+    default_ordering = '-date_added'
+    invalid_cursor_message = 'Curseur invalide'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, view, queryset)
+        self.field_name = self.ordering.lstrip('-')
+        self.descending = self.ordering.startswith('-')
+        if self.field_name in queryset.query.annotations:
+            self.field = queryset.query.annotations[self.field_name].output_field
+        else:
+            self.field = queryset.model._meta.get_field(self.field_name)
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['r'])
+
+        # Une page « précédente » se lit dans l'ordre inverse puis est retournée
+        queryset = queryset.order_by(*self.order_by(reverse))
+        if cursor:
+            queryset = queryset.filter(self.keyset_filter(cursor['v'], cursor['id'], reverse))
+
+        # Une ligne de plus pour savoir s'il existe une page suivante
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        self.has_next = has_more if not reverse else bool(cursor)
+        self.has_previous = bool(cursor) if not reverse else has_more
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_ordering(self, request, view, queryset):
+        """
+        Colonne de tri demandée, si elle fait partie des ``ordering_fields`` de la vue.
+        Sans tri explicite, une recherche est classée par pertinence (``search_rank``).
+        """
+        allowed = getattr(view, 'ordering_fields', None) or []
+        for term in request.query_params.get(self.ordering_param, '').split(','):
+            term = term.strip()
+            if term and term.lstrip('-') in allowed:
+                return term
+        if 'search_rank' in queryset.query.annotations:
+            return '-search_rank'
+        return self.default_ordering
+
+    def order_by(self, reverse=False):
+        descending = self.descending != reverse
+        # Les NULL restent en fin de liste dans le sens normal de lecture
+        nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+        if descending:
+            return [F(self.field_name).desc(**nulls), F('id').desc()]
+        return [F(self.field_name).asc(**nulls), F('id').asc()]
+
+    def keyset_filter(self, value, pk, reverse=False):
+        """Lignes strictement après ``(value, pk)`` dans l'ordre de lecture."""
+        descending = self.descending != reverse
+        after = '__lt' if descending else '__gt'
+        null = f'{self.field_name}__isnull'
+        if value is None:
+            if reverse:
+                # Avant une ligne NULL : les autres NULL, puis toutes les valeurs renseignées
+                return Q(**{null: True, f'id{after}': pk}) | Q(**{null: False})
+            return Q(**{null: True, f'id{after}': pk})
+        condition = (
+            Q(**{f'{self.field_name}{after}': value})
+            | Q(**{self.field_name: value, f'id{after}': pk})
+        )
+        return condition if reverse else condition | Q(**{null: True})
+
+    def encode_cursor(self, row, reverse):
+        # Les lignes sont des instances du modèle ou des dictionnaires (projection values())
+        if isinstance(row, dict):
+            value, pk = row[self.field_name], row['id']
+        else:
+            value, pk = getattr(row, self.field_name), row.pk
+        if value is not None and getattr(self.field, 'model', None) is not None:
+            value = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+        payload = {
+            'o': self.ordering,
+            'v': value,
+            'id': pk,
+            'r': reverse,
+        }
+        token = base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+            # Un curseur n'est valable que pour le tri avec lequel il a été produit
+            if payload['o'] != self.ordering:
+                raise ValueError
+            payload['id'] = int(payload['id'])
+            payload['r'] = bool(payload['r'])
+            if payload['v'] is not None:
+                payload['v'] = self.field.to_python(payload['v'])
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return payload
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
@@ -0,0 +1,74 @@
+"""
+Projection « carte » du catalogue (``GET /api/vehicles/?view=card``).
+
+La grille du catalogue n'affiche qu'une partie des champs d'un véhicule :
+cette projection ne lit que ces colonnes (``values()``, sans la description
+ni les caractéristiques techniques) et construit directement les
+dictionnaires de réponse, sans instancier de modèles ni passer par le
+``ModelSerializer``. Les valeurs produites sont identiques à celles de
+``VehicleSerializer`` pour les mêmes champs.
+"""
+from decimal import Decimal
+
+from .images import resolve
+from .thumbnails import srcset
+
+CARD_COLUMNS = (
+    'id', 'brand', 'model', 'year', 'mileage', 'sale_price', 'rental_price',
+    'type_offer', 'state', 'image', 'has_insurance', 'has_maintenance', 'date_added',
+)
+
+CARD_FIELDS = CARD_COLUMNS + ('image_url', 'srcset', 'is_available')
+
+CENTS = Decimal('0.01')
+
+
+def card_rows(queryset):
+    """Colonnes de la carte (et annotations utiles au tri, comme ``search_rank``)."""
+    return queryset.values(*CARD_COLUMNS, *queryset.query.annotations)
+
+
+def _price(value):
+    # Même rendu que serializers.DecimalField(decimal_places=2) : chaîne à deux décimales
+    return None if value is None else str(value.quantize(CENTS))
+
+
+def _datetime(value):
+    if value is None:
+        return None
+    text = value.isoformat()
+    return text[:-6] + 'Z' if text.endswith('+00:00') else text
+
+
+def card_data(rows, request=None):
+    """Dictionnaires de réponse de la carte pour des lignes de ``card_rows``."""
+    data = []
+    append = data.append
+    for row in rows:
+        name = row['image']
+        if name:
+            resolved = resolve(name)
+            image = request.build_absolute_uri(resolved.storage_url) if request is not None else resolved.storage_url
+            image_url = resolved.url
+            image_srcset = srcset(name) if row.get('thumbnails_ready') else None
+        else:
+            image = image_url = image_srcset = None
+        append({
+            'id': row['id'],
+            'brand': row['brand'],
+            'model': row['model'],
+            'year': row['year'],
+            'mileage': row['mileage'],
+            'sale_price': _price(row['sale_price']),
+            'rental_price': _price(row['rental_price']),
+            'type_offer': row['type_offer'],
+            'state': row['state'],
+            'image': image,
+            'image_url': image_url,
+            'srcset': image_srcset,
+            'has_insurance': row['has_insurance'],
+            'has_maintenance': row['has_maintenance'],
+            'date_added': _datetime(row['date_added']),
+            'is_available': row['state'] == 'AVAILABLE',
+        })
+    return data
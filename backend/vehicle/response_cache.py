@@ -0,0 +1,112 @@
+"""
+Cache des réponses du catalogue de véhicules (``list`` et ``retrieve``).
+
+Les données sérialisées sont gardées dans le cache Django désigné par
+``VEHICLE_RESPONSE_CACHE_ALIAS`` (mémoire locale par défaut, fichier ou Redis
+selon ``VEHICLE_CACHE_URL``, voir ``config/settings.py``).
+
+L'invalidation est précise sans avoir à supprimer de clés :
+- les listes sont indexées par la version du catalogue, qui change à chaque écriture ;
+- le détail d'un véhicule est indexé par une génération propre à ce véhicule,
+  incrémentée par ``invalidate_vehicles`` après la validation (commit) de ses
+  écritures : une lecture concurrente faite avant le commit ne peut pas mettre
+  en cache l'ancien état sous la nouvelle génération. Avec un cache
+  propre à chaque processus (mémoire locale), l'écriture n'est visible que du
+  processus qui l'a faite : le détail suit alors la version du catalogue.
+Les entrées devenues inaccessibles expirent après ``VEHICLE_RESPONSE_CACHE_TTL``.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework.response import Response
+
+KEY_PREFIX = 'vehicle:response'
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[getattr(settings, 'VEHICLE_RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def response_cache_stats():
+    """Succès et échecs du cache des réponses dans ce processus."""
+    with _stats_lock:
+        stats = dict(_stats)
+    total = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / total, 3) if total else None
+    return stats
+
+
+def _generation_key(vehicle_id):
+    return f'{KEY_PREFIX}:generation:{vehicle_id}'
+
+
+def invalidate_vehicles(vehicle_ids):
+    """Rend obsolète le détail en cache des véhicules indiqués, une fois la transaction validée."""
+    vehicle_ids = list(vehicle_ids)
+    if vehicle_ids:
+        transaction.on_commit(lambda: _bump_generations(vehicle_ids))
+
+
+def _bump_generations(vehicle_ids):
+    cache = get_cache()
+    for vehicle_id in vehicle_ids:
+        try:
+            cache.incr(_generation_key(vehicle_id))
+        except ValueError:
+            cache.set(_generation_key(vehicle_id), 1, None)
+
+
+def normalized_params(query_params):
+    """Paramètres de requête triés, sans les valeurs vides."""
+    return sorted(
+        (name, value)
+        for name in query_params
+        for value in query_params.getlist(name)
+        if value != ''
+    )
+
+
+def response_key(request, action, catalogue_counter, pk=None):
+    if pk is None:
+        scope = f'list:{catalogue_counter}'
+    elif isinstance(get_cache(), LocMemCache):
+        scope = f'retrieve:{pk}:v{catalogue_counter}'
+    else:
+        generation = get_cache().get(_generation_key(pk), 0)
+        scope = f'retrieve:{pk}:{generation}'
+    # L'hôte entre dans les URL absolues des réponses (liens de pagination)
+    signature = hashlib.md5(
+        repr((request.get_host(), request.is_secure(), normalized_params(request.query_params))).encode('utf-8')
+    ).hexdigest()
+    return f'{KEY_PREFIX}:{action}:{scope}:{signature}'
+
+
+def cached_response(request, action, catalogue_counter, render, pk=None):
+    """
+    Retourne la réponse en cache pour cette requête, ou appelle ``render()``
+    et met ses données en cache si elle aboutit (statut 200).
+    """
+    cache = get_cache()
+    key = response_key(request, action, catalogue_counter, pk)
+    data = cache.get(key)
+    if data is not None:
+        _count('hits')
+        return Response(data)
+
+    _count('misses')
+    response = render()
+    if response.status_code == 200:
+        cache.set(key, response.data, getattr(settings, 'VEHICLE_RESPONSE_CACHE_TTL', 300))
+    return response
@@ -0,0 +1,164 @@
+"""
+Recherche plein texte dans le catalogue de véhicules.
+
+Sur PostgreSQL, la recherche s'appuie sur la colonne ``vehicles.search_vector``
+(tsvector pondéré : marque et modèle en A, description en C) tenue à jour par
+un trigger et indexée en GIN, ainsi que sur un index trigramme pour
+l'autocomplétion (voir la migration ``0007_vehicle_search_index``). La
+configuration ``french_unaccent`` rend la recherche insensible aux accents et
+chaque terme est recherché comme préfixe (« elec » trouve « Électrique »).
+
+Sur les autres bases (SQLite en test et en développement), une implémentation
+de repli en Python reproduit le même comportement sans index.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import BooleanField, Case, FloatField, Value, When
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+from .models import Vehicle
+
+SEARCH_CONFIG = 'french_unaccent'
+
+# Poids des champs dans le classement de repli (équivalents des poids A et C)
+FALLBACK_WEIGHTS = {'brand': 1.0, 'model': 1.0, 'description': 0.2}
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def uses_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def normalize(text):
+    """Minuscules sans accents : « Électrique » -> « electrique »."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def search_terms(query):
+    """Termes de la recherche, sans ponctuation (et donc sans opérateur tsquery)."""
+    return TERM_RE.findall(normalize(query))
+
+
+def to_tsquery(terms):
+    """Chaque terme est recherché comme préfixe et tous doivent être présents."""
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def search_vehicles(queryset, query):
+    """
+    Filtre ``queryset`` sur les véhicules correspondant à ``query`` et
+    l'annote avec ``search_rank`` (pertinence, plus grand = meilleur).
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    if uses_postgres():
+        return _search_postgres(queryset, terms)
+    return _search_fallback(queryset, terms)
+
+
+def _search_postgres(queryset, terms):
+    tsquery = to_tsquery(terms)
+    table = Vehicle._meta.db_table
+    matches = RawSQL(
+        f"{table}.search_vector @@ to_tsquery('{SEARCH_CONFIG}', %s)",
+        [tsquery],
+        output_field=BooleanField(),
+    )
+    rank = RawSQL(
+        f"ts_rank_cd({table}.search_vector, to_tsquery('{SEARCH_CONFIG}', %s))",
+        [tsquery],
+        output_field=FloatField(),
+    )
+    return queryset.filter(matches).annotate(search_rank=rank)
+
+
+def _fallback_rank(vehicle, terms):
+    """Score d'un véhicule : somme des poids des champs contenant chaque terme (en préfixe)."""
+    words = {
+        field: TERM_RE.findall(normalize(vehicle[field]))
+        for field in FALLBACK_WEIGHTS
+    }
+    rank = 0.0
+    for term in terms:
+        weights = [
+            weight for field, weight in FALLBACK_WEIGHTS.items()
+            if any(word.startswith(term) for word in words[field])
+        ]
+        if not weights:
+            return None
+        rank += sum(weights)
+    return rank
+
+
+def _search_fallback(queryset, terms):
+    ranks = {}
+    for vehicle in queryset.values('id', *FALLBACK_WEIGHTS):
+        rank = _fallback_rank(vehicle, terms)
+        if rank is not None:
+            ranks[vehicle['id']] = rank
+    if not ranks:
+        return queryset.none()
+    rank = Case(
+        *[When(id=vehicle_id, then=Value(value)) for vehicle_id, value in ranks.items()],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    return queryset.filter(id__in=ranks).annotate(search_rank=rank)
+
+
+def suggest(prefix, queryset=None, limit=10):
+    """
+    Suggestions d'autocomplétion « marque modèle » pour un début de saisie,
+    les plus proches en premier.
+    """
+    queryset = queryset if queryset is not None else Vehicle.objects.all()
+    needle = ' '.join(search_terms(prefix))
+    if not needle:
+        return []
+
+    if uses_postgres():
+        name = "vehicles_unaccent(lower(brand || ' ' || model))"
+        rows = (
+            queryset
+            .filter(RawSQL(f"{name} LIKE '%%' || %s || '%%'", [needle], output_field=BooleanField()))
+            .annotate(similarity=RawSQL(f"word_similarity(%s, {name})", [needle], output_field=FloatField()))
+            .values_list('brand', 'model', 'similarity')
+            .order_by('-similarity', 'brand', 'model')
+            .distinct()[:limit * 3]
+        )
+    else:
+        candidates = set()
+        terms = needle.split()
+        for brand, model in queryset.values_list('brand', 'model').distinct():
+            words = TERM_RE.findall(normalize(f"{brand} {model}"))
+            if all(any(word.startswith(term) for word in words) for term in terms):
+                candidates.add((brand, model))
+        # Les noms commençant par la saisie d'abord, puis par ordre alphabétique
+        rows = sorted(
+            ((brand, model, 1.0 if normalize(f"{brand} {model}").startswith(needle) else 0.5)
+             for brand, model in candidates),
+            key=lambda row: (-row[2], row[0], row[1])
+        )
+
+    suggestions = []
+    for brand, model, _ in rows:
+        label = f"{brand} {model}"
+        if label not in suggestions:
+            suggestions.append(label)
+        if len(suggestions) >= limit:
+            break
+    return suggestions
+
+
+class VehicleSearchFilter(filters.SearchFilter):
+    """Paramètre ``?search=`` du catalogue, servi par l'index plein texte."""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        return search_vehicles(queryset, query)
@@ -1,36 +1,51 @@
 from rest_framework import serializers
-from .models import Vehicle
-from django.conf import settings
+from django.db import models
+from .models import Booking, Vehicle
+from .images import image_url, resolve
+from .thumbnails import srcset, thumbnails_ready
+
+
+class VehicleImageField(serializers.ImageField):
+    """ImageField dont l'URL est fournie par le résolveur mémorisé (vehicle/images.py)."""
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = resolve(value.name).storage_url
+        request = self.context.get('request', None)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
 
 class VehicleSerializer(serializers.ModelSerializer):
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.ImageField: VehicleImageField,
+    }
     image_url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
     is_available = serializers.SerializerMethodField()
 
     class Meta:
         model = Vehicle
         fields = ['id', 'brand', 'model', 'year', 'mileage', 'sale_price', 
                  'rental_price', 'type_offer', 'state', 'description', 'image', 
-                 'image_url', 'has_insurance', 'has_maintenance', 'date_added',
+                 'image_url', 'srcset', 'has_insurance', 'has_maintenance', 'date_added',
                  'is_available']
         read_only_fields = ('owner', 'renter')
 
     def get_image_url(self, obj):
-        if obj.image:
-            # Récupérer le nom du fichier sans le chemin
-            image_name = obj.image.name
-            if '/' in image_name:
-                image_name = image_name.split('/')[-1]
-            
-            # Construire l'URL S3 complète
-            s3_url = f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/media/vehicles/{image_name}"
-            
-            # Log pour déboguer
-            print("Image details:")
-            print(f"Original name: {obj.image.name}")
-            print(f"S3 URL: {s3_url}")
-            
-            return s3_url
-        return None
+        return image_url(obj.image)
+
+    def get_srcset(self, obj):
+        # Vignettes WebP/JPEG générées en arrière-plan (vehicle/thumbnails.py), une fois la tâche terminée
+        if not obj.image:
+            return None
+        ready = getattr(obj, 'thumbnails_ready', None)
+        if ready is None:
+            ready = thumbnails_ready(obj.image.name)
+        return srcset(obj.image.name) if ready else None
         
     def get_is_available(self, obj):
         return obj.state == 'AVAILABLE'
@@ -50,4 +65,18 @@ class VehicleDetailSerializer(VehicleSerializer):
         ]
         read_only_fields = VehicleSerializer.Meta.read_only_fields + (
             'created_at', 'updated_at'
-        ) 
\ No newline at end of file
+        ) 
+
+
+class BookingSerializer(serializers.ModelSerializer):
+    """Réservation d'un véhicule sur une période (dates incluses)."""
+
+    class Meta:
+        model = Booking
+        fields = ['id', 'vehicle', 'renter', 'start_date', 'end_date', 'status', 'created_at']
+        read_only_fields = ('vehicle', 'status', 'created_at')
+
+    def validate(self, data):
+        if data['end_date'] < data['start_date']:
+            raise serializers.ValidationError("La date de fin doit être postérieure à la date de début")
+        return data
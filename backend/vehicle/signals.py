@@ -0,0 +1,41 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .catalogue import bump_catalogue_version
+from .models import Booking, Vehicle
+from .thumbnails import schedule_derivatives
+
+
+@receiver(pre_save, sender=Vehicle)
+def remember_previous_image(sender, instance, update_fields=None, **kwargs):
+    """Mémorise la photo enregistrée en base pour détecter un nouvel upload."""
+    if instance.pk is None or (update_fields is not None and 'image' not in update_fields):
+        instance._previous_image = None
+        return
+    instance._previous_image = (
+        Vehicle.objects.filter(pk=instance.pk).values_list('image', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Vehicle)
+def vehicle_image_changed(sender, instance, created, update_fields=None, **kwargs):
+    """Nouvelle photo (API, admin Django...) : génération des vignettes en file d'attente."""
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    name = instance.image.name if instance.image else None
+    if name and name != getattr(instance, '_previous_image', None):
+        schedule_derivatives(name)
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+def vehicle_changed(sender, instance, **kwargs):
+    """Toute écriture sur un véhicule change la version du catalogue (ETag)."""
+    bump_catalogue_version([instance.id])
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def booking_changed(sender, instance, **kwargs):
+    """Une réservation change la disponibilité, donc les réponses filtrées du catalogue."""
+    bump_catalogue_version([instance.vehicle_id])
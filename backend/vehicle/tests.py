@@ -1,3 +1,493 @@
-from django.test import TestCase
+import base64
+import json
+import tempfile
+from datetime import date, timedelta
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from config.testing import UnmanagedTablesTestCase
+from user.models import User
+from .availability import available_between, exclude_booked
+from .bulk import bulk_assign_owner, bulk_change_state
+from .facets import compute_facets
+from .models import Booking, ThumbnailJob, Vehicle
+from .response_cache import _generation_key, get_cache
+from .search import search_vehicles, suggest
+from .serializers import VehicleSerializer
+from .thumbnails import (
+    claim_next_job, derivative_name, mark_generated, requeue_stale_jobs, run_job, schedule_derivatives,
+)
+
+
+class VehicleTablesTestCase(UnmanagedTablesTestCase):
+    unmanaged_models = (User, Vehicle)
+
+
+class AvailabilityTests(VehicleTablesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        def vehicle(model):
+            return Vehicle.objects.create(
+                brand='Renault', model=model, year=2020, mileage=0, type_offer='RENTAL', state='AVAILABLE'
+            )
+
+        cls.free = vehicle('Clio')
+        cls.booked = vehicle('Captur')
+        cls.cancelled = vehicle('Zoe')
+        Booking.objects.create(vehicle=cls.booked, start_date=date(2024, 6, 10), end_date=date(2024, 6, 15))
+        Booking.objects.create(
+            vehicle=cls.cancelled, start_date=date(2024, 6, 10), end_date=date(2024, 6, 15), status='CANCELLED'
+        )
+
+    def assertAvailable(self, queryset, expected):
+        self.assertEqual(set(queryset.values_list('id', flat=True)), {vehicle.id for vehicle in expected})
+
+    def test_exclude_booked_dates_inclusive(self):
+        vehicles = Vehicle.objects.all()
+        # La sous-requête NOT EXISTS utilisée sur PostgreSQL, exécutée sur la base de test
+        self.assertAvailable(
+            exclude_booked(vehicles, date(2024, 6, 15), date(2024, 6, 20)), [self.free, self.cancelled]
+        )
+        self.assertAvailable(
+            exclude_booked(vehicles, date(2024, 6, 16), date(2024, 6, 20)), [self.free, self.booked, self.cancelled]
+        )
+
+    def test_available_between(self):
+        self.assertAvailable(
+            available_between(Vehicle.objects.all(), date(2024, 6, 1), date(2024, 6, 10)), [self.free, self.cancelled]
+        )
+
+    def test_available_between_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertAvailable(
+                available_between(Vehicle.objects.all(), date(2024, 6, 12), date(2024, 6, 13)),
+                [self.free, self.cancelled],
+            )
+
+    @skipUnless(connection.vendor == 'postgresql', "Requête PostgreSQL de la recherche de disponibilité")
+    def test_available_between_uses_gist_expression(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertAvailable(
+                available_between(Vehicle.objects.all(), date(2024, 6, 12), date(2024, 6, 13)),
+                [self.free, self.cancelled],
+            )
+        # Même expression que l'index GiST de la contrainte booking_no_overlap
+        self.assertIn('daterange(U0."start_date", U0."end_date"', queries[0]['sql'])
+        self.assertIn('&&', queries[0]['sql'])
+
+
+class AdjacentVehicleTests(VehicleTablesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='client', email='client@abd.fr', role='CLIENT')
+        cls.old, cls.recent, cls.newest = [
+            Vehicle.objects.create(
+                brand='Renault', model='Clio', year=year, mileage=0, type_offer='SALE', state='AVAILABLE'
+            )
+            for year in (2018, 2022, 2022)
+        ]
+
+    def adjacent(self, vehicle):
+        client = APIClient(HTTP_HOST='localhost')
+        client.force_authenticate(self.user)
+        response = client.get(f'/api/vehicles/{vehicle.id}/adjacent/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_adjacent_follows_catalogue_order(self):
+        # Ordre du catalogue : newest (2022, id le plus grand), recent (2022), old (2018)
+        self.assertEqual(self.adjacent(self.newest), {'previous': None, 'next': self.recent.id})
+        self.assertEqual(self.adjacent(self.recent), {'previous': self.newest.id, 'next': self.old.id})
+        self.assertEqual(self.adjacent(self.old), {'previous': self.recent.id, 'next': None})
+
+
+class BulkUpdateTests(VehicleTablesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='gestionnaire', email='g@abd.fr', role='GESTIONNAIRE')
+        cls.vehicles = [
+            Vehicle.objects.create(
+                brand='Renault', model='Clio', year=2020, mileage=0, type_offer='SALE', state='AVAILABLE'
+            )
+            for _ in range(4)
+        ]
+
+    def test_non_scalar_values_are_reported_per_item(self):
+        first, second, third, fourth = [vehicle.id for vehicle in self.vehicles]
+        result = bulk_change_state([(first, ['SOLD']), (second, {'state': 'SOLD'}), (third, True), (fourth, 'SOLD')])
+        self.assertEqual(
+            [item['status'] for item in result['results']], ['error', 'error', 'error', 'updated']
+        )
+        self.assertEqual(result['results'][0]['error'], 'Valeur invalide')
+        self.assertEqual(
+            list(Vehicle.objects.order_by('id').values_list('state', flat=True)),
+            ['AVAILABLE', 'AVAILABLE', 'AVAILABLE', 'SOLD'],
+        )
+
+        result = bulk_assign_owner([(first, [self.owner.id]), (second, self.owner.id)])
+        self.assertEqual([item['status'] for item in result['results']], ['error', 'updated'])
+        self.assertEqual(Vehicle.objects.get(id=second).owner_id, self.owner.id)
+
+
+class ThumbnailQueueTests(VehicleTablesTestCase):
+    def test_scheduled_job_is_persisted_once(self):
+        schedule_derivatives('vehicles/clio.jpg')
+        schedule_derivatives('vehicles/clio.jpg')
+        self.assertEqual(ThumbnailJob.objects.filter(image='vehicles/clio.jpg', status='QUEUED').count(), 1)
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        schedule_derivatives('vehicles/clio.jpg')
+        with mock.patch('vehicle.thumbnails.generate_derivatives', side_effect=OSError('photo illisible')):
+            self.assertFalse(run_job(claim_next_job(), max_attempts=2))
+            self.assertEqual(ThumbnailJob.objects.get().status, 'QUEUED')
+            self.assertFalse(run_job(claim_next_job(), max_attempts=2))
+        job = ThumbnailJob.objects.get()
+        self.assertEqual((job.status, job.attempts, job.error), ('FAILED', 2, 'photo illisible'))
+        self.assertIsNone(claim_next_job())
+
+    def test_successful_job_is_done(self):
+        schedule_derivatives('vehicles/clio.jpg')
+        with mock.patch('vehicle.thumbnails.generate_derivatives') as generate:
+            self.assertTrue(run_job(claim_next_job()))
+        generate.assert_called_once_with('vehicles/clio.jpg')
+        self.assertEqual(ThumbnailJob.objects.get().status, 'DONE')
+
+    def test_stale_job_is_requeued(self):
+        schedule_derivatives('vehicles/clio.jpg')
+        job = claim_next_job()
+        ThumbnailJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(stale_after=300), 1)
+        self.assertEqual(claim_next_job().attempts, 2)
+
+    def test_derivative_names_keep_the_source_extension(self):
+        self.assertNotEqual(
+            derivative_name('vehicles/car.jpg', 320, 'webp'), derivative_name('vehicles/car.png', 320, 'webp')
+        )
+        self.assertEqual(derivative_name('vehicles/car.jpg', 320, 'webp'), 'vehicles/car_jpg_320w.webp')
+
+    def test_saving_a_new_image_queues_a_job(self):
+        vehicle = Vehicle.objects.create(
+            brand='Renault', model='Clio', year=2020, mileage=0, type_offer='RENTAL', state='AVAILABLE',
+            image='vehicles/clio.jpg',
+        )
+        vehicle.mileage = 100
+        vehicle.save()
+        self.assertEqual(list(ThumbnailJob.objects.values_list('image', flat=True)), ['vehicles/clio.jpg'])
+        vehicle.image = 'vehicles/clio2.jpg'
+        vehicle.save()
+        self.assertEqual(ThumbnailJob.objects.filter(image='vehicles/clio2.jpg').count(), 1)
+
+    def test_srcset_only_once_the_job_is_done(self):
+        vehicle = Vehicle.objects.create(
+            brand='Renault', model='Clio', year=2020, mileage=0, type_offer='RENTAL', state='AVAILABLE',
+            image='vehicles/clio.jpg',
+        )
+        self.assertIsNone(VehicleSerializer(vehicle).data['srcset'])
+        with mock.patch('vehicle.thumbnails.generate_derivatives', side_effect=OSError('photo illisible')):
+            run_job(claim_next_job(), max_attempts=1)
+        self.assertIsNone(VehicleSerializer(vehicle).data['srcset'])
+        mark_generated(['vehicles/clio.jpg'])
+        self.assertIn('clio_jpg_320w.webp', VehicleSerializer(vehicle).data['srcset']['webp'])
+
+
+class ResponseCacheTests(VehicleTablesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='client', email='client@abd.fr', role='CLIENT')
+        cls.vehicle = Vehicle.objects.create(
+            brand='Renault', model='Clio', year=2020, mileage=1000, type_offer='SALE', state='AVAILABLE'
+        )
+
+    def setUp(self):
+        # Cache partagé entre processus : le détail suit la génération propre au véhicule
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        caches = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'vehicles': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory.name},
+        }
+        overrides = override_settings(CACHES=caches, VEHICLE_RESPONSE_CACHE_ALIAS='vehicles')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.user)
+
+    def mileage(self):
+        response = self.client.get(f'/api/vehicles/{self.vehicle.id}/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.data['mileage']
+
+    def test_write_then_read_returns_fresh_data(self):
+        self.assertEqual(self.mileage(), 1000)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vehicle.mileage = 2000
+            self.vehicle.save()
+            # Pas d'invalidation avant le commit : une lecture concurrente verrait encore l'ancien état
+            self.assertIsNone(get_cache().get(_generation_key(self.vehicle.id)))
+        self.assertEqual(get_cache().get(_generation_key(self.vehicle.id)), 1)
+        self.assertEqual(self.mileage(), 2000)
+
+
+class KeysetPaginationTests(VehicleTablesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='client', email='client@abd.fr', role='CLIENT')
+        # Années en double (départage par id) et prix non renseignés (en fin de liste)
+        cls.vehicles = [
+            Vehicle.objects.create(
+                brand='Renault', model=f'Clio {i}', year=2018 + i % 3, mileage=i, type_offer='SALE',
+                state='AVAILABLE', sale_price=None if i % 4 == 0 else 10000 + 1000 * (i % 3),
+            )
+            for i in range(7)
+        ]
+
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.user)
+
+    def get(self, params):
+        response = self.client.get('/api/vehicles/', params, secure=True)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def cursor(self, link):
+        return parse_qs(urlparse(link).query)['cursor'][0]
+
+    def walk(self, ordering):
+        """Identifiants de toutes les pages (deux véhicules par page) en suivant les liens ``next``."""
+        params = {'ordering': ordering, 'page_size': 2}
+        ids, pages = [], 0
+        while True:
+            data = self.get(params)
+            ids += [vehicle['id'] for vehicle in data['results']]
+            pages += 1
+            if not data['next']:
+                return ids, pages
+            params['cursor'] = self.cursor(data['next'])
+
+    def test_pages_follow_ordering_with_id_tie_break(self):
+        ids, pages = self.walk('year')
+        expected = [v.id for v in sorted(self.vehicles, key=lambda v: (v.year, v.id))]
+        self.assertEqual((ids, pages), (expected, 4))
+
+        ids, _ = self.walk('-year')
+        self.assertEqual(ids, [v.id for v in sorted(self.vehicles, key=lambda v: (-v.year, -v.id))])
+
+    def test_null_values_come_last(self):
+        ids, _ = self.walk('sale_price')
+        priced = sorted((v for v in self.vehicles if v.sale_price is not None), key=lambda v: (v.sale_price, v.id))
+        unpriced = sorted((v for v in self.vehicles if v.sale_price is None), key=lambda v: v.id)
+        self.assertEqual(ids, [v.id for v in priced + unpriced])
+
+    def test_cursor_encodes_last_row_and_previous_link_goes_back(self):
+        first = self.get({'ordering': 'year', 'page_size': 2})
+        self.assertIsNone(first['previous'])
+        payload = json.loads(base64.urlsafe_b64decode(self.cursor(first['next'])))
+        last = first['results'][-1]
+        # Valeur sérialisée en texte, reconvertie par le champ du modèle au décodage
+        self.assertEqual(payload, {'o': 'year', 'v': str(last['year']), 'id': last['id'], 'r': False})
+
+        second = self.get({'ordering': 'year', 'page_size': 2, 'cursor': self.cursor(first['next'])})
+        back = self.get({'ordering': 'year', 'page_size': 2, 'cursor': self.cursor(second['previous'])})
+        self.assertEqual(back['results'], first['results'])
+
+    def test_invalid_cursor_is_rejected(self):
+        first = self.get({'ordering': 'year', 'page_size': 2})
+        for params in (
+            {'cursor': 'pas-un-curseur'},
+            {'cursor': base64.urlsafe_b64encode(b'[1, 2]').decode()},
+            # Curseur produit pour un autre tri
+            {'ordering': 'mileage', 'cursor': self.cursor(first['next'])},
+        ):
+            response = self.client.get('/api/vehicles/', {'ordering': 'year', **params}, secure=True)
+            self.assertEqual(response.status_code, 404, params)
+            self.assertEqual(response.data['detail'], 'Curseur invalide')
+
+
+class ConditionalRequestTests(VehicleTablesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='client', email='client@abd.fr', role='CLIENT')
+        cls.vehicle = Vehicle.objects.create(
+            brand='Renault', model='Clio', year=2020, mileage=1000, type_offer='SALE', state='AVAILABLE'
+        )
+
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.user)
+
+    def get(self, path, **headers):
+        return self.client.get(path, secure=True, **headers)
+
+    def test_if_none_match_returns_304_without_reading_the_catalogue(self):
+        for path in ('/api/vehicles/', f'/api/vehicles/{self.vehicle.id}/'):
+            response = self.get(path)
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+            with CaptureQueriesContext(connection) as queries:
+                response = self.get(path, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+            self.assertEqual(response.content, b'')
+            # Seule la version du catalogue est lue
+            self.assertEqual(len(queries), 1, [query['sql'] for query in queries])
+
+    def test_etag_changes_after_a_write(self):
+        etag = self.get('/api/vehicles/')['ETag']
+        self.vehicle.mileage = 2000
+        self.vehicle.save()
+        response = self.get('/api/vehicles/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['results'][0]['mileage'], 2000)
+
+        # Les mises à jour groupées changent aussi la version
+        etag = response['ETag']
+        bulk_change_state([(self.vehicle.id, 'SOLD')])
+        response = self.get(f'/api/vehicles/{self.vehicle.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['state'], 'SOLD')
+
+    def test_etag_depends_on_accept_header(self):
+        json_etag = self.get('/api/vehicles/', HTTP_ACCEPT='application/json')['ETag']
+        html_etag = self.get('/api/vehicles/', HTTP_ACCEPT='text/html')['ETag']
+        self.assertNotEqual(json_etag, html_etag)
+        response = self.get('/api/vehicles/', HTTP_ACCEPT='text/html', HTTP_IF_NONE_MATCH=json_etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class FacetTests(VehicleTablesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='client', email='client@abd.fr', role='CLIENT')
+        for brand, model, year, mileage, type_offer, state, sale_price, rental_price, fuel_type, transmission in (
+            ('Renault', 'Clio', 2019, 30000, 'SALE', 'AVAILABLE', 12000, None, 'DIESEL', 'MANUELLE'),
+            ('Renault', 'Zoe', 2021, 10000, 'RENTAL', 'AVAILABLE', None, 300, 'ELECTRIQUE', 'AUTOMATIQUE'),
+            ('Peugeot', '208', 2023, 0, 'SALE', 'SOLD', 21000, None, 'ESSENCE', 'MANUELLE'),
+            ('Peugeot', '3008', 2016, 80000, 'SALE', 'AVAILABLE', None, None, None, None),
+        ):
+            Vehicle.objects.create(
+                brand=brand, model=model, year=year, mileage=mileage, type_offer=type_offer, state=state,
+                sale_price=sale_price, rental_price=rental_price, fuel_type=fuel_type, transmission=transmission,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.user)
+
+    def facets(self, params=None):
+        response = self.client.get('/api/vehicles/facets/', params or {}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_counts_per_value(self):
+        data = self.facets()
+        self.assertEqual(data['count'], 4)
+        self.assertEqual(data['facets']['brand'], [{'value': 'Peugeot', 'count': 2}, {'value': 'Renault', 'count': 2}])
+        self.assertEqual(data['facets']['type_offer'], [{'value': 'SALE', 'count': 3}, {'value': 'RENTAL', 'count': 1}])
+        self.assertEqual(data['facets']['state'], [{'value': 'AVAILABLE', 'count': 3}, {'value': 'SOLD', 'count': 1}])
+        self.assertEqual(
+            [item['value'] for item in data['facets']['fuel_type']], ['DIESEL', 'ELECTRIQUE', 'ESSENCE', None]
+        )
+
+    def test_histograms(self):
+        histograms = self.facets()['histograms']
+        self.assertEqual(histograms['sale_price'], {
+            'min': 12000, 'max': 21000, 'interval': 5000, 'missing': 2,
+            'buckets': [{'from': 10000, 'to': 15000, 'count': 1}, {'from': 20000, 'to': 25000, 'count': 1}],
+        })
+        self.assertEqual(histograms['year']['buckets'], [
+            {'from': 2015, 'to': 2020, 'count': 2}, {'from': 2020, 'to': 2025, 'count': 2},
+        ])
+        self.assertEqual((histograms['year']['min'], histograms['year']['max']), (2016, 2023))
+
+    def test_facets_follow_filters(self):
+        data = self.facets({'brand': 'Renault', 'state': 'AVAILABLE'})
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(data['facets']['brand'], [{'value': 'Renault', 'count': 2}])
+        self.assertEqual(data['histograms']['mileage']['buckets'], [
+            {'from': 0, 'to': 25000, 'count': 1}, {'from': 25000, 'to': 50000, 'count': 1},
+        ])
+
+    def test_presentation_params_share_the_cache_entry(self):
+        with mock.patch('vehicle.facets.compute_facets', wraps=compute_facets) as compute:
+            first = self.facets({'brand': 'Renault'})
+            second = self.facets({'brand': 'Renault', 'view': 'card', 'ordering': 'year', 'page_size': 5})
+            self.facets({'brand': 'Peugeot'})
+        self.assertEqual(first, second)
+        self.assertEqual(compute.call_count, 2)
+
+
+class SearchTests(VehicleTablesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='client', email='client@abd.fr', role='CLIENT')
+
+        def vehicle(brand, model, description=''):
+            return Vehicle.objects.create(
+                brand=brand, model=model, year=2020, mileage=0, type_offer='SALE', state='AVAILABLE',
+                description=description,
+            )
+
+        cls.zoe = vehicle('Renault', 'Zoé', 'Citadine électrique, autonomie 390 km')
+        cls.clio = vehicle('Renault', 'Clio', 'Citadine essence, idéale en ville')
+        cls.e208 = vehicle('Peugeot', 'e-208', 'Version électrique de la 208')
+        cls.tesla = vehicle('Tesla', 'Model 3', 'Berline')
+
+    def ids(self, queryset):
+        return [vehicle.id for vehicle in queryset]
+
+    def test_matches_prefixes_without_accents(self):
+        self.assertEqual(set(self.ids(search_vehicles(Vehicle.objects.all(), 'ELEC'))), {self.zoe.id, self.e208.id})
+        self.assertEqual(self.ids(search_vehicles(Vehicle.objects.all(), 'zoe')), [self.zoe.id])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.ids(search_vehicles(Vehicle.objects.all(), 'renault citadine ville')), [self.clio.id])
+        self.assertEqual(self.ids(search_vehicles(Vehicle.objects.all(), 'renault berline')), [])
+
+    def test_brand_and_model_rank_above_description(self):
+        # « 208 » dans le modèle et dans la description
+        results = search_vehicles(Vehicle.objects.all(), '208')
+        self.assertEqual([(vehicle.id, vehicle.search_rank) for vehicle in results], [(self.e208.id, 1.2)])
+
+        results = search_vehicles(Vehicle.objects.all(), 'renault')
+        self.assertEqual({vehicle.search_rank for vehicle in results}, {1.0})
+        ranks = {vehicle.id: vehicle.search_rank for vehicle in search_vehicles(Vehicle.objects.all(), 'citadine')}
+        self.assertEqual(ranks, {self.zoe.id: 0.2, self.clio.id: 0.2})
+
+    def test_api_orders_by_relevance_unless_ordering_is_given(self):
+        client = APIClient(HTTP_HOST='localhost')
+        client.force_authenticate(self.user)
+        # « peugeot » dans la marque de la e-208 (poids A), dans la description de la Tesla (poids C)
+        Vehicle.objects.filter(pk=self.tesla.pk).update(description='Peugeot en comparaison')
+        response = client.get('/api/vehicles/', {'search': 'peugeot'}, secure=True)
+        self.assertEqual([vehicle['id'] for vehicle in response.data['results']], [self.e208.id, self.tesla.id])
+
+        response = client.get('/api/vehicles/', {'search': 'peugeot', 'ordering': '-date_added'}, secure=True)
+        self.assertEqual([vehicle['id'] for vehicle in response.data['results']], [self.tesla.id, self.e208.id])
+
+    def test_empty_query_returns_the_queryset_unchanged(self):
+        queryset = Vehicle.objects.all()
+        for query in ('', '   ', '?!'):
+            results = search_vehicles(queryset, query)
+            self.assertIs(results, queryset)
+            self.assertNotIn('search_rank', results.query.annotations)
+
+    def test_suggest(self):
+        self.assertEqual(suggest('ren'), ['Renault Clio', 'Renault Zoé'])
+        self.assertEqual(suggest('zo'), ['Renault Zoé'])
+        # Les noms commençant par la saisie passent devant
+        Vehicle.objects.create(
+            brand='Dacia', model='Spring Renault', year=2022, mileage=0, type_offer='SALE', state='AVAILABLE'
+        )
+        self.assertEqual(suggest('renault', limit=2), ['Renault Clio', 'Renault Zoé'])
+        self.assertEqual(suggest('renault')[-1], 'Dacia Spring Renault')
+        self.assertEqual(suggest('  '), [])
@@ -0,0 +1,145 @@
+"""
+Vignettes responsives des photos de véhicules.
+
+Pour une photo ``vehicles/<nom>.<ext>``, une vignette est générée pour chaque
+largeur de ``vehicle.imaging.WIDTHS`` et chaque format (WebP et JPEG), à côté
+de l'original : ``vehicles/<nom>_<ext>_<largeur>w.<ext du format>`` (l'extension
+de l'original distingue ``car.jpg`` de ``car.png``). Les noms sont déterministes :
+les URL du ``srcset`` se calculent sans accès au stockage. Le ``srcset`` n'est
+renvoyé qu'une fois la tâche de la photo terminée (``thumbnails_ready``).
+
+Après un upload, la génération est placée dans une file d'attente stockée en
+base : le signal ``post_save`` du véhicule (vehicle/signals.py) crée un
+``ThumbnailJob`` juste après l'enregistrement, quel que soit le point d'entrée
+(API, admin Django). La file survit au redémarrage des workers Gunicorn. La commande
+``python manage.py run_thumbnail_worker`` réserve les tâches une par une
+(``SELECT ... FOR UPDATE SKIP LOCKED``) ; ``python manage.py
+generate_vehicle_thumbnails`` traite les photos existantes avec un pool de processus.
+"""
+import logging
+import posixpath
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from config import job_queue
+from config.storage_backends import ThumbnailStorage
+
+from .imaging import FORMATS, WIDTHS, render_derivatives
+from .catalogue import bump_catalogue_version
+from .models import ThumbnailJob, Vehicle
+
+logger = logging.getLogger(__name__)
+
+_storage = None
+
+
+def thumbnail_storage():
+    global _storage
+    if _storage is None:
+        _storage = ThumbnailStorage()
+    return _storage
+
+
+def derivative_name(name, width, format_name):
+    """Nom de la vignette ``format_name`` de largeur ``width`` de la photo ``name``."""
+    stem, ext = posixpath.splitext(name.split('/')[-1])
+    if ext:
+        stem = f"{stem}_{ext[1:]}"
+    return f"vehicles/{stem}_{width}w.{FORMATS[format_name][1]}"
+
+
+def with_thumbnails_ready(queryset):
+    """Annote ``thumbnails_ready`` : une tâche de vignettes terminée existe pour la photo du véhicule."""
+    return queryset.annotate(thumbnails_ready=Exists(
+        ThumbnailJob.objects.filter(image=OuterRef('image'), status='DONE')
+    ))
+
+
+def thumbnails_ready(name):
+    return ThumbnailJob.objects.filter(image=name, status='DONE').exists()
+
+
+@lru_cache(maxsize=getattr(settings, 'VEHICLE_IMAGE_URL_CACHE_SIZE', 16384))
+def srcset(name):
+    """``{format: "url 320w, url 640w, ..."}`` pour la photo ``name``, mémorisé par processus."""
+    return {
+        format_name: ', '.join(
+            f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/media/{derivative_name(name, width, format_name)} {width}w"
+            for width in WIDTHS
+        )
+        for format_name in FORMATS
+    }
+
+
+def store_derivatives(name, derivatives):
+    """Enregistre les vignettes calculées par ``render_derivatives``."""
+    storage = thumbnail_storage()
+    # La plus grande vignette WebP est écrite en dernier : sa présence indique une génération complète
+    ordered = sorted(derivatives.items(), key=lambda item: (item[0][1], item[0][0] == 'webp'))
+    for (format_name, width), content in ordered:
+        storage.save(derivative_name(name, width, format_name), ContentFile(content))
+
+
+def generate_derivatives(name):
+    """Lit la photo ``name``, calcule ses vignettes et les enregistre."""
+    with default_storage.open(name, 'rb') as original:
+        data = original.read()
+    store_derivatives(name, render_derivatives(data))
+    logger.info(f"Vignettes générées pour {name}")
+
+
+def schedule_derivatives(name):
+    """Place la génération des vignettes de ``name`` dans la file d'attente."""
+    if ThumbnailJob.objects.filter(image=name, status='QUEUED').exists():
+        return None
+    job = ThumbnailJob.objects.create(image=name)
+    logger.info(f"Vignettes de {name} mises en file d'attente (tâche {job.id})")
+    return job
+
+
+def mark_generated(names):
+    """Enregistre comme terminées les vignettes de ``names`` générées hors de la file (commande de reprise)."""
+    done = set(ThumbnailJob.objects.filter(image__in=names, status='DONE').values_list('image', flat=True))
+    missing = [name for name in names if name not in done]
+    if not missing:
+        return 0
+    now = timezone.now()
+    ThumbnailJob.objects.bulk_create(
+        ThumbnailJob(image=name, status='DONE', started_at=now, finished_at=now) for name in missing
+    )
+    _refresh_catalogue(missing)
+    return len(missing)
+
+
+def _refresh_catalogue(names):
+    # Le srcset apparaît dans les réponses : les versions en cache deviennent obsolètes
+    bump_catalogue_version(list(Vehicle.objects.filter(image__in=names).values_list('id', flat=True)))
+
+
+def requeue_stale_jobs(stale_after=None):
+    """Remet en file d'attente les tâches restées bloquées par un worker arrêté."""
+    stale_after = stale_after or getattr(settings, 'VEHICLE_THUMBNAIL_STALE_AFTER', 300)
+    return job_queue.requeue_stale_jobs(ThumbnailJob, stale_after)
+
+
+def claim_next_job():
+    """Réserve la plus ancienne tâche de vignettes en attente, ou retourne None si la file est vide."""
+    return job_queue.claim_next_job(ThumbnailJob)
+
+
+def run_job(job, max_attempts=None):
+    """Génère les vignettes d'une tâche réservée et enregistre son résultat."""
+    max_attempts = max_attempts or getattr(settings, 'VEHICLE_THUMBNAIL_MAX_ATTEMPTS', 3)
+    try:
+        generate_derivatives(job.image)
+    except Exception as e:
+        logger.error(f"Erreur lors de la génération des vignettes de {job.image} (tentative {job.attempts}): {str(e)}")
+        job_queue.record_failure(job, e, max_attempts)
+        return False
+    job_queue.record_success(job)
+    _refresh_catalogue([job.image])
+    return True
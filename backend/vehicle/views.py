@@ -1,17 +1,33 @@
+import logging
 from django.shortcuts import render
 from rest_framework import viewsets, filters, status, permissions
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import rest_framework as django_filters
 from .models import Vehicle
-from .serializers import VehicleSerializer, VehicleDetailSerializer
+from .serializers import VehicleSerializer, VehicleDetailSerializer, BookingSerializer
+from .pagination import KeysetPagination
+from .search import VehicleSearchFilter, suggest
+from .facets import cached_facets
+from .images import resolve
+from .thumbnails import with_thumbnails_ready
+from .catalogue import conditional_response
+from .projections import card_data, card_rows
+from .availability import BookingConflict, available_between, check_booking_available
+from .response_cache import cached_response
+from .bulk import (
+    BulkRequestError, bulk_assign_owner, bulk_change_state, bulk_create_vehicles,
+    bulk_switch_type, parse_items,
+)
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from user.permissions import IsGestionnaireOrAdmin
 from user.models import User
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.conf import settings
-import boto3
+from config.storage_backends import get_s3_client
+
+logger = logging.getLogger(__name__)
 
 # Create your views here.
 
@@ -23,6 +39,8 @@ class VehicleFilter(django_filters.FilterSet):
     min_mileage = django_filters.NumberFilter(field_name='mileage', lookup_expr='gte')
     max_mileage = django_filters.NumberFilter(field_name='mileage', lookup_expr='lte')
     is_available = django_filters.BooleanFilter(method='filter_is_available')
+    available_from = django_filters.DateFilter(method='filter_available')
+    available_to = django_filters.DateFilter(method='filter_available')
 
     def filter_is_available(self, queryset, name, value):
         if value:
@@ -30,6 +48,14 @@ class VehicleFilter(django_filters.FilterSet):
         else:
             return queryset.exclude(state='AVAILABLE')
 
+    def filter_available(self, queryset, name, value):
+        # Les deux bornes sont appliquées ensemble ; une seule borne vaut pour une journée
+        start = self.form.cleaned_data.get('available_from')
+        end = self.form.cleaned_data.get('available_to')
+        if name == 'available_to' and start:
+            return queryset
+        return available_between(queryset, start or end, end or start)
+
     class Meta:
         model = Vehicle
         fields = {
@@ -44,10 +70,35 @@ class VehicleFilter(django_filters.FilterSet):
 class VehicleViewSet(viewsets.ModelViewSet):
     queryset = Vehicle.objects.all()
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, VehicleSearchFilter, filters.OrderingFilter]
     filterset_class = VehicleFilter
-    search_fields = ['brand', 'model', 'description']
+    search_fields = ['brand', 'model', 'description']  # Indexés par vehicle/search.py
     ordering_fields = ['sale_price', 'rental_price', 'year', 'mileage', 'date_added']
+    pagination_class = KeysetPagination
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('view') == 'card':
+            render_list = lambda: self.card_list(request)
+        else:
+            render_list = lambda: super(VehicleViewSet, self).list(request, *args, **kwargs)
+        return conditional_response(request, lambda version: cached_response(
+            request, 'list', version.counter, render_list
+        ))
+
+    def card_list(self, request):
+        """Liste allégée pour la grille du catalogue (``?view=card``), sans instancier de modèles."""
+        rows = card_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(card_data(page, request))
+        return Response(card_data(rows, request))
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_response(request, lambda version: cached_response(
+            request, 'retrieve', version.counter,
+            lambda: super(VehicleViewSet, self).retrieve(request, *args, **kwargs),
+            pk=kwargs.get(self.lookup_field)
+        ))
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -55,13 +106,117 @@ class VehicleViewSet(viewsets.ModelViewSet):
         return VehicleSerializer
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy', 'switch_type']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'switch_type',
+                           'bulk_create', 'bulk_change_state', 'bulk_assign_owner', 'bulk_switch_type']:
+            return [IsAuthenticated(), IsGestionnaireOrAdmin()]
+        if self.action == 'bookings' and self.request.method == 'POST':
             return [IsAuthenticated(), IsGestionnaireOrAdmin()]
         return [IsAuthenticated()]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            # Le srcset n'est renvoyé qu'une fois les vignettes générées
+            queryset = with_thumbnails_ready(queryset)
+        return queryset
+
     def perform_create(self, serializer):
+        # Les vignettes de la photo sont mises en file par vehicle/signals.py
         serializer.save(owner=self.request.user)
 
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Nombre de véhicules par marque, type d'offre, état, carburant et boîte,
+        et histogrammes de prix, d'année et de kilométrage, pour les filtres courants.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(cached_facets(queryset, request.query_params))
+
+    @action(detail=False, methods=['get'])
+    def suggest(self, request):
+        """Autocomplétion « marque modèle » : ``?q=<début de saisie>&limit=10``."""
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        return Response({'suggestions': suggest(request.query_params.get('q', ''), limit=limit)})
+
+    @action(detail=True, methods=['get'])
+    def adjacent(self, request, pk=None):
+        """
+        Identifiants des véhicules précédent et suivant dans l'ordre du catalogue
+        (année décroissante, puis identifiant décroissant), sans charger le catalogue.
+        """
+        vehicle = self.get_object()
+        before = models.Q(year__gt=vehicle.year) | models.Q(year=vehicle.year, id__gt=vehicle.id)
+        after = models.Q(year__lt=vehicle.year) | models.Q(year=vehicle.year, id__lt=vehicle.id)
+        ids = Vehicle.objects.values_list('id', flat=True)
+        return Response({
+            'previous': ids.filter(before).order_by('year', 'id').first(),
+            'next': ids.filter(after).order_by('-year', '-id').first(),
+        })
+
+    @action(detail=True, methods=['get', 'post'])
+    def bookings(self, request, pk=None):
+        """Réservations confirmées du véhicule (GET) ou nouvelle réservation (POST)."""
+        vehicle = self.get_object()
+        if request.method == 'GET':
+            bookings = vehicle.bookings.filter(status='CONFIRMED')
+            return Response(BookingSerializer(bookings, many=True).data)
+
+        serializer = BookingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                check_booking_available(
+                    vehicle, serializer.validated_data['start_date'], serializer.validated_data['end_date']
+                )
+                serializer.save(vehicle=vehicle)
+        except (BookingConflict, IntegrityError):
+            # IntegrityError : contrainte d'exclusion PostgreSQL en cas de réservations concurrentes
+            return Response(
+                {'error': 'Le véhicule est déjà réservé sur cette période'},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsGestionnaireOrAdmin])
+    def bulk_create(self, request):
+        """Crée plusieurs véhicules : ``{"vehicles": [{...}, ...]}``."""
+        try:
+            result = bulk_create_vehicles(request.data.get('vehicles'), request.user, VehicleSerializer)
+        except BulkRequestError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsGestionnaireOrAdmin])
+    def bulk_change_state(self, request):
+        """Change l'état de plusieurs véhicules : ``{"ids": [...], "state": ..}`` ou ``{"items": [{"id": .., "state": ..}]}``."""
+        try:
+            result = bulk_change_state(parse_items(request.data, 'state'))
+        except BulkRequestError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsGestionnaireOrAdmin])
+    def bulk_assign_owner(self, request):
+        """Assigne un propriétaire : ``{"ids": [...], "owner_id": ..}`` ou ``{"items": [{"id": .., "owner_id": ..}]}``."""
+        try:
+            result = bulk_assign_owner(parse_items(request.data, 'owner_id'))
+        except BulkRequestError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsGestionnaireOrAdmin])
+    def bulk_switch_type(self, request):
+        """Bascule vente/location de plusieurs véhicules : ``{"ids": [...]}``."""
+        try:
+            pairs = parse_items(request.data, 'type_offer')
+        except BulkRequestError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(bulk_switch_type([vehicle_id for vehicle_id, _ in pairs]))
+
     @action(detail=True, methods=['post'], permission_classes=[IsGestionnaireOrAdmin])
     def change_state(self, request, pk=None):
         vehicle = self.get_object()
@@ -120,44 +275,39 @@ class VehicleViewSet(viewsets.ModelViewSet):
                 'message': 'Pas d\'image pour ce véhicule'
             })
 
+        resolved = resolve(vehicle.image.name)
+
         # Vérifier si l'image existe dans S3
         if hasattr(settings, 'USE_S3') and settings.USE_S3:
             try:
-                s3 = boto3.client('s3',
-                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                    region_name=settings.AWS_S3_REGION_NAME
-                )
-                
-                # Construire le chemin S3
-                s3_path = f"media/vehicles/{vehicle.image.name.split('/')[-1]}"
+                s3 = get_s3_client()
                 
                 try:
-                    s3.head_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=s3_path)
+                    s3.head_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=resolved.s3_key)
                     exists_in_s3 = True
                 except Exception as e:
                     exists_in_s3 = False
-                    print(f"Erreur de vérification S3: {str(e)}")
+                    logger.warning(f"Erreur de vérification S3: {str(e)}")
 
                 return Response({
                     'status': 'success',
                     'image_name': vehicle.image.name,
-                    'image_url': vehicle.image.url,
+                    'image_url': resolved.url,
                     'exists_in_s3': exists_in_s3,
-                    's3_path': s3_path if exists_in_s3 else None
+                    's3_path': resolved.s3_key if exists_in_s3 else None
                 })
             except Exception as e:
-                print(f"Erreur S3: {str(e)}")
+                logger.error(f"Erreur S3: {str(e)}")
                 return Response({
                     'status': 'warning',
                     'message': f"Erreur lors de la vérification S3: {str(e)}",
                     'image_name': vehicle.image.name,
-                    'image_url': vehicle.image.url
+                    'image_url': resolved.url
                 })
         
         return Response({
             'status': 'success',
             'image_name': vehicle.image.name,
-            'image_url': vehicle.image.url,
+            'image_url': resolved.storage_url,
             'storage': 'local'
         })
@@ -199,6 +199,54 @@ StandardError=append:/var/log/gunicorn/error.log
 WantedBy=multi-user.target
 EOL'
 
+# Configuration du worker d'extraction des documents GenIA
+log_message "Configuration du worker d'extraction GenIA..."
+sudo bash -c 'cat > /etc/systemd/system/genia-worker.service << EOL
+[Unit]
+Description=GenIA document extraction worker for ABD Motors
+After=network.target
+
+[Service]
+User=ubuntu
+Group=www-data
+WorkingDirectory=/home/ubuntu/ABD-Motors/backend
+Environment="PATH=/home/ubuntu/ABD-Motors/backend/venv/bin"
+Environment="DEBUG=False"
+Environment="PYTHONUNBUFFERED=1"
+ExecStart=/home/ubuntu/ABD-Motors/backend/venv/bin/python manage.py run_extraction_worker --concurrency 2
+Restart=on-failure
+RestartSec=5
+StandardOutput=append:/var/log/gunicorn/genia-worker.log
+StandardError=append:/var/log/gunicorn/genia-worker.log
+
+[Install]
+WantedBy=multi-user.target
+EOL'
+
+# Configuration du worker de génération des vignettes des véhicules
+log_message "Configuration du worker de vignettes..."
+sudo bash -c 'cat > /etc/systemd/system/thumbnail-worker.service << EOL
+[Unit]
+Description=Vehicle thumbnail worker for ABD Motors
+After=network.target
+
+[Service]
+User=ubuntu
+Group=www-data
+WorkingDirectory=/home/ubuntu/ABD-Motors/backend
+Environment="PATH=/home/ubuntu/ABD-Motors/backend/venv/bin"
+Environment="DEBUG=False"
+Environment="PYTHONUNBUFFERED=1"
+ExecStart=/home/ubuntu/ABD-Motors/backend/venv/bin/python manage.py run_thumbnail_worker
+Restart=on-failure
+RestartSec=5
+StandardOutput=append:/var/log/gunicorn/thumbnail-worker.log
+StandardError=append:/var/log/gunicorn/thumbnail-worker.log
+
+[Install]
+WantedBy=multi-user.target
+EOL'
+
 # Configuration du service Ollama pour le démarrage automatique
 log_message "Configuration du service Ollama..."
 sudo bash -c 'cat > /etc/systemd/system/ollama.service << EOL
@@ -223,6 +271,10 @@ log_message "Démarrage des services..."
 sudo systemctl daemon-reload
 sudo systemctl enable gunicorn
 sudo systemctl restart gunicorn
+sudo systemctl enable genia-worker
+sudo systemctl restart genia-worker
+sudo systemctl enable thumbnail-worker
+sudo systemctl restart thumbnail-worker
 sudo systemctl enable ollama
 sudo systemctl restart ollama
 
@@ -105,8 +105,16 @@ const VehicleCard = ({ vehicle }) => {
                     component="img"
                     height="200"
                     image={vehicle.image || '/placeholder-car.jpg'}
+                    srcSet={vehicle.srcset?.webp}
+                    sizes="(max-width: 600px) 100vw, 400px"
                     alt={`${vehicle.brand} ${vehicle.model}`}
                     onError={(e) => {
+                        // Vignettes pas encore générées : revenir à la photo d'origine
+                        if (e.target.srcset) {
+                            e.target.removeAttribute('srcset');
+                            e.target.src = vehicle.image || '/placeholder-car.jpg';
+                            return;
+                        }
                         e.target.src = '/placeholder-car.jpg';
                     }}
                     sx={{
@@ -16,11 +16,10 @@ import { LocalizationProvider } from '@mui/x-date-pickers/LocalizationProvider';
 import { AdapterDateFns } from '@mui/x-date-pickers/AdapterDateFns';
 import { fr } from 'date-fns/locale';
 import { getVehicleById } from '../services/vehicleService';
-import { createFolder } from '../services/folderService';
+import { createFolder, uploadFolderFile } from '../services/folderService';
 import LoadingScreen from '../components/LoadingScreen';
 import ErrorAlert from '../components/ErrorAlert';
 import { FOLDER_STATUS } from '../utils/constants';
-import api from '../services/api';
 
 const steps = ['Dates de location', 'Documents requis', 'Confirmation'];
 
@@ -90,34 +89,13 @@ const FolderCreation = () => {
             // 2. Uploader les fichiers
             const filePromises = [];
             if (folderData.idCard) {
-                const fileData = new FormData();
-                fileData.append('file', folderData.idCard);
-                fileData.append('file_type', 'ID_CARD');
-                filePromises.push(api.post(`/folders/${folder.id}/files/`, fileData, {
-                    headers: {
-                        'Content-Type': 'multipart/form-data',
-                    },
-                }));
+                filePromises.push(uploadFolderFile(folder.id, folderData.idCard, 'ID_CARD'));
             }
             if (folderData.drivingLicense) {
-                const fileData = new FormData();
-                fileData.append('file', folderData.drivingLicense);
-                fileData.append('file_type', 'DRIVER_LICENSE');
-                filePromises.push(api.post(`/folders/${folder.id}/files/`, fileData, {
-                    headers: {
-                        'Content-Type': 'multipart/form-data',
-                    },
-                }));
+                filePromises.push(uploadFolderFile(folder.id, folderData.drivingLicense, 'DRIVING_LICENSE'));
             }
             if (folderData.signedContract) {
-                const fileData = new FormData();
-                fileData.append('file', folderData.signedContract);
-                fileData.append('file_type', 'OTHER');
-                filePromises.push(api.post(`/folders/${folder.id}/files/`, fileData, {
-                    headers: {
-                        'Content-Type': 'multipart/form-data',
-                    },
-                }));
+                filePromises.push(uploadFolderFile(folder.id, folderData.signedContract, 'SIGNED_CONTRACT'));
             }
 
             await Promise.all(filePromises);
@@ -17,6 +17,7 @@ const GeniaPage = () => {
   const [selectedDocuments, setSelectedDocuments] = useState([]);
   const [file, setFile] = useState(null);
   const [s3Documents, setS3Documents] = useState([]);
+  const [s3NextCursor, setS3NextCursor] = useState(null);
   const [s3Loading, setS3Loading] = useState(false);
   const [showS3Modal, setShowS3Modal] = useState(false);
 
@@ -151,12 +152,15 @@ const GeniaPage = () => {
     }
   };
 
-  // Fonction pour lister les documents dans S3
-  const fetchS3Documents = async () => {
+  // Fonction pour lister les documents dans S3 (une page à la fois, `cursor` pour la page suivante)
+  const fetchS3Documents = async (cursor = null) => {
     setS3Loading(true);
     try {
-      const response = await api.get('/genia/documents/list_s3_documents/');
-      setS3Documents(response.data);
+      const response = await api.get('/genia/documents/list_s3_documents/', {
+        params: cursor ? { cursor } : {}
+      });
+      setS3Documents(previous => cursor ? [...previous, ...response.data.results] : response.data.results);
+      setS3NextCursor(response.data.next_cursor || null);
       setShowS3Modal(true);
     } catch (error) {
       console.error('Erreur lors du chargement des documents S3:', error);
@@ -265,7 +269,7 @@ const GeniaPage = () => {
               color="secondary"
               fullWidth
               sx={{ mt: 1 }}
-              onClick={fetchS3Documents}
+              onClick={() => fetchS3Documents()}
               disabled={s3Loading}
               startIcon={s3Loading ? <CircularProgress size={20} /> : <CloudDownload />}
             >
@@ -404,6 +408,17 @@ const GeniaPage = () => {
                     </Button>
                   </Box>
                 ))}
+                {s3NextCursor && (
+                  <Box sx={{ display: 'flex', justifyContent: 'center' }}>
+                    <Button
+                      variant="outlined"
+                      onClick={() => fetchS3Documents(s3NextCursor)}
+                      disabled={s3Loading}
+                    >
+                      {s3Loading ? <CircularProgress size={24} /> : 'Charger plus'}
+                    </Button>
+                  </Box>
+                )}
               </Box>
             )}
             
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
     Container,
     Grid,
@@ -16,6 +16,8 @@ import {
     MenuItem,
     IconButton,
     Divider,
+    Button,
+    CircularProgress,
     useTheme,
 } from '@mui/material';
 import VehicleCard from '../components/VehicleCard';
@@ -28,55 +30,79 @@ import DirectionsCarIcon from '@mui/icons-material/DirectionsCar';
 import SortIcon from '@mui/icons-material/Sort';
 import RestartAltIcon from '@mui/icons-material/RestartAlt';
 
+// Véhicules chargés par page : les suivantes sont demandées à la demande (« Afficher plus »)
+const PAGE_SIZE = 24;
+
+// Paramètres de l'API pour les filtres et le tri choisis : le tri et le filtrage
+// sont faits par le serveur, le catalogue n'étant jamais chargé en entier
+const buildParams = ({ searchTerm, typeFilter, sortBy, showOnlyAvailable }) => {
+    const priceField = typeFilter === 'RENTAL' ? 'rental_price' : 'sale_price';
+    const ordering = {
+        year_desc: '-year',
+        year_asc: 'year',
+        price_asc: priceField,
+        price_desc: `-${priceField}`,
+    }[sortBy] || '-year';
+    const params = { view: 'card', page_size: PAGE_SIZE, ordering };
+    if (searchTerm.trim()) params.search = searchTerm.trim();
+    if (typeFilter !== 'ALL') params.type_offer = typeFilter;
+    if (showOnlyAvailable) params.is_available = true;
+    return params;
+};
+
 const VehicleList = () => {
     const theme = useTheme();
     const [vehicles, setVehicles] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [error, setError] = useState(null);
     const [searchTerm, setSearchTerm] = useState('');
     const [typeFilter, setTypeFilter] = useState('ALL');
     const [sortBy, setSortBy] = useState('year_desc');
     const [showOnlyAvailable, setShowOnlyAvailable] = useState(false);
+    // Numéro de la dernière recherche : les réponses d'une recherche remplacée sont ignorées
+    const requestId = useRef(0);
 
     useEffect(() => {
+        const currentRequest = ++requestId.current;
         const fetchVehicles = async () => {
             try {
-                const data = await getVehicles();
-                setVehicles(data);
+                const page = await getVehicles(buildParams({ searchTerm, typeFilter, sortBy, showOnlyAvailable }));
+                if (currentRequest !== requestId.current) return;
+                setVehicles(page.results);
+                setNextPage(page.next);
+                setError(null);
             } catch (error) {
-                setError('Erreur lors du chargement des véhicules');
+                if (currentRequest === requestId.current) {
+                    setError('Erreur lors du chargement des véhicules');
+                }
             } finally {
-                setLoading(false);
+                if (currentRequest === requestId.current) {
+                    setLoading(false);
+                }
             }
         };
 
-        fetchVehicles();
-    }, []);
+        // Attendre la fin de la saisie avant d'interroger l'API
+        const timer = setTimeout(fetchVehicles, searchTerm ? 300 : 0);
+        return () => clearTimeout(timer);
+    }, [searchTerm, typeFilter, sortBy, showOnlyAvailable]);
 
-    const filteredVehicles = vehicles
-        .filter(vehicle => {
-            const matchesSearch = vehicle.brand.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                                vehicle.model.toLowerCase().includes(searchTerm.toLowerCase());
-            const matchesType = typeFilter === 'ALL' || vehicle.type_offer === typeFilter;
-            const matchesAvailability = !showOnlyAvailable || vehicle.state === 'AVAILABLE';
-            return matchesSearch && matchesType && matchesAvailability;
-        })
-        .sort((a, b) => {
-            switch (sortBy) {
-                case 'price_asc':
-                    return (a.type_offer === 'SALE' ? a.sale_price : a.rental_price) -
-                           (b.type_offer === 'SALE' ? b.sale_price : b.rental_price);
-                case 'price_desc':
-                    return (b.type_offer === 'SALE' ? b.sale_price : b.rental_price) -
-                           (a.type_offer === 'SALE' ? a.sale_price : a.rental_price);
-                case 'year_desc':
-                    return b.year - a.year;
-                case 'year_asc':
-                    return a.year - b.year;
-                default:
-                    return b.year - a.year;
-            }
-        });
+    const handleLoadMore = async () => {
+        const currentRequest = requestId.current;
+        setLoadingMore(true);
+        try {
+            const page = await getVehicles(null, nextPage);
+            if (currentRequest !== requestId.current) return;
+            setVehicles(previous => [...previous, ...page.results]);
+            setNextPage(page.next);
+        } catch (error) {
+            setError('Erreur lors du chargement des véhicules');
+        } finally {
+            setLoadingMore(false);
+        }
+    };
 
     const handleResetFilters = () => {
         setSearchTerm('');
@@ -132,7 +158,7 @@ const VehicleList = () => {
                                         <DirectionsCarIcon sx={{ fontSize: 40, color: 'white' }} />
                                         <Box>
                                             <Typography sx={{ color: 'white' }}>
-                                                Total de véhicules :
+                                                Véhicules affichés :
                                             </Typography>
                                             <Typography variant="h4" sx={{ color: 'white' }}>
                                                 {vehicles.length}
@@ -249,11 +275,11 @@ const VehicleList = () => {
                 {/* Résultats de la recherche */}
                 <Box sx={{ mb: 3 }}>
                     <Typography variant="h6" color="text.secondary" gutterBottom>
-                        {filteredVehicles.length} résultats trouvés
+                        {vehicles.length}{nextPage ? '+' : ''} résultats trouvés
                     </Typography>
                 </Box>
 
-                {filteredVehicles.length === 0 ? (
+                {vehicles.length === 0 ? (
                     <Card sx={{ p: 4, textAlign: 'center' }}>
                         <DirectionsCarIcon sx={{ fontSize: 60, color: 'text.secondary', mb: 2 }} />
                         <Typography variant="h6" color="text.secondary" gutterBottom>
@@ -265,13 +291,26 @@ const VehicleList = () => {
                     </Card>
                 ) : (
                     <Grid container spacing={3}>
-                        {filteredVehicles.map((vehicle) => (
+                        {vehicles.map((vehicle) => (
                             <Grid item xs={12} sm={6} md={4} key={vehicle.id}>
                                 <VehicleCard vehicle={vehicle} />
                             </Grid>
                         ))}
                     </Grid>
                 )}
+
+                {nextPage && (
+                    <Box sx={{ display: 'flex', justifyContent: 'center', mt: 4 }}>
+                        <Button
+                            variant="outlined"
+                            onClick={handleLoadMore}
+                            disabled={loadingMore}
+                            startIcon={loadingMore ? <CircularProgress size={20} /> : null}
+                        >
+                            Afficher plus de véhicules
+                        </Button>
+                    </Box>
+                )}
             </Container>
         </Box>
     );
@@ -32,4 +32,41 @@ export const getUserFolders = async () => {
 export const updateFolderStatus = async (folderId, status) => {
     const { data } = await api.patch(`/folders/${folderId}/`, { status });
     return data;
-}; 
\ No newline at end of file
+}; 
+// Envoi direct d'un fichier vers S3 : l'API fournit un formulaire présigné
+// (ou une URL par partie pour les gros fichiers), puis crée le fichier une fois l'objet déposé.
+export const uploadFolderFile = async (folderId, file, documentType) => {
+    const { data: upload } = await api.post(`/folders/${folderId}/files/upload_url/`, {
+        filename: file.name,
+        content_type: file.type,
+        size: file.size,
+        document_type: documentType,
+    });
+
+    const completion = { upload_token: upload.upload_token };
+    if (upload.method === 'MULTIPART') {
+        completion.parts = [];
+        for (const part of upload.parts) {
+            const start = (part.part_number - 1) * upload.part_size;
+            const response = await fetch(part.url, {
+                method: 'PUT',
+                body: file.slice(start, start + upload.part_size),
+            });
+            if (!response.ok) {
+                throw new Error('Erreur lors de l\'envoi du fichier');
+            }
+            completion.parts.push({ part_number: part.part_number, etag: response.headers.get('ETag') });
+        }
+    } else {
+        const form = new FormData();
+        Object.entries(upload.post.fields).forEach(([name, value]) => form.append(name, value));
+        form.append('file', file);
+        const response = await fetch(upload.post.url, { method: 'POST', body: form });
+        if (!response.ok) {
+            throw new Error('Erreur lors de l\'envoi du fichier');
+        }
+    }
+
+    const { data } = await api.post(`/folders/${folderId}/files/complete_upload/`, completion);
+    return data;
+};
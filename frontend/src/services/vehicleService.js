@@ -1,11 +1,11 @@
 import api from './api';
 
-export const getVehicles = async () => {
-    const { data } = await api.get('/vehicles/', {
-        params: {
-            ordering: '-year'
-        }
-    });
+// Le catalogue est paginé par curseur : une page à la fois, `next` contient l'URL
+// de la page suivante (null sur la dernière page)
+export const getVehicles = async (params = { ordering: '-year', view: 'card' }, pageUrl = null) => {
+    const { data } = pageUrl
+        ? await api.get(pageUrl)
+        : await api.get('/vehicles/', { params });
     return data;
 };
 
@@ -14,17 +14,8 @@ export const getVehicleById = async (id) => {
     return data;
 };
 
+// Véhicules précédent et suivant dans le catalogue (année décroissante), calculés par l'API
 export const getAdjacentVehicles = async (currentId) => {
-    const { data: vehicles } = await api.get('/vehicles/', {
-        params: {
-            ordering: '-year'
-        }
-    });
-    
-    const currentIndex = vehicles.findIndex(v => v.id === parseInt(currentId));
-    
-    return {
-        previous: currentIndex > 0 ? vehicles[currentIndex - 1].id : null,
-        next: currentIndex < vehicles.length - 1 ? vehicles[currentIndex + 1].id : null
-    };
-}; 
\ No newline at end of file
+    const { data } = await api.get(`/vehicles/${currentId}/adjacent/`);
+    return data;
+};